@@ -0,0 +1,100 @@
+"""
+Recall@k vs latency of the IVF approximate index against exact (brute-force) recall.
+
+Run from the repository root:
+    python -m benchmarks.ann_recall_benchmark --entities 100000 --queries 200
+"""
+import argparse
+import time
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from core.vector_index import EntityVectorIndex
+from core.ann_index import IVFIndex
+
+console = Console()
+
+
+def build_synthetic_index(n_entities, dim, n_topics, noise, seed):
+    """Clustered vectors (topics + noise) roughly mimic how word vectors group."""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    labels = rng.integers(0, n_topics, n_entities)
+    vectors = topics[labels] + noise * rng.standard_normal((n_entities, dim)).astype(np.float32)
+    scores = rng.uniform(-1, 1, n_entities).astype(np.float32)
+
+    index = EntityVectorIndex(dim=dim, initial_capacity=n_entities)
+    for i in range(n_entities):
+        index.upsert(f"entity_{i}", vectors[i], score=scores[i])
+    return index, topics
+
+
+def make_queries(topics, n_queries, noise, seed):
+    rng = np.random.default_rng(seed + 1)
+    picks = topics[rng.integers(0, len(topics), n_queries)]
+    return picks + noise * rng.standard_normal(picks.shape).astype(np.float32)
+
+
+def time_queries(index, queries, k, threshold, ivf=None, nprobe=None):
+    results, start = [], time.perf_counter()
+    for q in queries:
+        rows = ivf.candidate_rows(q, index, nprobe=nprobe) if ivf else None
+        results.append([r[0] for r in index.weighted_top_k(q, threshold, k, rows=rows)])
+    elapsed = time.perf_counter() - start
+    return results, elapsed / len(queries) * 1000
+
+
+def recall_at_k(exact, approx):
+    hits = total = 0
+    for truth, found in zip(exact, approx):
+        total += len(truth)
+        hits += len(set(truth) & set(found))
+    return hits / total if total else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=300)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=1.5, help="Spread around each topic (higher = harder)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.0)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    console.print(f"[cyan]Building {args.entities:,} x {args.dim} synthetic entity matrix...[/cyan]")
+    index, topics = build_synthetic_index(args.entities, args.dim, args.topics, args.noise, args.seed)
+    queries = make_queries(topics, args.queries, args.noise, args.seed)
+
+    start = time.perf_counter()
+    ivf = IVFIndex(min_train_size=0, seed=args.seed)
+    ivf.train(index)
+    console.print(f"[dim]IVF trained with {len(ivf.lists)} lists in {time.perf_counter() - start:.2f}s[/dim]")
+
+    exact, exact_ms = time_queries(index, queries, args.k, args.threshold)
+
+    table = Table(title=f"Recall@{args.k} vs latency ({args.entities:,} entities)")
+    table.add_column("Mode", style="cyan")
+    table.add_column(f"Recall@{args.k}", justify="right")
+    table.add_column("ms/query", justify="right")
+    table.add_column("Speedup", justify="right")
+    table.add_row("exact", "1.000", f"{exact_ms:.3f}", "1.0x")
+
+    for nprobe in args.nprobe:
+        approx, ms = time_queries(index, queries, args.k, args.threshold, ivf=ivf, nprobe=nprobe)
+        table.add_row(
+            f"ivf nprobe={nprobe}",
+            f"{recall_at_k(exact, approx):.3f}",
+            f"{ms:.3f}",
+            f"{exact_ms / ms:.1f}x"
+        )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Load test for chat_server.py against the mock LM Studio server.
+Starts the mock and the chat server in-process, then `--clients` threads each open sessions
+and run `--turns` turns per session. Reports sessions/sec and p50/p99 turn latency.
+
+Run from the repository root:
+    python -m benchmarks.chat_server_load_test --sessions 200 --turns 5 --clients 16
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import threading
+import time
+import requests
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.mock_lmstudio import start_mock_server
+from core import api_connector
+from core.session_pool import SessionPool
+from chat_server import ChatServer
+
+console = Console()
+
+MESSAGES = [
+    "I love gothic fiction and Edgar Allan Poe.",
+    "I hate noisy parties.",
+    "What do you think about dark art?",
+    "My favorite anime has a haunted manor in it.",
+    "Tell me more about heavy metal.",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_client(base_url, session_ids, turns, latencies, errors):
+    http = requests.Session()
+    for session_id in session_ids:
+        for turn in range(turns):
+            start = time.perf_counter()
+            response = http.post(
+                f"{base_url}/sessions/{session_id}/chat",
+                data=json.dumps({"message": MESSAGES[turn % len(MESSAGES)]}),
+                headers={"Content-Type": "application/json"}
+            )
+            elapsed = time.perf_counter() - start
+            if response.status_code == 200:
+                latencies.append(elapsed)
+            else:
+                errors.append(response.status_code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=5, help="Turns per session")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent client threads")
+    parser.add_argument("--max-concurrent", type=int, default=4, help="Server turn slots")
+    parser.add_argument("--max-sessions", type=int, default=64, help="Live sessions before LRU eviction")
+    parser.add_argument("--llm-delay", type=float, default=0.05, help="Mock LLM latency per request (seconds)")
+    parser.add_argument("--llm-parallel", type=int, default=64, help="Requests the mock LLM serves at once")
+    parser.add_argument("--pipelined", action="store_true")
+    args = parser.parse_args()
+
+    llm, llm_url = start_mock_server(latency=args.llm_delay, parallel=args.llm_parallel, prefix_cache=False)
+    api_connector.API_URL = llm_url
+
+    pool = SessionPool(
+        system_prompt="Load test",
+        root_dir=tempfile.mkdtemp(prefix="chat_sessions_"),
+        max_concurrent_turns=args.max_concurrent,
+        queue_timeout=120.0,
+        max_sessions=args.max_sessions,
+        pipelined=args.pipelined
+    )
+    server = ChatServer(("127.0.0.1", 0), pool)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Warm the shared spaCy model so the first session doesn't pay for it
+    requests.post(f"{base_url}/sessions/warmup/chat", json={"message": MESSAGES[0]})
+
+    session_ids = [f"load-{i}" for i in range(args.sessions)]
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(
+            target=run_client,
+            args=(base_url, session_ids[i::args.clients], args.turns, latencies, errors)
+        )
+        for i in range(args.clients)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stats = requests.get(f"{base_url}/health").json()
+    server.shutdown()
+    server.server_close()
+    llm.shutdown()
+
+    table = Table(title=f"Chat server load ({args.clients} clients, {args.max_concurrent} turn slots)")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", justify="right")
+    table.add_row("Sessions", f"{args.sessions} x {args.turns} turns")
+    table.add_row("Elapsed", f"{elapsed:.2f}s")
+    table.add_row("Sessions/sec", f"{args.sessions / elapsed:.1f}")
+    table.add_row("Turns/sec", f"{len(latencies) / elapsed:.1f}")
+    if latencies:
+        table.add_row("p50 turn latency", f"{percentile(latencies, 50) * 1000:.1f} ms")
+        table.add_row("p99 turn latency", f"{percentile(latencies, 99) * 1000:.1f} ms")
+        table.add_row("mean turn latency", f"{statistics.mean(latencies) * 1000:.1f} ms")
+    table.add_row("Errors", str(len(errors)))
+    table.add_row("Evicted to disk", str(stats["evicted"]))
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
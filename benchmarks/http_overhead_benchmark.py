@@ -0,0 +1,71 @@
+"""
+Per-call HTTP overhead: a bare requests.post per turn (new TCP connection each time)
+vs the pooled keep-alive session from core.http_client.
+The target is a local stub server that answers instantly, so the numbers are pure client/transport cost.
+
+Run from the repository root:
+    python -m benchmarks.http_overhead_benchmark --calls 500
+"""
+import argparse
+import statistics
+import time
+import requests
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.mock_lmstudio import start_mock_server
+from core.http_client import create_session, default_timeout
+
+console = Console()
+
+PAYLOAD = {"model": "stub", "messages": [{"role": "user", "content": "ping"}]}
+
+
+def time_calls(post, url, calls):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        response = post(url, json=PAYLOAD, timeout=default_timeout())
+        response.json()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    args = parser.parse_args()
+
+    server, url = start_mock_server(reply_text="pong", prefix_cache=False, parallel=64)
+    session = create_session()
+    modes = [("requests.post (no pooling)", requests.post), ("pooled session", session.post)]
+
+    table = Table(title=f"HTTP overhead per call ({args.calls} calls, local stub)")
+    table.add_column("Mode", style="cyan")
+    table.add_column("mean ms", justify="right")
+    table.add_column("p50 ms", justify="right")
+    table.add_column("p95 ms", justify="right")
+    table.add_column("Speedup", justify="right")
+
+    baseline = None
+    for name, post in modes:
+        time_calls(post, url, args.warmup)
+        latencies = time_calls(post, url, args.calls)
+        mean = statistics.mean(latencies)
+        baseline = baseline or mean
+        table.add_row(
+            name,
+            f"{mean:.3f}",
+            f"{statistics.median(latencies):.3f}",
+            f"{statistics.quantiles(latencies, n=20)[-1]:.3f}",
+            f"{baseline / mean:.1f}x"
+        )
+
+    console.print(table)
+    session.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Summarize LLM call telemetry per session and show how prompt size relates to latency.
+
+Every ConversationManager appends one record per request to llm_calls.jsonl in its memory
+directory (prompt/completion tokens, wall time, time-to-first-token, tokens/sec and the size of
+the injected memory block). This reads those logs, prints per-session totals, buckets calls by
+prompt size, and fits latency against prompt tokens to show what prompt growth costs in prefill.
+
+Run from the repository root (directories are searched recursively):
+    python -m benchmarks.llm_usage_report data/memory data/sessions
+    python -m benchmarks.llm_usage_report data/sessions --buckets 6 --output usage.json
+"""
+import argparse
+import json
+import os
+import statistics
+from collections import defaultdict
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from core.llm_telemetry import LLMCallLog
+
+console = Console()
+
+
+# ----- Loading -----
+def find_logs(paths):
+    logs = []
+    for path in paths:
+        if os.path.isfile(path):
+            logs.append(path)
+            continue
+        for root, _, files in os.walk(path):
+            if LLMCallLog.FILENAME in files:
+                logs.append(os.path.join(root, LLMCallLog.FILENAME))
+    return sorted(logs)
+
+
+def load_records(paths):
+    """Successful calls from every log; the session defaults to the log's directory name."""
+    records = []
+    for log in find_logs(paths):
+        session = os.path.basename(os.path.dirname(os.path.abspath(log)))
+        for record in LLMCallLog(log).load():
+            if record.get("error") or record.get("prompt_tokens") is None:
+                continue
+            record.setdefault("session", session)
+            records.append(record)
+    return records
+
+
+# ----- Analysis -----
+def _mean(values):
+    values = [v for v in values if v is not None]
+    return statistics.mean(values) if values else None
+
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else None
+
+
+def summarize_sessions(records):
+    sessions = defaultdict(list)
+    for record in records:
+        sessions[record["session"]].append(record)
+    return {
+        session: {
+            "calls": len(calls),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+            "completion_tokens": sum(c.get("completion_tokens") or 0 for c in calls),
+            "mean_prompt_tokens": _mean(c["prompt_tokens"] for c in calls),
+            "mean_memory_tokens": _mean(c.get("memory_tokens") for c in calls),
+            "p50_total_s": _median(c["total_s"] for c in calls),
+            "p50_first_token_s": _median(c.get("first_token_s") for c in calls),
+            "mean_tokens_per_s": _mean(c.get("tokens_per_s") for c in calls),
+            "estimated": sum(c.get("usage_source") == "estimate" for c in calls),
+        }
+        for session, calls in sorted(sessions.items())
+    }
+
+
+def prompt_size_buckets(records, buckets=5):
+    """Calls split into equal-count buckets by prompt tokens, with latency per bucket."""
+    ordered = sorted(records, key=lambda r: r["prompt_tokens"])
+    rows = []
+    for part in np.array_split(np.arange(len(ordered)), min(buckets, len(ordered))):
+        calls = [ordered[i] for i in part]
+        rows.append({
+            "min_prompt_tokens": calls[0]["prompt_tokens"],
+            "max_prompt_tokens": calls[-1]["prompt_tokens"],
+            "calls": len(calls),
+            "mean_memory_tokens": _mean(c.get("memory_tokens") for c in calls),
+            "p50_first_token_s": _median(c.get("first_token_s") for c in calls),
+            "p50_total_s": _median(c["total_s"] for c in calls),
+            "mean_tokens_per_s": _mean(c.get("tokens_per_s") for c in calls),
+        })
+    return rows
+
+
+def latency_fit(records, field):
+    """Least-squares `field` seconds vs prompt tokens: ms per 1k prompt tokens, intercept ms, r."""
+    points = [(r["prompt_tokens"], r[field]) for r in records if r.get(field) is not None]
+    if len(points) < 3 or len({x for x, _ in points}) < 2:
+        return None
+    x, y = np.array(points, dtype=np.float64).T
+    slope, intercept = np.polyfit(x, y, 1)
+    return {
+        "field": field,
+        "calls": len(points),
+        "ms_per_1k_prompt_tokens": float(slope * 1e6),
+        "intercept_ms": float(intercept * 1000),
+        "r": float(np.corrcoef(x, y)[0, 1]),
+    }
+
+
+def build_report(records, buckets=5):
+    return {
+        "calls": len(records),
+        "sessions": summarize_sessions(records),
+        "buckets": prompt_size_buckets(records, buckets) if records else [],
+        "fits": [fit for fit in (latency_fit(records, "first_token_s"), latency_fit(records, "total_s")) if fit],
+    }
+
+
+# ----- Reporting -----
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+def _num(value, fmt="{:.1f}"):
+    return "-" if value is None else fmt.format(value)
+
+
+def print_report(report):
+    sessions = Table(title=f"LLM calls per session ({report['calls']} calls)")
+    sessions.add_column("Session", style="cyan")
+    for column in ["Calls", "Prompt tok", "Completion tok", "Mean prompt", "Mean memory",
+                   "p50 TTFT ms", "p50 total ms", "tok/s"]:
+        sessions.add_column(column, justify="right")
+    for session, s in report["sessions"].items():
+        estimated = f" ({s['estimated']} est.)" if s["estimated"] else ""
+        sessions.add_row(
+            session, f"{s['calls']}{estimated}", f"{s['prompt_tokens']:,}", f"{s['completion_tokens']:,}",
+            _num(s["mean_prompt_tokens"], "{:.0f}"), _num(s["mean_memory_tokens"], "{:.0f}"),
+            _ms(s["p50_first_token_s"]), _ms(s["p50_total_s"]), _num(s["mean_tokens_per_s"])
+        )
+    console.print(sessions)
+
+    buckets = Table(title="Latency by prompt size")
+    buckets.add_column("Prompt tokens", style="cyan")
+    for column in ["Calls", "Mean memory", "p50 TTFT ms", "p50 total ms", "tok/s"]:
+        buckets.add_column(column, justify="right")
+    for b in report["buckets"]:
+        buckets.add_row(
+            f"{b['min_prompt_tokens']}-{b['max_prompt_tokens']}", str(b["calls"]),
+            _num(b["mean_memory_tokens"], "{:.0f}"), _ms(b["p50_first_token_s"]),
+            _ms(b["p50_total_s"]), _num(b["mean_tokens_per_s"])
+        )
+    console.print(buckets)
+
+    for fit in report["fits"]:
+        console.print(
+            f"[dim]{fit['field']}: +{fit['ms_per_1k_prompt_tokens']:.1f} ms per 1k prompt tokens "
+            f"(intercept {fit['intercept_ms']:.0f} ms, r={fit['r']:.2f}, {fit['calls']} calls)[/dim]"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", default=["data/memory", "data/sessions"],
+                        help="Memory directories, session roots or llm_calls.jsonl files")
+    parser.add_argument("--buckets", type=int, default=5, help="Prompt-size buckets (equal call counts)")
+    parser.add_argument("--output", help="Also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    records = load_records(args.paths)
+    if not records:
+        console.print(f"[yellow]No LLM calls logged under {', '.join(args.paths)}[/yellow]")
+        return
+    report = build_report(records, args.buckets)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        console.print(f"[green]Report written to {args.output}[/green]")
+
+
+if __name__ == "__main__":
+    main()
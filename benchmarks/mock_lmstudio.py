@@ -0,0 +1,271 @@
+"""
+Deterministic stand-in for LM Studio's OpenAI-compatible API, for offline tests and benchmarks.
+
+    POST /v1/chat/completions   (plain JSON or "stream": true server-sent events)
+    GET  /v1/models
+
+Timings follow a simple model of a local inference server: prompt tokens are processed at
+--prompt-tps (tokens already in the single-slot prefix cache are free), then the reply is
+generated at --gen-tps. Replies are drawn from a seeded RNG keyed on the request, so the same
+prompt always gets the same reply. --error-rate injects 503s from a seeded sequence.
+
+Run from the repository root (then point API_URL in data/config.env at it):
+    python -m benchmarks.mock_lmstudio --port 1234 --prompt-tps 800 --gen-tps 40
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODEL_ID = "mock/lmstudio"
+
+# ChatML-style rendering, roughly what a local server feeds the model
+TEMPLATE_TOKEN_PATTERN = re.compile(r"<\|[a-z_]+\|>|\w+|[^\w\s]")
+
+VOCABULARY = (
+    "the moon shadow art manga ink raven gothic night quiet page novel candle poe dark "
+    "music metal ghost sketch dream silence window rain story old house velvet heart "
+    "i you we it is was and but so like love think maybe really always never"
+).split()
+
+
+def prompt_tokens(messages):
+    text = "".join(f"<|im_start|>{m['role']}\n{m.get('content') or ''}<|im_end|>\n" for m in messages)
+    return TEMPLATE_TOKEN_PATTERN.findall(text + "<|im_start|>assistant\n")
+
+
+def common_prefix_length(a, b):
+    n = min(len(a), len(b))
+    for i in range(n):
+        if a[i] != b[i]:
+            return i
+    return n
+
+
+class MockLMStudioServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address=("127.0.0.1", 0),
+        prompt_tps=0.0,
+        gen_tps=0.0,
+        latency=0.0,
+        reply_tokens=48,
+        reply_text=None,
+        seed=0,
+        error_rate=0.0,
+        error_status=503,
+        parallel=1,
+        prefix_cache=True
+    ):
+        super().__init__(address, MockHandler)
+        self.prompt_tps = prompt_tps      # 0 = instant prompt processing
+        self.gen_tps = gen_tps            # 0 = instant generation
+        self.latency = latency            # fixed per-request overhead (seconds)
+        self.reply_tokens = reply_tokens
+        self.reply_text = reply_text      # fixed reply instead of seeded words
+        self.seed = seed
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.prefix_cache = prefix_cache
+
+        self._error_rng = random.Random(seed)
+        self._forced_errors = []
+        self._slots = threading.Semaphore(parallel)  # LM Studio decodes one request at a time by default
+        self._lock = threading.Lock()
+        self.cached_tokens = []
+        self.prefix_stats = []
+        self.requests = 0
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/v1/chat/completions"
+
+    def fail_next(self, count=1, status=None):
+        """Make the next `count` completions fail with `status` (default error_status)."""
+        with self._lock:
+            self._forced_errors.extend([status or self.error_status] * count)
+
+    # ----- Simulation -----
+    def next_error(self):
+        with self._lock:
+            self.requests += 1
+            if self._forced_errors:
+                return self._forced_errors.pop(0)
+            if self.error_rate and self._error_rng.random() < self.error_rate:
+                return self.error_status
+        return None
+
+    def process_prompt(self, messages):
+        """Account the prompt against the prefix cache; returns (prompt_tokens, cached_tokens)."""
+        tokens = prompt_tokens(messages)
+        with self._lock:
+            cached = common_prefix_length(self.cached_tokens, tokens) if self.prefix_cache else 0
+            self.cached_tokens = tokens
+            self.prefix_stats.append({"prompt_tokens": len(tokens), "reused_tokens": cached})
+        if self.prompt_tps:
+            time.sleep((len(tokens) - cached) / self.prompt_tps)
+        return len(tokens), cached
+
+    def reply_for(self, payload):
+        """Deterministic reply tokens for a request (same seed + messages -> same reply)."""
+        limit = payload.get("max_tokens") or self.reply_tokens
+        if self.reply_text is not None:
+            words = self.reply_text.split(" ")
+        else:
+            key = json.dumps([self.seed, payload.get("messages", [])], sort_keys=True).encode("utf-8")
+            rng = random.Random(hashlib.blake2b(key, digest_size=8).digest())
+            words = [rng.choice(VOCABULARY) for _ in range(self.reply_tokens)]
+            words[0] = words[0].capitalize()
+            words[-1] += "."
+        words = words[:limit]
+        # One token per word; the leading space belongs to the token, like BPE vocabularies
+        return [words[0]] + [" " + w for w in words[1:]]
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without this, delayed ACKs add ~40ms per keep-alive call
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/v1/models":
+            return self._send_json(404, {"error": "Not found"})
+        self._send_json(200, {"object": "list", "data": [{"id": MODEL_ID, "object": "model"}]})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            return self._send_json(404, {"error": "Not found"})
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            messages = payload["messages"]
+        except (ValueError, KeyError) as e:
+            return self._send_json(400, {"error": f"Invalid request: {e}"})
+
+        server = self.server
+        status = server.next_error()
+        if status:
+            return self._send_json(status, {"error": "Injected failure"})
+
+        with server._slots:
+            if server.latency:
+                time.sleep(server.latency)
+            n_prompt, n_cached = server.process_prompt(messages)
+            tokens = server.reply_for(payload)
+            usage = {
+                "prompt_tokens": n_prompt,
+                "completion_tokens": len(tokens),
+                "total_tokens": n_prompt + len(tokens),
+                "prompt_tokens_details": {"cached_tokens": n_cached}
+            }
+            model = payload.get("model") or MODEL_ID
+            if payload.get("stream"):
+                self._stream(model, tokens, usage)
+            else:
+                if server.gen_tps:
+                    time.sleep(len(tokens) / server.gen_tps)
+                self._send_json(200, {
+                    "id": f"chatcmpl-mock-{server.requests}",
+                    "object": "chat.completion",
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": usage
+                })
+
+    def _stream(self, model, tokens, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta, finish_reason=None, **extra):
+            chunk = {
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            event({"role": "assistant"})
+            for token in tokens:
+                if self.server.gen_tps:
+                    time.sleep(1 / self.server.gen_tps)
+                event({"content": token})
+            event({}, finish_reason="stop", usage=usage)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client stopped reading mid-stream
+            pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_mock_server(**config):
+    """Serve in a daemon thread on a free port; returns (server, chat-completions URL)."""
+    server = MockLMStudioServer(**config)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    return server, server.url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--prompt-tps", type=float, default=800.0, help="Prompt tokens processed per second (0 = instant)")
+    parser.add_argument("--gen-tps", type=float, default=40.0, help="Reply tokens generated per second (0 = instant)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fixed extra seconds per request")
+    parser.add_argument("--reply-tokens", type=int, default=48)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--parallel", type=int, default=1, help="Requests processed at once")
+    parser.add_argument("--no-prefix-cache", action="store_true")
+    args = parser.parse_args()
+
+    server = MockLMStudioServer(
+        (args.host, args.port),
+        prompt_tps=args.prompt_tps,
+        gen_tps=args.gen_tps,
+        latency=args.latency,
+        reply_tokens=args.reply_tokens,
+        seed=args.seed,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        parallel=args.parallel,
+        prefix_cache=not args.no_prefix_cache
+    )
+    print(f"Mock LM Studio listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
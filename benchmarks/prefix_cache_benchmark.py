@@ -0,0 +1,93 @@
+"""
+Prefix (KV) cache reuse per turn for each prompt layout.
+A scripted conversation runs through ConversationManager against the mock LM Studio server, which keeps the previous
+prompt and counts how many leading tokens the next prompt shares with it: the part a local inference
+server with prefix caching would not have to prefill again.
+
+Run from the repository root:
+    python -m benchmarks.prefix_cache_benchmark --turns 30 --per-turn
+"""
+import argparse
+import tempfile
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.mock_lmstudio import start_mock_server
+from core import api_connector
+from core.conversation_manager import ConversationManager, PROMPT_LAYOUTS
+
+console = Console()
+
+USER_TURNS = [
+    "I love gothic fiction and Edgar Allan Poe.",
+    "I hate noisy parties, they drain me.",
+    "What do you think about dark art and painting?",
+    "My favorite anime has a haunted manor in it.",
+    "Tell me more about heavy metal and the occult.",
+    "Have you read any novels about ghosts lately?",
+]
+
+REPLY = (
+    "Poe's stories feel like candlelight in a cold room. I sketch ravens when I can't sleep, "
+    "and the quiet after midnight is when my best pages happen."
+)
+
+
+def run_layout(layout, turns, context_window):
+    server, url = start_mock_server(reply_text=REPLY)
+    api_connector.API_URL = url
+    chat = ConversationManager(
+        system_prompt="You are Nikki, a shy goth artist who loves anime and gothic fiction.",
+        memory_dir=tempfile.mkdtemp(prefix=f"prefix_{layout}_"),
+        context_window=context_window,
+        prompt_layout=layout
+    )
+    for turn in range(turns):
+        chat.chat(USER_TURNS[turn % len(USER_TURNS)])
+    server.shutdown()
+    return server.prefix_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--context-window", type=int, default=2048)
+    parser.add_argument("--per-turn", action="store_true", help="Also print reuse for every turn")
+    args = parser.parse_args()
+
+    results = {layout: run_layout(layout, args.turns, args.context_window) for layout in PROMPT_LAYOUTS}
+
+    if args.per_turn:
+        table = Table(title="Reused prefix tokens per turn")
+        table.add_column("Turn", justify="right")
+        for layout in PROMPT_LAYOUTS:
+            table.add_column(f"{layout} reused/prompt", justify="right")
+        for turn in range(args.turns):
+            table.add_row(str(turn + 1), *(
+                f"{results[layout][turn]['reused_tokens']}/{results[layout][turn]['prompt_tokens']}"
+                for layout in PROMPT_LAYOUTS
+            ))
+        console.print(table)
+
+    summary = Table(title=f"Prefix cache reuse ({args.turns} turns, {args.context_window}-token window)")
+    summary.add_column("Layout", style="cyan")
+    summary.add_column("Prompt tokens", justify="right")
+    summary.add_column("Reused", justify="right")
+    summary.add_column("Reuse %", justify="right")
+    summary.add_column("Prefill tokens/turn", justify="right")
+    for layout in PROMPT_LAYOUTS:
+        stats = results[layout]
+        prompt = sum(s["prompt_tokens"] for s in stats)
+        reused = sum(s["reused_tokens"] for s in stats)
+        summary.add_row(
+            layout,
+            f"{prompt:,}",
+            f"{reused:,}",
+            f"{100 * reused / prompt:.1f}%",
+            f"{(prompt - reused) / len(stats):.1f}"
+        )
+    console.print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Startup latency: import-to-first-prompt, first-turn model load, and full vs trimmed spaCy load.
+Each measurement runs in a fresh interpreter so module and model caches start cold.
+
+Run from the repository root:
+    python -m benchmarks.startup_benchmark --runs 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Mirrors main.py: import the manager, construct it, then the first user turn pays for the model
+FIRST_PROMPT_SNIPPET = """
+import json, tempfile, time
+start = time.perf_counter()
+from core.conversation_manager import ConversationManager
+imported = time.perf_counter()
+chat = ConversationManager(system_prompt="Benchmark", memory_dir=tempfile.mkdtemp())
+ready = time.perf_counter()
+chat._analyze_turn("Hello Nikki, I love gothic fiction and Edgar Allan Poe.")
+first_turn = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "first_prompt_s": ready - start,
+    "first_turn_nlp_s": first_turn - ready,
+}))
+"""
+
+MODEL_LOAD_SNIPPET = """
+import json, time
+import spacy
+from core.nlp_model import MODEL_NAME, EXCLUDED_COMPONENTS
+start = time.perf_counter()
+nlp = spacy.load(MODEL_NAME, exclude={exclude})
+print(json.dumps({{"load_s": time.perf_counter() - start, "pipes": nlp.pipe_names}}))
+"""
+
+
+def run_snippet(code):
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def median_of(runs, key):
+    return statistics.median(run[key] for run in runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    args = parser.parse_args()
+
+    first_prompt = [run_snippet(FIRST_PROMPT_SNIPPET) for _ in range(args.runs)]
+    full = [run_snippet(MODEL_LOAD_SNIPPET.format(exclude="[]")) for _ in range(args.runs)]
+    trimmed = [run_snippet(MODEL_LOAD_SNIPPET.format(exclude="EXCLUDED_COMPONENTS")) for _ in range(args.runs)]
+
+    results = {
+        "import_s": median_of(first_prompt, "import_s"),
+        "first_prompt_s": median_of(first_prompt, "first_prompt_s"),
+        "first_turn_nlp_s": median_of(first_prompt, "first_turn_nlp_s"),
+        "full_model_load_s": median_of(full, "load_s"),
+        "trimmed_model_load_s": median_of(trimmed, "load_s"),
+        "trimmed_pipes": trimmed[0]["pipes"],
+    }
+
+    if args.json:
+        print(json.dumps(results))
+        return
+
+    table = Table(title=f"Startup latency (median of {args.runs} cold runs)")
+    table.add_column("Stage", style="cyan")
+    table.add_column("Seconds", justify="right")
+    table.add_row("import core.conversation_manager", f"{results['import_s']:.3f}")
+    table.add_row("import-to-first-prompt", f"{results['first_prompt_s']:.3f}")
+    table.add_row("first turn (lazy model load + parse)", f"{results['first_turn_nlp_s']:.3f}")
+    table.add_row("spacy.load full pipeline", f"{results['full_model_load_s']:.3f}")
+    table.add_row("spacy.load trimmed pipeline", f"{results['trimmed_model_load_s']:.3f}")
+    console.print(table)
+    console.print(f"[dim]Trimmed pipeline components: {', '.join(results['trimmed_pipes'])}[/dim]")
+
+
+if __name__ == "__main__":
+    main()
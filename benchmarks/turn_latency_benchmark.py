@@ -0,0 +1,311 @@
+"""
+End-to-end turn latency per ConversationManager.chat stage, with the LLM stubbed out.
+
+For each store size a synthetic memory store (memory.json + persisted entity vectors built from
+the model's word vectors) and a seeded conversation script are generated, then every stage of each
+turn is timed: spaCy parse, sentiment, entity extraction, memory write, recall, context build,
+theme tracking, pruning and persistence. The first turn (which fills the recall index) is reported
+separately. Results are written as JSON so runs from different commits can be diffed.
+
+Run from the repository root:
+    python -m benchmarks.turn_latency_benchmark --sizes 1000 10000 100000 --output bench.json
+    python -m benchmarks.turn_latency_benchmark --sizes 1000000 --backend wal
+    python -m benchmarks.turn_latency_benchmark --compare bench.json     # diff against a saved run
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from core.conversation_manager import ConversationManager
+from core.memory_manager import MemoryManager
+from core.nlp_model import get_nlp
+from core.sqlite_memory_manager import SQLiteMemoryManager
+
+console = Console()
+
+STAGES = [
+    "parse", "sentiment", "entities", "memory_write", "recall",
+    "context_build", "llm", "themes", "prune", "persistence", "total"
+]
+
+# Instance methods wrapped with timers, mapped to the stage they are charged to
+TIMED_METHODS = {
+    "_analyze_turn": "analysis",
+    "_get_sentiment": "sentiment",
+    "_extract_entities": "entities",
+    "_extract_nouns": "entities",
+    "_process_memory_entry": "memory_write",
+    "_recall_relevant_memory": "recall",
+    "_build_context_with_memory": "context_build",
+    "_extract_themes": "themes",
+    "_prune_context": "prune",
+    "_save_context": "persistence",
+}
+
+TURN_TEMPLATES = [
+    "I love {a} and {b}.",
+    "I really hate {a}, it ruins {b} for me.",
+    "What do you think about {a}?",
+    "Tell me more about {a} and the {b}.",
+    "My favorite thing lately is {a}.",
+    "I can't stand {a} but {b} is fine.",
+]
+
+STUB_REPLY = "The moon over the old manor reminds me of a gothic novel I keep sketching."
+
+
+# ----- Synthetic data -----
+def vocabulary(nlp, limit=5000):
+    """Lowercase alphabetic words that have vectors, with their vector rows."""
+    vectors = nlp.vocab.vectors
+    words, rows = [], []
+    for key, row in vectors.key2row.items():
+        try:
+            word = nlp.vocab.strings[key]
+        except KeyError:
+            continue
+        if word.isalpha() and word.islower() and len(word) > 2:
+            words.append(word)
+            rows.append(row)
+            if len(words) >= limit:
+                break
+    return words, np.asarray(vectors.data)[rows].astype(np.float32)
+
+
+def build_synthetic_store(memory_dir, size, words, word_vectors, seed=0):
+    """
+    Write memory.json and the entity vector store for `size` two-word entities
+    (vector = mean of the two word vectors), in the on-disk format MemoryManager reads.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(words)
+    pairs = n * n
+    # Distinct (first, second) word pairs without materializing all n*n of them;
+    # a small vocabulary repeats pairs with a numeric suffix on the key
+    if pairs >= size:
+        pair_ids = rng.choice(pairs, size=size, replace=False)
+    else:
+        pair_ids = rng.permutation(np.arange(size) % pairs)
+    first, second = pair_ids // n, pair_ids % n
+
+    os.makedirs(memory_dir, exist_ok=True)
+    start = datetime(2024, 1, 1)
+    scores = rng.uniform(-1, 1, size)
+    keywords = rng.choice(["like", "dislike", ""], size=size)
+    memory = {}
+    for i in range(size):
+        key = f"{words[first[i]]} {words[second[i]]}"
+        if key in memory:
+            key = f"{key} {i}"
+        memory[key] = {
+            "type": "preference" if keywords[i] else "sentiment",
+            "text": f"Something about {key}.",
+            "score": float(round(scores[i], 3)),
+            "timestamp": (start + timedelta(minutes=i)).isoformat(),
+            "keywords": keywords[i] or None
+        }
+    memory["_last_updated"] = datetime.now().isoformat()
+    with open(os.path.join(memory_dir, "memory.json"), "w", encoding="utf-8") as f:
+        json.dump(memory, f)
+
+    vectors = (word_vectors[first] + word_vectors[second]) / 2
+    vectors.astype(np.float32).tofile(os.path.join(memory_dir, "entity_vectors.f32"))
+    with open(os.path.join(memory_dir, "entity_vectors.jsonl"), "w", encoding="utf-8") as f:
+        f.write(json.dumps({"dim": int(vectors.shape[1])}) + "\n")
+        for row, key in enumerate(k for k in memory if not k.startswith("_")):
+            f.write(json.dumps({"key": key, "row": row}) + "\n")
+
+
+def conversation_script(words, turns, seed=0):
+    rng = random.Random(seed)
+    return [
+        rng.choice(TURN_TEMPLATES).format(a=rng.choice(words), b=rng.choice(words))
+        for _ in range(turns)
+    ]
+
+
+# ----- Timing -----
+class StageTimer:
+    """Wraps a manager's stage methods and accumulates their wall time for the current turn."""
+
+    def __init__(self, chat):
+        self.current = {}
+        for name, stage in TIMED_METHODS.items():
+            setattr(chat, name, self.wrap(getattr(chat, name), stage))
+
+    def wrap(self, method, stage):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.current[stage] = self.current.get(stage, 0.0) + time.perf_counter() - start
+        return timed
+
+    def start_turn(self):
+        self.current = {}
+
+    def finish_turn(self, total):
+        t = self.current
+        # The parse is what _analyze_turn spends outside sentiment and entity extraction
+        parse = t.pop("analysis", 0.0) - t.get("sentiment", 0.0) - t.get("entities", 0.0)
+        return {**t, "parse": max(parse, 0.0), "total": total}
+
+
+def open_memory(memory_dir, backend):
+    if backend == "sqlite":
+        return SQLiteMemoryManager(memory_dir=memory_dir)
+    return MemoryManager(memory_dir=memory_dir, write_ahead_log=(backend == "wal"))
+
+
+def run_size(size, args, words, word_vectors):
+    root = tempfile.mkdtemp(prefix=f"turn_bench_{size}_")
+    memory_dir = os.path.join(root, "memory")
+    try:
+        start = time.perf_counter()
+        build_synthetic_store(memory_dir, size, words, word_vectors, seed=args.seed)
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        chat = ConversationManager(
+            system_prompt="You are Nikki, a shy goth artist.",
+            memory_dir=memory_dir,
+            memory_manager=open_memory(memory_dir, args.backend),
+            use_ann_index=args.ann
+        )
+        load_s = time.perf_counter() - start
+        timer = StageTimer(chat)
+
+        stub_llm = timer.wrap(lambda messages: STUB_REPLY, "llm")
+
+        turns = []
+        first_turn_s = None
+        with patch("core.conversation_manager.send_message", side_effect=stub_llm):
+            for i, text in enumerate(conversation_script(words, args.turns + 1, seed=args.seed)):
+                timer.start_turn()
+                start = time.perf_counter()
+                chat.chat(text)
+                total = time.perf_counter() - start
+                if i == 0:
+                    # Fills the recall index from the store; reported on its own
+                    first_turn_s = total
+                    continue
+                turns.append(timer.finish_turn(total))
+
+        return {
+            "size": size,
+            "store_build_s": build_s,
+            "store_load_s": load_s,
+            "first_turn_s": first_turn_s,
+            "stages": summarize(turns)
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def summarize(turns):
+    stages = {}
+    for stage in STAGES:
+        samples = sorted(turn.get(stage, 0.0) * 1000 for turn in turns)
+        stages[stage] = {
+            "mean_ms": statistics.mean(samples),
+            "p50_ms": statistics.median(samples),
+            "p95_ms": samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+            "max_ms": samples[-1],
+        }
+    return stages
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ----- Reporting -----
+def print_results(report, baseline=None):
+    base = {r["size"]: r for r in baseline["results"]} if baseline else {}
+    for result in report["results"]:
+        size = result["size"]
+        table = Table(title=(
+            f"{size:,} entities — load {result['store_load_s']:.2f}s, "
+            f"first turn {result['first_turn_s'] * 1000:.1f} ms"
+        ))
+        table.add_column("Stage", style="cyan")
+        table.add_column("mean ms", justify="right")
+        table.add_column("p50 ms", justify="right")
+        table.add_column("p95 ms", justify="right")
+        if size in base:
+            table.add_column(f"vs {baseline['meta'].get('commit') or 'baseline'}", justify="right")
+        for stage in STAGES:
+            stats = result["stages"][stage]
+            row = [stage, f"{stats['mean_ms']:.3f}", f"{stats['p50_ms']:.3f}", f"{stats['p95_ms']:.3f}"]
+            if size in base:
+                before = base[size]["stages"][stage]["p50_ms"]
+                row.append(f"{stats['p50_ms'] / before:.2f}x" if before else "-")
+            table.add_row(*row)
+        console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--turns", type=int, default=30, help="Timed turns per size (after the warm-up turn)")
+    parser.add_argument("--backend", choices=["json", "wal", "sqlite"], default="json")
+    parser.add_argument("--ann", action="store_true", help="Use the IVF index for recall")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run to compare p50s against")
+    args = parser.parse_args()
+
+    nlp = get_nlp()
+    words, word_vectors = vocabulary(nlp)
+    console.print(f"[dim]{len(words)} vocabulary words, {word_vectors.shape[1]}-dim vectors[/dim]")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "ann": args.ann,
+            "turns": args.turns,
+            "seed": args.seed,
+            "dim": int(word_vectors.shape[1]),
+        },
+        "results": []
+    }
+    for size in args.sizes:
+        console.print(f"[cyan]Running {size:,} entities...[/cyan]")
+        report["results"].append(run_size(size, args, words, word_vectors))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(report, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        console.print(f"[green]Results written to {args.output}[/green]")
+
+
+if __name__ == "__main__":
+    main()
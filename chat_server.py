@@ -0,0 +1,162 @@
+"""
+Local multi-session chat service.
+
+Each session id gets its own ConversationManager and memory directory under --root.
+All sessions share one loaded spaCy model. Idle sessions are evicted to disk, and
+--max-concurrent caps how many turns run at once.
+
+    python chat_server.py --port 8765
+
+    POST   /sessions/<id>/chat   {"message": "..."}  -> {"reply": "...", "latency": {...}}
+    DELETE /sessions/<id>                            -> evict the session to disk
+    GET    /health                                   -> pool statistics
+    GET    /stats                                    -> per-stage turn timings (count, p50/p95/p99, max)
+"""
+import argparse
+import json
+import logging
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from core.nlp_model import get_nlp
+from core.metrics import metrics
+from core.session_pool import SessionPool
+
+SESSION_PATH = re.compile(r"^/sessions/([^/]+)(/chat)?/?$")
+
+DEFAULT_SYSTEM_PROMPT = (
+    "You are Nikki, a lonely, shy, timid goth girl with a deep love for art, "
+    "Japanese anime, and gothic fiction. You isolate yourself due to social "
+    "anxiety and low self-esteem, but express emotions through art and online communities. "
+    "You enjoy creating manga, novels, paintings, and have a keen interest in the occult, "
+    "gothic novels, and heavy metal. You dislike noisy parties and major music genres. "
+    "In conversations, you often reference anime, manga, video games, and gothic fiction, "
+    "striving to sound sophisticated and cool."
+)
+
+
+class ChatRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    @property
+    def pool(self):
+        return self.server.pool
+
+    def do_POST(self):
+        match = SESSION_PATH.match(self.path)
+        if not match or not match.group(2):
+            return self._send(404, {"error": "Not found"})
+
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            message = body["message"]
+            if not isinstance(message, str) or not message.strip():
+                raise ValueError("message must be a non-empty string")
+        except (ValueError, KeyError, TypeError) as e:
+            return self._send(400, {"error": f"Invalid request body: {e}"})
+
+        start = time.perf_counter()
+        try:
+            reply = self.pool.chat(match.group(1), message.strip())
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        except TimeoutError as e:
+            return self._send(503, {"error": str(e)}, headers={"Retry-After": "1"})
+        except Exception as e:
+            logging.error(f"Turn failed for session '{match.group(1)}': {e}")
+            return self._send(500, {"error": "Turn failed"})
+
+        self._send(200, {
+            "reply": reply,
+            "latency": {"turn_s": time.perf_counter() - start}
+        })
+
+    def do_DELETE(self):
+        match = SESSION_PATH.match(self.path)
+        if not match or match.group(2):
+            return self._send(404, {"error": "Not found"})
+        self._send(200, {"evicted": self.pool.evict(match.group(1))})
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        if path == "/health":
+            return self._send(200, {"active_sessions": len(self.pool), **self.pool.stats})
+        if path == "/stats":
+            return self._send(200, {"enabled": metrics.enabled, "stages": metrics.summary()})
+        self._send(404, {"error": "Not found"})
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+
+class ChatServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pool, evict_interval=30.0):
+        super().__init__(address, ChatRequestHandler)
+        self.pool = pool
+        self.evict_interval = evict_interval
+        self._stop = threading.Event()
+        self._janitor = threading.Thread(target=self._evict_idle_sessions, daemon=True)
+        self._janitor.start()
+
+    def _evict_idle_sessions(self):
+        while not self._stop.wait(self.evict_interval):
+            evicted = self.pool.evict_idle()
+            if evicted:
+                logging.info(f"Evicted {evicted} idle session(s)")
+
+    def server_close(self):
+        self._stop.set()
+        super().server_close()
+        self.pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--root", default="data/sessions", help="Directory holding one memory dir per session")
+    parser.add_argument("--max-concurrent", type=int, default=4, help="Turns processed at once")
+    parser.add_argument("--queue-timeout", type=float, default=30.0, help="Seconds a turn waits for a slot before 503")
+    parser.add_argument("--idle-timeout", type=float, default=600.0, help="Evict sessions idle this long (seconds)")
+    parser.add_argument("--max-sessions", type=int, default=256, help="Live sessions kept in RAM")
+    parser.add_argument("--pipelined", action="store_true", help="Overlap memory writes with the LLM call")
+    args = parser.parse_args()
+
+    # Load the shared model once up front instead of on the first request
+    get_nlp()
+
+    pool = SessionPool(
+        system_prompt=DEFAULT_SYSTEM_PROMPT,
+        root_dir=args.root,
+        max_concurrent_turns=args.max_concurrent,
+        queue_timeout=args.queue_timeout,
+        idle_timeout=args.idle_timeout,
+        max_sessions=args.max_sessions,
+        pipelined=args.pipelined
+    )
+    server = ChatServer((args.host, args.port), pool, evict_interval=min(30.0, args.idle_timeout))
+    logging.info(f"Chat server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
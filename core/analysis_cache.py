@@ -0,0 +1,119 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import unicodedata
+import numpy as np
+from core.cache_utils import LRUCache, call_at_exit
+
+
+class TurnAnalysis:
+    """
+    Everything derived from a single spaCy parse of one user turn.
+    Holds the document vector rather than the Doc, so analyses can be cached and persisted.
+    """
+
+    def __init__(self, text, entities, nouns, sentiment, vector, has_vector):
+        self.text = text
+        self.entities = entities
+        self.nouns = nouns
+        self.sentiment = sentiment
+        self.vector = vector
+        self.has_vector = has_vector
+
+    @classmethod
+    def from_doc(cls, text, doc, entities, nouns, sentiment):
+        vector = np.array(doc.vector, dtype=np.float32)
+        vector.flags.writeable = False
+        return cls(text, entities, nouns, sentiment, vector, bool(doc.has_vector and doc.vector_norm != 0))
+
+    def to_dict(self):
+        return {
+            "entities": self.entities,
+            "nouns": self.nouns,
+            "sentiment": self.sentiment,
+            "vector": base64.b64encode(self.vector.tobytes()).decode("ascii"),
+            "has_vector": self.has_vector,
+        }
+
+    @classmethod
+    def from_dict(cls, text, data):
+        vector = np.frombuffer(base64.b64decode(data["vector"]), dtype=np.float32)
+        return cls(text, data["entities"], data["nouns"], data["sentiment"], vector, data["has_vector"])
+
+
+class AnalysisCache(LRUCache):
+    """
+    LRU of TurnAnalysis results keyed by a hash of the normalized text (NFC, collapsed
+    whitespace; case is kept because NER depends on it). With a `path`, entries are loaded
+    at startup and written back by save() (also at exit) as JSON lines under a header whose
+    `namespace` (model + settings) must match, so a model change never serves stale results.
+    """
+
+    def __init__(self, max_entries=2048, path=None, namespace=""):
+        super().__init__(max_entries)
+        self.path = path
+        self.namespace = namespace
+        self._dirty = False
+        if path:
+            self._load()
+            call_at_exit(self, "save")
+
+    @staticmethod
+    def normalize(text):
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @classmethod
+    def key(cls, text):
+        return hashlib.blake2b(cls.normalize(text).encode("utf-8"), digest_size=16).hexdigest()
+
+    def __contains__(self, text):
+        return self.key(text) in self._entries
+
+    def get(self, text):
+        """The cached analysis for `text` (refreshing its recency), or None."""
+        return self._lookup(self.key(text))
+
+    def put(self, text, analysis):
+        self._store(self.key(text), analysis)
+        self._dirty = True
+
+    def discard(self, text):
+        super().discard(self.key(text))
+        self._dirty = True
+
+    def clear(self):
+        super().clear()
+        self._dirty = True
+
+    # ----- Persistence -----
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("namespace") != self.namespace:
+                    logging.info(f"Analysis cache '{self.path}' is for another model/config, starting empty")
+                    return
+                for line in f:
+                    record = json.loads(line)
+                    self._store(record["key"], TurnAnalysis.from_dict(None, record))
+        except (ValueError, KeyError, OSError) as e:
+            logging.warning(f"Could not load analysis cache '{self.path}': {e}")
+        # Loading is not a cache event
+        self.evictions = 0
+
+    def save(self):
+        """Write entries (least recently used first) if anything changed since the last save."""
+        if not self.path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"namespace": self.namespace}) + "\n")
+            for key, analysis in self._entries.items():
+                f.write(json.dumps({"key": key, **analysis.to_dict()}) + "\n")
+        os.replace(tmp_path, self.path)
+        self._dirty = False
@@ -0,0 +1,229 @@
+import json
+import math
+import os
+import logging
+import numpy as np
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) approximate nearest-neighbour index over an EntityVectorIndex.
+    Entity vectors are bucketed by spherical k-means; a query only scores the rows in
+    the `nprobe` buckets whose centroids are closest to it. NumPy + stdlib only.
+    """
+
+    def __init__(
+        self,
+        index_dir=None,
+        nlist=None,
+        nprobe=16,
+        min_train_size=2048,
+        retrain_growth=4.0,
+        kmeans_iters=10,
+        save_interval=256,
+        seed=0,
+        load=True
+    ):
+        self.index_dir = index_dir
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        self.kmeans_iters = kmeans_iters
+        self.save_interval = save_interval
+        self.seed = seed
+
+        self.centroids = None
+        self.lists = []
+        self.assignments = {}
+        self.trained_size = 0
+        self._unsaved_changes = 0
+
+        if index_dir:
+            self.centroids_file = os.path.join(index_dir, "ivf_centroids.npy")
+            self.lists_file = os.path.join(index_dir, "ivf_lists.json")
+            if load:
+                self.load()
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def needs_training(self, entity_index):
+        """Train once the store is large enough, and retrain after it has grown substantially."""
+        size = len(entity_index)
+        if not self.is_trained:
+            return size >= self.min_train_size
+        if self.centroids.shape[1] != entity_index.dim:
+            return True
+        return size >= self.trained_size * self.retrain_growth
+
+    def untrained_copy(self):
+        """A fresh index with the same settings and directory (nothing loaded), e.g. to train in the background."""
+        return IVFIndex(
+            index_dir=self.index_dir,
+            nlist=self.nlist,
+            nprobe=self.nprobe,
+            min_train_size=self.min_train_size,
+            retrain_growth=self.retrain_growth,
+            kmeans_iters=self.kmeans_iters,
+            save_interval=self.save_interval,
+            seed=self.seed,
+            load=False
+        )
+
+    # ----- Training -----
+    def train(self, entity_index):
+        """Cluster the valid rows of `entity_index`, assign every key to a bucket and save."""
+        valid_rows = np.flatnonzero(entity_index.valid)
+        self.train_vectors([entity_index.keys[row] for row in valid_rows], entity_index.vectors[valid_rows])
+        self.save()
+
+    def train_vectors(self, keys, vectors):
+        """
+        Cluster normalized `vectors` (one row per key) and assign every key to a bucket.
+        Works on its own arrays, so it can run off-thread on a snapshot of the entity index.
+        The result is left unsaved; call save() (or flush()) to persist it.
+        """
+        size = len(keys)
+        if not size:
+            return
+
+        nlist = self.nlist or max(1, int(math.sqrt(size)))
+        nlist = min(nlist, size)
+        rng = np.random.default_rng(self.seed)
+
+        # k-means on a sample is enough to place the centroids
+        sample_size = min(size, nlist * 64)
+        sample = vectors[rng.choice(size, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.kmeans_iters):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        self.centroids = centroids
+        self.lists = [set() for _ in range(nlist)]
+        self.assignments = {}
+
+        # Assign in chunks so the (rows x nlist) score matrix stays small
+        chunk = 8192
+        for start in range(0, size, chunk):
+            labels = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+            for key, label in zip(keys[start:start + chunk], labels):
+                self.assignments[key] = int(label)
+                self.lists[label].add(key)
+
+        self.trained_size = size
+        self._unsaved_changes += 1
+        logging.debug(f"IVF index trained: {size} vectors in {nlist} lists")
+
+    # ----- Updates -----
+    def add(self, key, vector):
+        """Incrementally place a (normalized) vector in its nearest bucket."""
+        if not self.is_trained:
+            return
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        if vector.shape[0] != self.centroids.shape[1] or not np.any(vector):
+            self.remove(key)
+            return
+
+        label = int(np.argmax(self.centroids @ vector))
+        previous = self.assignments.get(key)
+        if previous == label:
+            return
+        if previous is not None:
+            self.lists[previous].discard(key)
+        self.assignments[key] = label
+        self.lists[label].add(key)
+        self._mark_changed()
+
+    def remove(self, key):
+        label = self.assignments.pop(key, None)
+        if label is not None:
+            self.lists[label].discard(key)
+            self._mark_changed()
+
+    def clear(self):
+        self.centroids = None
+        self.lists = []
+        self.assignments = {}
+        self.trained_size = 0
+        self._unsaved_changes = 0
+        if self.index_dir:
+            for path in (self.centroids_file, self.lists_file):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    # ----- Queries -----
+    def candidate_rows(self, query_vector, entity_index, nprobe=None):
+        """Row ids in `entity_index` for every key in the buckets closest to the query."""
+        if not self.is_trained:
+            return np.arange(len(entity_index))
+
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+        nprobe = min(nprobe or self.nprobe, len(self.lists))
+        centroid_scores = self.centroids @ query
+        if nprobe < len(self.lists):
+            probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        else:
+            probe = range(len(self.lists))
+
+        rows = entity_index.rows
+        # Keys persisted from an older session may no longer be in the store
+        return np.fromiter(
+            (rows[key] for label in probe for key in self.lists[label] if key in rows),
+            dtype=np.intp
+        )
+
+    # ----- Persistence -----
+    def save(self):
+        if not self.index_dir or not self.is_trained:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        np.save(self.centroids_file, self.centroids)
+        with open(self.lists_file, "w", encoding="utf-8") as f:
+            json.dump({
+                "trained_size": self.trained_size,
+                "assignments": self.assignments
+            }, f, ensure_ascii=False)
+        self._unsaved_changes = 0
+
+    def flush(self):
+        """Save if anything changed since the last save."""
+        if self._unsaved_changes:
+            self.save()
+
+    def load(self):
+        if not (os.path.exists(self.centroids_file) and os.path.exists(self.lists_file)):
+            return
+        try:
+            centroids = np.load(self.centroids_file)
+            with open(self.lists_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (ValueError, IOError, OSError) as e:
+            logging.warning(f"Ignoring unreadable IVF index in {self.index_dir}: {e}")
+            return
+
+        self.centroids = centroids.astype(np.float32)
+        self.lists = [set() for _ in range(len(centroids))]
+        self.assignments = {}
+        for key, label in state.get("assignments", {}).items():
+            if 0 <= label < len(self.lists):
+                self.assignments[key] = label
+                self.lists[label].add(key)
+        self.trained_size = state.get("trained_size", len(self.assignments))
+
+    def _mark_changed(self):
+        self._unsaved_changes += 1
+        if self._unsaved_changes >= self.save_interval:
+            self.save()
@@ -1,6 +1,10 @@
 import os
+import json
+import contextvars
+import httpx
 import requests
 from dotenv import load_dotenv
+from core.http_client import post_json, apost_json, get_async_client
 
 load_dotenv(dotenv_path="./data/config.env")
 
@@ -8,26 +12,125 @@ API_URL = os.getenv("API_URL")
 MODEL = os.getenv("MODEL")
 TEMPERATURE = float(os.getenv("TEMPERATURE", 0.7))
 MAX_TOKENS = int(os.getenv("MAX_TOKENS", 512))
+# Model context length (prompt + reply), used to budget the prompt
+CONTEXT_WINDOW = int(os.getenv("CONTEXT_WINDOW", 4096))
 
+# Returned by _parse_sse_line for the end-of-stream marker
+_DONE = object()
 
-def send_message(messages):
-    """Send chat messages to LM Studio and return assistant's reply."""
+# `usage` block of the latest completion in this thread / asyncio task (None if the server sent none)
+_last_usage = contextvars.ContextVar("last_usage", default=None)
+
+
+def last_usage():
+    """Token usage reported for the most recent call made from the current thread or task."""
+    return _last_usage.get()
+
+
+def reset_usage():
+    _last_usage.set(None)
+
+
+def _payload(messages, stream=False):
     payload = {
         "model": MODEL,
         "messages": messages,
         "temperature": TEMPERATURE,
         "max_tokens": MAX_TOKENS
     }
+    if stream:
+        payload["stream"] = True
+        # Ask for the usage block on the final chunk (OpenAI-compatible servers that don't know it ignore it)
+        payload["stream_options"] = {"include_usage": True}
+    return payload
 
+
+def _parse_sse_line(line):
+    """Content fragment from one SSE line, _DONE at the end marker, else None. Records any usage block."""
+    # SSE frames look like "data: {...}"; blank lines and comments separate them
+    if not line or not line.startswith("data:"):
+        return None
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return _DONE
+    try:
+        chunk = json.loads(data)
+        if chunk.get("usage"):
+            _last_usage.set(chunk["usage"])
+        return chunk["choices"][0].get("delta", {}).get("content")
+    except (ValueError, KeyError, IndexError, AttributeError):
+        return None
+
+
+def _reply_content(data):
+    """Reply text from a chat completion body; records its usage block."""
+    if isinstance(data, dict):
+        _last_usage.set(data.get("usage"))
+    if "choices" in data and len(data["choices"]) > 0:
+        return data["choices"][0]["message"]["content"].strip()
+    return "[Error] No valid response from model."
+
+
+def send_message(messages):
+    """Send chat messages to LM Studio and return assistant's reply."""
+    reset_usage()
     try:
-        response = requests.post(API_URL, json=payload)
+        response = post_json(API_URL, _payload(messages))
         response.raise_for_status()
-        data = response.json()
+        return _reply_content(response.json())
+
+    except requests.exceptions.RequestException as e:
+        return f"[Connection Error] {e}"
 
-        if "choices" in data and len(data["choices"]) > 0:
-            return data["choices"][0]["message"]["content"].strip()
-        else:
-            return "[Error] No valid response from model."
+
+def stream_message(messages):
+    """
+    Stream the assistant's reply from LM Studio as it is generated.
+    Yields content fragments parsed from the server-sent events (`stream: true`).
+    """
+    reset_usage()
+    try:
+        with post_json(API_URL, _payload(messages, stream=True), stream=True) as response:
+            response.raise_for_status()
+            # requests assumes ISO-8859-1 for text/event-stream without a charset; SSE is always UTF-8
+            response.encoding = "utf-8"
+            for line in response.iter_lines(decode_unicode=True):
+                delta = _parse_sse_line(line)
+                if delta is _DONE:
+                    break
+                if delta:
+                    yield delta
 
     except requests.exceptions.RequestException as e:
+        yield f"[Connection Error] {e}"
+
+
+async def asend_message(messages, client=None):
+    """Async send_message(): awaits the reply without blocking the event loop."""
+    reset_usage()
+    try:
+        response = await apost_json(API_URL, _payload(messages), client=client)
+        response.raise_for_status()
+        return _reply_content(response.json())
+
+    # A non-JSON body raises ValueError, which requests' RequestException covers on the sync path
+    except (httpx.HTTPError, ValueError) as e:
         return f"[Connection Error] {e}"
+
+
+async def astream_message(messages, client=None):
+    """Async stream_message(): yields content fragments as they arrive."""
+    client = client or get_async_client()
+    reset_usage()
+    try:
+        async with client.stream("POST", API_URL, json=_payload(messages, stream=True)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                delta = _parse_sse_line(line)
+                if delta is _DONE:
+                    break
+                if delta:
+                    yield delta
+
+    except httpx.HTTPError as e:
+        yield f"[Connection Error] {e}"
@@ -0,0 +1,69 @@
+import atexit
+import weakref
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Bounded key -> value LRU (an OrderedDict, least recently used first) with hit, miss and
+    eviction counters. Subclasses add the typed get/put on top of _lookup/_store.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _lookup(self, key):
+        """The cached value (refreshing its recency), or None on a miss."""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _store(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _call_if_alive(obj_ref, method_name):
+    obj = obj_ref()
+    if obj is not None:
+        getattr(obj, method_name)()
+
+
+def call_at_exit(obj, method_name):
+    """Call `obj.<method_name>()` at interpreter exit; `obj` is held weakly, so it can still be collected."""
+    atexit.register(_call_if_alive, weakref.ref(obj), method_name)
@@ -1,26 +1,55 @@
 from rich.table import Table
 from core.memory_manager import MemoryManager
-from core.api_connector import send_message 
+from core.api_connector import send_message, stream_message, asend_message, last_usage, MODEL, MAX_TOKENS, CONTEXT_WINDOW
+from core.vector_index import EntityVectorIndex
+from core.entity_vector_cache import EntityVectorCache
+from core.ann_index import IVFIndex
+from core.nlp_model import get_nlp, MODEL_NAME
+from core.analysis_cache import AnalysisCache, TurnAnalysis
+from core.vector_table import VectorTable
+from core.token_counter import TokenCounter
+from core.keyword_matcher import KeywordMatcher
+from core.metrics import metrics
+from core.llm_telemetry import LLMCallLog, call_record
 from datetime import datetime
-import spacy
 from textblob import TextBlob
+from textblob.en import sentiment as pattern_sentiment
+import asyncio
+import contextvars
 import logging
-import warnings
-import math
+import os
+import time
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import numpy as np
+
+# Version of the per-text analysis (entities, nouns, sentiment, vector) stored in the analysis cache.
+# Bump it whenever _extract_entities, _extract_nouns, _get_sentiment or the spaCy pipeline
+# (core.nlp_model) change, so persisted analysis_cache.jsonl entries from older code are dropped
+ANALYSIS_VERSION = 1
+
+# Prompt layouts: "system" rewrites the system prompt with the memory block every turn;
+# "prefix_cache" keeps system prompt + history byte-stable and puts the block in the final user message
+PROMPT_LAYOUTS = ("system", "prefix_cache")
+
+# Default lexicons for theme tracking and preference detection (label -> terms)
+GOTHIC_THEMES = {
+    theme: [theme] for theme in [
+        "darkness", "shadow", "light", "death", "spirit", "ghost",
+        "memory", "sorrow", "loneliness", "beauty", "art", "creation",
+        "haunting", "whisper", "silence", "ink", "tears", "wind",
+        "night", "moon", "blood", "soul", "dream", "fear"
+    ]
+}
+PREFERENCE_KEYWORDS = {
+    "like": ["like", "love", "enjoy", "favorite", "interested in", "keen on", "fond of", "admire", "adore", "prefer"],
+    "dislike": ["dislike", "hate", "not a fan", "avoid", "detest", "can't stand", "loathe"],
+}
 
 # Configure logging for better error visibility
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
-# Initialize Spacy globally
-try:
-    nlp = spacy.load("en_core_web_md")
-except OSError:
-    print("Downloading en_core_web_md model. This may take a moment.")
-    import spacy.cli
-    spacy.cli.download("en_core_web_md")
-    nlp = spacy.load("en_core_web_md")
-
 
 class ConversationManager:
     """Manages conversation flow and coordinates memory/context interaction with enhanced tracking."""
@@ -32,9 +61,27 @@ class ConversationManager:
         entity_noun_limit=5, 
         similarity_threshold=0.6, 
         memory_recall_limit=5,
-        max_context_messages=20
+        max_context_messages=None,
+        use_ann_index=False,
+        ann_nprobe=16,
+        vector_table_dir=None,
+        memory_manager=None,
+        pipelined=False,
+        context_window=None,
+        reply_tokens=None,
+        memory_token_share=0.25,
+        token_counter=None,
+        prompt_layout="system",
+        log_llm_calls=True,
+        profiler=None,
+        entity_cache_size=4096,
+        analysis_cache_size=2048,
+        persist_analysis_cache=False,
+        theme_lexicon=None,
+        preference_lexicon=None
     ):
-        self.memory = MemoryManager(memory_dir)
+        # A preconfigured MemoryManager (e.g. write_ahead_log=True) can be passed in
+        self.memory = memory_manager or MemoryManager(memory_dir)
         self.system_prompt_base = system_prompt or "You are a helpful AI companion."
         self.messages = [
             {"role": "system", "content": self.system_prompt_base}
@@ -46,9 +93,45 @@ class ConversationManager:
         self.memory_recall_limit = memory_recall_limit
         self.max_context_messages = max_context_messages
         self.neutral_threshold = 0.1 
+        # One compiled word-boundary pass each for reply themes and like/dislike cues
+        self._theme_matcher = KeywordMatcher(theme_lexicon or GOTHIC_THEMES)
+        self._preference_matcher = KeywordMatcher(preference_lexicon or PREFERENCE_KEYWORDS)
+
+        # Token budget: system prompt + memory block + history must leave room for the reply
+        self.token_counter = token_counter or TokenCounter()
+        self.context_window = context_window or CONTEXT_WINDOW
+        self.reply_tokens = reply_tokens or MAX_TOKENS
+        self.memory_token_share = memory_token_share
+        if prompt_layout not in PROMPT_LAYOUTS:
+            raise ValueError(f"Unknown prompt_layout '{prompt_layout}', expected one of {PROMPT_LAYOUTS}")
+        self.prompt_layout = prompt_layout
         
         # Caching & Performance
-        self._entity_vector_cache = {}
+        # Bounded LRU of normalized entity vectors (no Docs are kept)
+        self._entity_vector_cache = EntityVectorCache(entity_cache_size)
+        # Per-text parse results (entities, nouns, sentiment, vector) for repeated inputs
+        self._analysis_cache = AnalysisCache(
+            analysis_cache_size,
+            path=os.path.join(self.memory.memory_dir, "analysis_cache.jsonl") if persist_analysis_cache else None,
+            namespace=f"{MODEL_NAME}:{entity_noun_limit}:v{ANALYSIS_VERSION}"
+        )
+        # Filled from the store on first recall, then kept in sync by the store's write listener
+        self._entity_index = EntityVectorIndex()
+        self._entity_index_loaded = False
+        self.memory.add_write_listener(self._on_memory_write)
+        # Optional IVF index for very large stores (persisted next to memory.json).
+        # (Re)training runs on its own worker over a snapshot; recall stays exact until it is swapped in
+        self._ann_index = IVFIndex(index_dir=self.memory.memory_dir, nprobe=ann_nprobe) if use_ann_index else None
+        self._ann_trainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ann-trainer") if use_ann_index else None
+        self._ann_training = None
+        self._ann_changed_keys = None  # keys written while a training run is in flight
+        # Optional compact vector table: recall without loading the spaCy pipeline
+        self._vector_table = None
+        if vector_table_dir:
+            if VectorTable.exists(vector_table_dir):
+                self._vector_table = VectorTable(vector_table_dir)
+            else:
+                logging.warning(f"No vector table in '{vector_table_dir}', falling back to spaCy vectors")
         
         # NEW: Enhanced Memory Tracking
         self.conversation_themes = Counter()
@@ -56,163 +139,501 @@ class ConversationManager:
         self.sentiment_history = []
         self.last_memory_recall = []
 
+        # Messages added since the last transcript append
+        self._unsaved_messages = []
+        self.last_turn_latency = {}
+
+        # Per-call LLM telemetry (tokens, latency, speed), kept next to the memory files
+        self.session_id = os.path.basename(os.path.normpath(self.memory.memory_dir))
+        self.llm_call_log = LLMCallLog(os.path.join(self.memory.memory_dir, LLMCallLog.FILENAME)) if log_llm_calls else None
+        self._last_memory_tokens = 0
+
+        # Pipelined mode: memory writes and reply post-processing run on one background worker
+        # (FIFO, so turns apply in order) while the request is in flight
+        self.pipelined = pipelined
+        self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-worker") if pipelined else None
+        self._pending = []
+
+        # Optional TurnProfiler: cProfile/tracemalloc dumps for selected turns
+        self.profiler = profiler
+
     def chat(self, user_input: str) -> str:
+        with self._profile_turn(user_input):
+            return self._chat(user_input)
+
+    def _chat(self, user_input: str) -> str:
+        turn_start = time.perf_counter()
+        messages_for_api = self._prepare_turn(user_input)
+
+        # Get reply from the external API connector
+        start = time.perf_counter()
+        reply = send_message(messages_for_api) 
+        self._record_llm_call("chat", messages_for_api, reply, None, time.perf_counter() - start)
+
+        self._finish_turn(reply)
+        metrics.record("turn", time.perf_counter() - turn_start)
+        return reply
+
+    def chat_stream(self, user_input: str):
+        """
+        Like chat(), but yields the reply in fragments as the model generates it.
+        The full reply is recorded and post-processed when the stream ends (or is closed early);
+        time-to-first-token and total latency are kept in `last_turn_latency`.
+        """
+        # A profiled turn also covers the consumer's work between fragments
+        with self._profile_turn(user_input):
+            yield from self._chat_stream(user_input)
+
+    def _chat_stream(self, user_input: str):
+        turn_start = time.perf_counter()
+        messages_for_api = self._prepare_turn(user_input)
+
+        start = time.perf_counter()
+        first_token_s = None
+        fragments = []
+        try:
+            for fragment in stream_message(messages_for_api):
+                if first_token_s is None:
+                    first_token_s = time.perf_counter() - start
+                fragments.append(fragment)
+                yield fragment
+        finally:
+            reply = "".join(fragments).strip() or None
+            self._record_llm_call("stream", messages_for_api, reply, first_token_s, time.perf_counter() - start)
+            self._finish_turn(reply)
+            metrics.record("turn", time.perf_counter() - turn_start)
+
+    async def achat(self, user_input: str, executor=None) -> str:
+        """
+        Async chat(): the request is awaited on the event loop while spaCy/TextBlob work and
+        memory I/O run in `executor` (the loop's default thread pool if None), so one loop can
+        drive many sessions. Turns of the same session must not overlap.
+        """
+        loop = asyncio.get_running_loop()
+        turn_start = time.perf_counter()
+        messages_for_api = await loop.run_in_executor(executor, self._prepare_turn, user_input)
+
+        start = time.perf_counter()
+        reply = await asend_message(messages_for_api)
+        total_s = time.perf_counter() - start
+
+        # Telemetry (prompt token count, call-log append) blocks too; the copied context
+        # carries this task's last_usage() into the executor thread
+        await loop.run_in_executor(
+            executor, contextvars.copy_context().run, self._finish_async_turn, messages_for_api, reply, total_s
+        )
+        metrics.record("turn", time.perf_counter() - turn_start)
+        return reply
+
+    def _finish_async_turn(self, messages_for_api, reply, total_s):
+        self._record_llm_call("async", messages_for_api, reply, None, total_s)
+        self._finish_turn(reply)
+
+    def _profile_turn(self, user_input):
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.turn(user_input)
+
+    def _record_llm_call(self, mode, messages, reply, first_token_s, total_s):
+        """Latency for the UI and stage metrics, plus one telemetry record in the call log."""
+        self.last_turn_latency = {"first_token_s": first_token_s, "total_s": total_s}
+        metrics.record("llm", total_s)
+        if first_token_s is not None:
+            metrics.record("llm_first_token", first_token_s)
+        if self.llm_call_log is None:
+            return
+        try:
+            self.llm_call_log.record(
+                session=self.session_id,
+                model=MODEL,
+                mode=mode,
+                messages=len(messages),
+                memory_tokens=self._last_memory_tokens,
+                error=not reply or reply.startswith(("[Error]", "[Connection Error]")),
+                **call_record(
+                    last_usage(),
+                    total_s,
+                    first_token_s,
+                    estimated_prompt_tokens=self.token_counter.count_messages(messages),
+                    estimated_completion_tokens=self.token_counter.count_text(reply or "")
+                )
+            )
+        except OSError as e:
+            logging.warning(f"Could not write LLM call log: {e}")
+
+    def _prepare_turn(self, user_input: str) -> list:
+        """Memory processing, recall and context build; returns the messages to send."""
+        # The previous turn's background work must land before this turn reads state
+        with metrics.time("wait_background"):
+            self.wait_for_background()
+        with metrics.time("prepare"):
+            return self._prepare_messages(user_input)
+
+    def _prepare_messages(self, user_input: str) -> list:
         cmd_prefixes = ["!", "/"]
         is_command = any(user_input.strip().startswith(p) for p in cmd_prefixes)
 
         if not is_command:
-            # 1. ENHANCED Memory Processing
-            sentiment_score = self._get_sentiment(user_input)
+            # 1. ENHANCED Memory Processing (one parse shared by every stage)
+            analysis = self._analyze_turn(user_input)
+            sentiment_score = analysis.sentiment
             self.sentiment_history.append(sentiment_score)
             
             # Extract and track entities
-            entities = self._extract_entities(user_input)
+            entities = analysis.entities
             
             # Only update frequency for meaningful entities
             if entities:
                 self.entity_frequency.update(entities)
+                for entity in entities:
+                    if entity in self._entity_index:
+                        self._entity_index.set_frequency(entity, self.entity_frequency[entity])
             
-            # Process memory with theme tracking (only if entities exist)
-            if entities:
-                self._process_memory_entry(user_input, sentiment_score, entities)
+            # Process memory with theme tracking (only if entities exist).
+            # Pipelined, the write runs in the background after recall and is visible from the next turn
+            memory_entry = (user_input, sentiment_score, entities) if entities else None
+            if memory_entry and not self.pipelined:
+                self._process_memory_entry(*memory_entry)
             
             # 2. DYNAMIC Memory Recall with enhanced weighting
-            recalled_memory = self._recall_relevant_memory(user_input)
+            with metrics.time("recall"):
+                recalled_memory = self._recall_relevant_memory(user_input, analysis=analysis)
             self.last_memory_recall = recalled_memory
             
             # 3. Build Context with Memory Injection
-            messages_for_api = self._build_context_with_memory(user_input, recalled_memory)
+            with metrics.time("context_build"):
+                messages_for_api = self._build_context_with_memory(user_input, recalled_memory)
             
             # Store user input permanently to conversation history
-            self.messages.append({"role": "user", "content": user_input})
+            self._add_message({"role": "user", "content": user_input})
+
+            if memory_entry and self.pipelined:
+                self._run_background(self._process_memory_entry, *memory_entry)
             
         else:
             # Command path - no memory processing
-            messages_for_api = self.messages + [{"role": "user", "content": user_input}]
-            self.messages.append({"role": "user", "content": user_input})
+            self._last_memory_tokens = 0
+            user_message = {"role": "user", "content": user_input}
+            history = self._fit_history(
+                self.prompt_token_budget - self.token_counter.count_messages([self.messages[0], user_message])
+            )
+            messages_for_api = [self.messages[0]] + history + [user_message]
+            self._add_message({"role": "user", "content": user_input})
 
-        # Get reply from the external API connector
-        reply = send_message(messages_for_api) 
-        
+        return messages_for_api
+
+    def _finish_turn(self, reply):
+        """Record the reply, then queue theme tracking, pruning and persistence."""
         if reply:
-            self.messages.append({"role": "assistant", "content": reply})
-            
-            # NEW: Track themes in AI responses
+            self._add_message({"role": "assistant", "content": reply})
+            self._run_background(self._post_process_reply, reply)
+
+    def _post_process_reply(self, reply):
+        # NEW: Track themes in AI responses
+        with metrics.time("themes"):
             self._extract_themes(reply)
-            
-            # Prune context if too long
+        
+        # Prune context if too long
+        with metrics.time("prune"):
             self._prune_context()
-            
-            # Save context
-            self.memory.save_context(self.messages)
+        
+        # Save context
+        with metrics.time("persistence"):
+            self._save_context()
+        metrics.maybe_dump()
+
+    def _run_background(self, task, *args):
+        """Run a state-updating task now, or queue it on the worker in pipelined mode."""
+        # Profiled turns run their memory work inline so it lands in the same profile
+        if self._background is None or (self.profiler is not None and self.profiler.active):
+            task(*args)
+        else:
+            self._pending.append(self._background.submit(task, *args))
 
-        return reply
+    def wait_for_background(self):
+        """Block until queued memory/context work has been applied."""
+        pending, self._pending = self._pending, []
+        for future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"Background memory task failed: {e}")
+
+    def close(self):
+        """Apply queued work, commit pending memory writes, save the caches and stop the background workers."""
+        self.wait_for_background()
+        self.memory.flush()
+        self._analysis_cache.save()
+        if self._ann_index is not None:
+            self._cancel_ann_training()
+            self._ann_index.flush()
+            if self._ann_trainer is not None:
+                self._ann_trainer.shutdown()
+                self._ann_trainer = None
+        if self._background is not None:
+            self._background.shutdown()
+            self._background = None
+
+    def _add_message(self, message: dict):
+        self.messages.append(message)
+        self._unsaved_messages.append(message)
+
+    def _save_context(self):
+        """Append only the new messages to the transcript and move the live-window pointer."""
+        self.memory.append_context(
+            self._unsaved_messages,
+            keep_last=len(self.messages) - 1,
+            pinned=self.messages[:1]
+        )
+        self._unsaved_messages = []
+
+    @property
+    def prompt_token_budget(self):
+        """Tokens the prompt may use: the context window minus the reply and a 5% estimation margin."""
+        return self.context_window - self.reply_tokens - int(self.context_window * 0.05)
 
     def _build_context_with_memory(self, user_input: str, recalled_memory: list) -> list:
         """
         Build API messages with dynamically injected memory context.
+        The memory block gets at most `memory_token_share` of the prompt budget;
+        history fills what is left, newest messages first.
         """
-        messages_for_api = self.messages.copy() 
+        budget = self.prompt_token_budget
+        memory_block = ""
+        if recalled_memory:
+            memory_block = self._fit_memory_block(recalled_memory, int(budget * self.memory_token_share))
+        self._last_memory_tokens = self.token_counter.count_text(memory_block) if memory_block else 0
         
-        dynamic_system_prompt = self.system_prompt_base
+        if self.prompt_layout == "prefix_cache":
+            # Only the last message changes per turn, so the server can reuse its cached prefix
+            system_message = self.messages[0]
+            content = f"{memory_block.strip()}\n\n**USER MESSAGE:**\n{user_input}" if memory_block else user_input
+            user_message = {"role": "user", "content": content}
+        else:
+            system_message = {"role": "system", "content": self.system_prompt_base + memory_block}
+            user_message = {"role": "user", "content": user_input}
         
-        if recalled_memory:
-            memory_string = self._format_memory_for_prompt(recalled_memory)
-            dynamic_system_prompt += f"\n\n**USER MEMORY CONTEXT:**\n{memory_string}"
-            
-            # Add emotional arc if significant
-            emotional_context = self._get_emotional_arc_summary()
-            if emotional_context:
-                dynamic_system_prompt += f"\n\n**EMOTIONAL ARC:**\n{emotional_context}"
-            
-            # Add theme evolution if significant
-            theme_context = self._get_theme_summary()
-            if theme_context:
-                dynamic_system_prompt += f"\n\n**RECURRING THEMES:**\n{theme_context}"
+        history = self._fit_history(budget - self.token_counter.count_messages([system_message, user_message]))
         
-        messages_for_api[0] = {"role": "system", "content": dynamic_system_prompt}
-        messages_for_api.append({"role": "user", "content": user_input})
+        return [system_message] + history + [user_message]
+
+    def _fit_memory_block(self, recalled_memory: list, budget: int) -> str:
+        """Memory, emotional arc and theme sections for the system prompt, within `budget` tokens."""
+        count = self.token_counter.count_text
+        entries = list(recalled_memory)
         
-        return messages_for_api
+        # Drop the least relevant memories (recall returns them highest-weighted first)
+        while entries:
+            block = f"\n\n**USER MEMORY CONTEXT:**\n{self._format_memory_for_prompt(entries)}"
+            if count(block) <= budget:
+                break
+            entries.pop()
+        if not entries:
+            return ""
+        
+        # Add emotional arc and theme evolution if significant and they still fit
+        for title, summary in (
+            ("EMOTIONAL ARC", self._get_emotional_arc_summary()),
+            ("RECURRING THEMES", self._get_theme_summary())
+        ):
+            section = f"\n\n**{title}:**\n{summary}"
+            if summary and count(block + section) <= budget:
+                block += section
+        
+        return block
+
+    def _fit_history(self, budget: int) -> list:
+        """The most recent conversation messages (system prompt excluded) that fit in `budget` tokens."""
+        history = self.messages[1:]
+        used = 0
+        start = len(history)
+        while start > 0:
+            tokens = self.token_counter.count_message(history[start - 1])
+            if used + tokens > budget:
+                logging.debug(f"History trimmed to {len(history) - start} of {len(history)} messages for the token budget")
+                break
+            used += tokens
+            start -= 1
+        return history[start:]
 
     def _prune_context(self):
         """
         Keep context window manageable by removing old messages.
-        Keeps system prompt + recent messages.
+        Keeps system prompt + recent messages, bounded by message count and the prompt token budget.
         """
-        if len(self.messages) > self.max_context_messages:
+        # Optional hard cap on message count; the token budget below is the main limit
+        if self.max_context_messages and len(self.messages) > self.max_context_messages:
             # Keep system prompt + last N messages
             system_msg = self.messages[0]
             recent_messages = self.messages[-(self.max_context_messages-1):]
             self.messages = [system_msg] + recent_messages
             logging.debug(f"Context pruned to {len(self.messages)} messages")
 
+        total = self.token_counter.count_messages(self.messages)
+        target = self.prompt_token_budget
+        if self.prompt_layout == "prefix_cache":
+            # Leave room for the per-turn memory block so building the prompt doesn't trim the front
+            target -= int(target * self.memory_token_share)
+            if total > target:
+                # Trim in one larger step so the history prefix stays stable for the next few turns
+                target = int(target * 0.75)
+        dropped = 0
+        while len(self.messages) - dropped > 2 and total > target:
+            total -= self.token_counter.count_message(self.messages[1 + dropped])
+            dropped += 1
+        if dropped:
+            self.messages = [self.messages[0]] + self.messages[1 + dropped:]
+            logging.debug(f"Context pruned to {len(self.messages)} messages ({total} tokens)")
+
     # --- ENHANCED MEMORY RECALL ---
 
-    def _recall_relevant_memory(self, user_input: str) -> list:
+    def _recall_relevant_memory(self, user_input: str, analysis: TurnAnalysis = None) -> list:
         """
         Enhanced memory recall with multi-factor weighting.
-        Fixed to handle empty vectors gracefully.
+        Scores every remembered entity in one matrix-vector product over the entity index.
+        Reuses the turn's Doc when an analysis is passed in.
         """
-        user_doc = nlp(user_input)
+        query_vector = self._get_query_vector(user_input, analysis)
         
-        # FIX: Check if user_doc has a valid vector
-        if not user_doc.has_vector or user_doc.vector_norm == 0:
+        # FIX: Check if the input has a valid vector
+        if query_vector is None or not np.any(query_vector):
             logging.debug(f"User input '{user_input}' has no valid vector, skipping memory recall")
             return []
         
-        memory_data = self.memory.get_memory_data()
-        scored_entries = []
-        
-        for entity_key, entry in memory_data.items():
-            # Filter non-memory entries (metadata)
-            if not isinstance(entry, dict) or entity_key.startswith("_"):
-                continue
+        self._load_entity_index()
+
+        # Approximate path: only score entities in the nearest IVF buckets
+        candidate_rows = None
+        if self._ann_index is not None:
+            self._update_ann_training()
+            if self._ann_index.is_trained:
+                candidate_rows = self._ann_index.candidate_rows(query_vector, self._entity_index)
+
+        # ENHANCED WEIGHTING FORMULA (vectorized in EntityVectorIndex):
+        # Similarity * (1 + |Sentiment|) * (1 + Frequency * 0.1)
+        top_entries = self._entity_index.weighted_top_k(
+            query_vector, self.similarity_threshold, self.memory_recall_limit,
+            rows=candidate_rows
+        )
+
+        return [
+            (entity_key, weighted_score, self.memory.get_memory_data(entity_key), similarity, frequency)
+            for entity_key, weighted_score, similarity, frequency in top_entries
+        ]
 
-            try:
-                # Use the caching method
-                entity_doc = self._get_entity_doc(entity_key)
-                
-                # FIX: Check if entity has a valid vector before comparison
-                if not entity_doc.has_vector or entity_doc.vector_norm == 0:
-                    logging.debug(f"Entity '{entity_key}' has no valid vector, skipping")
-                    continue
-                
-                # Suppress RuntimeWarning from SpaCy 
-                with warnings.catch_warnings():
-                    warnings.simplefilter("ignore", RuntimeWarning)
-                    similarity = user_doc.similarity(entity_doc)
-                    
-            except (ValueError, TypeError, RuntimeWarning) as e:
-                logging.debug(f"Similarity failed for '{entity_key}': {e}")
+    def _get_query_vector(self, user_input: str, analysis: TurnAnalysis = None):
+        """The turn's Doc vector if parsed or cached, else the vector table, else a fresh parse."""
+        if analysis is None:
+            analysis = self._analysis_cache.get(user_input)
+        if analysis is not None:
+            return analysis.vector if analysis.has_vector else None
+        if self._vector_table is not None:
+            return self._vector_table.text_vector(user_input)
+        user_doc = get_nlp()(user_input)
+        return user_doc.vector if user_doc.has_vector else None
+
+    def _load_entity_index(self):
+        """Build the entity index from the store once; later writes arrive through _on_memory_write."""
+        if self._entity_index_loaded:
+            return
+        self._entity_index_loaded = True
+        # Walk in store order so tie-breaking matches the old per-entry loop
+        for key, score in self.memory.get_memory_scores():
+            if key not in self._entity_index:
+                self._index_entity(key, {"score": score})
+
+    def _on_memory_write(self, entries):
+        """Store write listener: upsert written entities (new vector or new score), or drop everything on clear."""
+        if entries is None:
+            self._entity_index.clear()
+            if self._ann_index is not None:
+                self._cancel_ann_training()
+                self._ann_index.clear()
+            return
+        if not self._entity_index_loaded:
+            return  # picked up by the full load on first recall
+        for key, entry in entries.items():
+            if key.startswith("_"):
                 continue
-
-            # ENHANCED WEIGHTING FORMULA
-            mem_score = entry.get("score", 0)
-            frequency = self.entity_frequency.get(entity_key, 0)
-            
-            # Base: Similarity * (1 + |Sentiment|)
-            base_score = similarity * (1 + math.fabs(mem_score))
-            
-            # Boost: Frequency (more mentioned = more relevant)
-            frequency_boost = 1 + (frequency * 0.1)
-            
-            # Final weighted score
-            weighted_score = base_score * frequency_boost
-
-            if similarity >= self.similarity_threshold or weighted_score > self.similarity_threshold:
-                scored_entries.append((
-                    entity_key, 
-                    weighted_score, 
-                    entry, 
-                    similarity,
-                    frequency
-                ))
-        
-        # Sort by weighted score descending
-        scored_entries.sort(key=lambda x: x[1], reverse=True)
-        
-        return scored_entries[:self.memory_recall_limit]
+            if isinstance(entry, dict):
+                self._index_entity(key, entry)
+            else:
+                self._unindex_entity(key)
+
+    def _update_ann_training(self):
+        """Swap in a finished IVF training run, or start one if the index needs (re)training."""
+        training = self._ann_training
+        if training is not None:
+            if not training.done():
+                return
+            self._ann_training = None
+            try:
+                self._swap_in_ann_index(training.result())
+            except Exception as e:
+                logging.error(f"IVF index training failed: {e}")
+            self._ann_changed_keys = None
+            return
+        if self._ann_trainer is not None and self._ann_index.needs_training(self._entity_index):
+            # Copy the valid rows so the trainer never sees later writes to the matrix
+            index = self._entity_index
+            valid_rows = np.flatnonzero(index.valid)
+            keys = [index.keys[row] for row in valid_rows]
+            vectors = index.vectors[valid_rows]
+            trainee = self._ann_index.untrained_copy()
+            self._ann_changed_keys = set()
+            self._ann_training = self._ann_trainer.submit(self._train_ann_index, trainee, keys, vectors)
+
+    @staticmethod
+    def _train_ann_index(trainee, keys, vectors):
+        trainee.train_vectors(keys, vectors)
+        return trainee
+
+    def _swap_in_ann_index(self, trained):
+        """Catch the new index up with keys written during training, then replace the old one."""
+        index = self._entity_index
+        for key in self._ann_changed_keys:
+            row = index.rows.get(key)
+            if row is None:
+                trained.remove(key)
+            else:
+                # Invalid (zero) rows are dropped from the buckets by add()
+                trained.add(key, index.vectors[row])
+        self._ann_index = trained
+
+    def _cancel_ann_training(self):
+        """Drop an in-flight training run (its result would describe a stale store)."""
+        if self._ann_training is not None:
+            self._ann_training.cancel()
+            try:
+                self._ann_training.result()
+            except Exception:
+                pass
+        self._ann_training = None
+        self._ann_changed_keys = None
+
+    def _unindex_entity(self, entity_key: str):
+        self._entity_index.remove(entity_key)
+        if self._ann_index is not None:
+            self._ann_index.remove(entity_key)
+            if self._ann_changed_keys is not None:
+                self._ann_changed_keys.add(entity_key)
+
+    def _index_entity(self, entity_key: str, entry: dict):
+        """Insert or refresh an entity's row (vector, sentiment, frequency) in the index."""
+        try:
+            score = float(entry.get("score", 0) or 0)
+        except (TypeError, ValueError):
+            score = 0.0
+        row = self._entity_index.upsert(
+            entity_key,
+            self._get_entity_vector(entity_key),
+            score=score,
+            frequency=self.entity_frequency.get(entity_key, 0),
+        )
+        if self._ann_index is not None:
+            self._ann_index.add(entity_key, self._entity_index.vectors[row])
+            if self._ann_changed_keys is not None:
+                self._ann_changed_keys.add(entity_key)
 
     def _format_memory_for_prompt(self, recalled_memory: list) -> str:
         """
@@ -260,19 +681,9 @@ class ConversationManager:
     # --- THEME & EMOTIONAL TRACKING ---
 
     def _extract_themes(self, text: str):
-        """Extract and track gothic/narrative themes from text."""
-        text_lower = text.lower()
-        
-        gothic_themes = [
-            "darkness", "shadow", "light", "death", "spirit", "ghost",
-            "memory", "sorrow", "loneliness", "beauty", "art", "creation",
-            "haunting", "whisper", "silence", "ink", "tears", "wind",
-            "night", "moon", "blood", "soul", "dream", "fear"
-        ]
-        
-        for theme in gothic_themes:
-            if theme in text_lower:
-                self.conversation_themes[theme] += 1
+        """Extract and track gothic/narrative themes from text (each theme counts once per text)."""
+        for theme in self._theme_matcher.labels(text):
+            self.conversation_themes[theme] += 1
 
     def _get_theme_summary(self, top_n=3) -> str:
         """Get summary of most common themes."""
@@ -304,26 +715,16 @@ class ConversationManager:
 
     def get_context(self):
         """Return current conversation context."""
+        self.wait_for_background()
         return self.messages
 
     def get_memory_summary(self, top_n=5):
         """Prepares and returns structured data for memory display with enhanced metrics."""
-        
+        self.wait_for_background()
         metadata = self.memory.get_memory_metadata() 
         has_context = bool(self.memory.load_context())
-        likes, dislikes = [], []
-
-        for key, value in self.memory.get_memory_data().items():
-            if not isinstance(value, dict) or key.startswith("_"):
-                continue
-            score = value.get("score", 0)
-            if score > self.neutral_threshold:
-                likes.append((key, score))
-            elif score < -self.neutral_threshold:
-                dislikes.append((key, score))
-
-        likes.sort(key=lambda x: x[1], reverse=True)
-        dislikes.sort(key=lambda x: x[1])
+        likes = self.memory.get_top_entries(top_n, above=self.neutral_threshold)
+        dislikes = self.memory.get_top_entries(top_n, below=-self.neutral_threshold)
 
         def build_table(title, data, color="green"):
             table = Table(title=title, title_style=f"bold {color}", header_style=f"bold {color}")
@@ -351,103 +752,177 @@ class ConversationManager:
             "theme_summary": self._get_theme_summary(),
             "emotional_arc": self._get_emotional_arc_summary(),
             "total_themes": len(self.conversation_themes),
-            "total_entities": len(self.entity_frequency)
+            "total_entities": len(self.entity_frequency),
+            "entity_vector_cache": self._entity_vector_cache.stats,
+            "analysis_cache": self._analysis_cache.stats
         }
 
     def clear_memory(self):
         """Wipe all stored memory (permanent reset)."""
+        self.wait_for_background()
+        # The store's clear also empties the entity and IVF indexes (_on_memory_write)
         self.memory.clear_memory()
+        self._entity_vector_cache.clear()
         self.conversation_themes.clear()
         self.entity_frequency.clear()
         self.sentiment_history.clear()
         self.last_memory_recall.clear()
 
-    def reset_context(self):
+    def reset_context(self, keep_history=True):
         """Reset conversation context — reset to system prompt."""
+        self.wait_for_background()
         self.messages = [{"role": "system", "content": self.system_prompt_base}]
-        self.memory.clear_context()
+        self._unsaved_messages = []
+        self.memory.clear_context(keep_history=keep_history)
 
     def reset_all(self):
-        """Reset memory and context."""
+        """Reset memory and context, including the on-disk transcript."""
         self.clear_memory()
-        self.reset_context()
+        self.reset_context(keep_history=False)
+
+    # --- Session Persistence ---
+
+    def save_session_state(self):
+        """Flush pending work and persist the in-memory trackers, so the session can be dropped from RAM."""
+        self.wait_for_background()
+        self.memory.save_session_state({
+            "conversation_themes": dict(self.conversation_themes),
+            "entity_frequency": dict(self.entity_frequency),
+            "sentiment_history": self.sentiment_history
+        })
+        self.memory.flush()
+        self._analysis_cache.save()
+
+    def restore_session_state(self):
+        """Pick up a saved session: the live context window plus the saved trackers."""
+        context = self.memory.load_context()
+        if context:
+            # The pinned system prompt is the current one; keep the saved conversation after it
+            history = context[1:] if context[0].get("role") == "system" else context
+            self.messages = [self.messages[0]] + history
+        state = self.memory.load_session_state()
+        self.conversation_themes = Counter(state.get("conversation_themes", {}))
+        self.entity_frequency = Counter(state.get("entity_frequency", {}))
+        self.sentiment_history = list(state.get("sentiment_history", []))
 
     # --- Entity & Sentiment Processing ---
     
     def _get_entity_doc(self, entity_key: str):
-        """Retrieves or creates the SpaCy Doc for an entity, using a cache."""
-        if entity_key not in self._entity_vector_cache:
-            self._entity_vector_cache[entity_key] = nlp(entity_key)
-        return self._entity_vector_cache[entity_key]
+        """Parses an entity key with SpaCy (only the resulting vector is cached)."""
+        return get_nlp()(entity_key)
 
-    def _extract_entities(self, text: str) -> list:
+    def _get_entity_vector(self, entity_key: str):
+        """
+        Returns the entity's normalized vector: from the LRU cache, else the persisted store,
+        parsing and storing it only on first sight.
+        """
+        cached = self._entity_vector_cache.get(entity_key)
+        if cached is not None:
+            return cached[0]
+        vector = self.memory.get_entity_vector(entity_key)
+        if vector is None:
+            if self._vector_table is not None:
+                vector = self._vector_table.text_vector(entity_key)
+            else:
+                vector = self._get_entity_doc(entity_key).vector
+            self.memory.set_entity_vector(entity_key, vector)
+        return self._entity_vector_cache.put(entity_key, vector)[0]
+
+    def _analyze_turn(self, text: str) -> TurnAnalysis:
+        """
+        Parse the input once and derive entities, nouns and sentiment from the same Doc.
+        Texts seen before (after whitespace normalization) come from the analysis cache.
+        """
+        cached = self._analysis_cache.get(text)
+        if cached is not None:
+            return cached
+        with metrics.time("parse"):
+            doc = get_nlp()(text)
+        with metrics.time("entities"):
+            nouns = self._extract_nouns(doc)
+            entities = self._extract_entities(text, doc=doc, nouns=nouns)
+        with metrics.time("sentiment"):
+            sentiment = self._get_sentiment(text, doc=doc)
+        analysis = TurnAnalysis.from_doc(text, doc, entities, nouns, sentiment)
+        self._analysis_cache.put(text, analysis)
+        return analysis
+
+    def _extract_entities(self, text: str, doc=None, nouns=None) -> list:
         """Extract entities (PERSON, WORK_OF_ART, etc.) and fallback to key nouns."""
         
         entities = set() 
-        doc = nlp(text)
+        if doc is None:
+            cached = self._analysis_cache.get(text)
+            if cached is not None:
+                return list(cached.entities)
+            doc = get_nlp()(text)
         
         for ent in doc.ents:
             if ent.label_ in ["ORG", "PERSON", "WORK_OF_ART", "PRODUCT", "EVENT"]:
                 entities.add(ent.text)
                 
-        nouns = [
+        for noun in nouns if nouns is not None else self._extract_nouns(doc):
+            entities.add(noun)
+            
+        return list(entities)[:self.entity_noun_limit]
+
+    def _extract_nouns(self, doc) -> list:
+        """Key nouns/proper nouns, skipping filler words and very short tokens."""
+        return [
             token.text 
             for token in doc 
             if token.pos_ in ["NOUN", "PROPN"] 
             and token.text.lower() not in ["thing", "stuff", "it", "something"]
             and len(token.text) > 2
         ]
-        
-        for noun in nouns:
-            entities.add(noun)
-            
-        return list(entities)[:self.entity_noun_limit]
 
-    def _get_sentiment(self, text: str) -> float:
-        """Get sentiment score from TextBlob."""
-        blob = TextBlob(text)
-        return max(-1.0, min(1.0, blob.sentiment.polarity))
+    def _get_sentiment(self, text: str, doc=None) -> float:
+        """
+        Get sentiment score from TextBlob's pattern lexicon.
+        With a Doc, its tokens are scored directly instead of re-tokenizing the text.
+        """
+        if doc is not None:
+            polarity = pattern_sentiment([token.lower_ for token in doc])[0]
+        else:
+            cached = self._analysis_cache.get(text)
+            if cached is not None:
+                return cached.sentiment
+            polarity = TextBlob(text).sentiment.polarity
+        return max(-1.0, min(1.0, polarity))
 
+    @metrics.timed("memory_write")
     def _process_memory_entry(self, text: str, sentiment_score: float, entities: list):
         """Extract preferences/dislikes and save to memory with enhanced context."""
         keywords = self._get_keywords(text.lower())
-        
-        for entity in entities:
-            entry_data = {
+        timestamp = datetime.now().isoformat()
+        entries = {
+            entity: {
                 "type": "preference" if keywords else "sentiment",
                 "text": text[:200],
                 "score": sentiment_score,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
                 "keywords": keywords
             }
-            
-            self.memory.set_memory_entry(entity, entry_data)
-            
-            # Clear cache entry for this entity if it exists
-            if entity in self._entity_vector_cache:
-                del self._entity_vector_cache[entity]
+            for entity in entities
+        }
+
+        # One commit for the whole turn instead of one file write per entity
+        # The store's write listener keeps the recall matrix in sync (_on_memory_write)
+        self.memory.set_memory_entries(entries)
 
     def _get_keywords(self, text: str) -> str:
-        """Return 'like' or 'dislike' based on keywords."""
-        like_keywords = ["like", "love", "enjoy", "favorite", "interested in", "keen on", "fond of", "admire", "adore", "prefer"]
-        dislike_keywords = ["dislike", "hate", "not a fan", "avoid", "detest", "can't stand", "loathe"]
-        
-        for kw in like_keywords:
-            if kw in text:
-                return "like"
-        for kw in dislike_keywords:
-            if kw in text:
-                return "dislike"
-        return None
+        """Return 'like' or 'dislike' based on keywords (a like cue wins when both appear)."""
+        labels = self._preference_matcher.labels(text)
+        return labels[0] if labels else None
             
     # Similarity helpers (unused but kept for compatibility)
     def _get_keywords_doc(self, keywords):
         """Convert keyword list to spacy Doc for similarity."""
-        return [nlp(k) for k in keywords]
+        return [get_nlp()(k) for k in keywords]
 
     def _get_keywords_similarity(self, text: str, keywords: list) -> bool:
         """Check if text is similar to any keyword."""
-        doc = nlp(text)
+        doc = get_nlp()(text)
         for keyword in keywords:
             if any(token.similarity(keyword) >= self.similarity_threshold for token in doc):
                 return True
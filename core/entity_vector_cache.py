@@ -0,0 +1,38 @@
+import numpy as np
+from core.cache_utils import LRUCache
+
+
+class EntityVectorCache(LRUCache):
+    """
+    Bounded LRU of entity key -> (unit-norm float32 vector, valid flag).
+    Only the vector is kept, never the spaCy Doc, so memory stays flat however many
+    entities a long session touches. Zero or non-finite vectors are stored as invalid.
+    """
+
+    def __init__(self, max_entries=4096):
+        super().__init__(max_entries)
+
+    def get(self, key):
+        """(vector, valid) for a cached key, refreshing its recency; None on a miss."""
+        return self._lookup(key)
+
+    def put(self, key, vector):
+        """Normalize and cache a vector, evicting the least recently used entries; returns (vector, valid)."""
+        vector = np.array(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        if norm > 0 and np.isfinite(norm):
+            entry = (vector / norm, True)
+        else:
+            entry = (np.zeros_like(vector), False)
+        entry[0].flags.writeable = False
+
+        self._store(key, entry)
+        return entry
+
+    @property
+    def nbytes(self):
+        return sum(vector.nbytes for vector, _ in self._entries.values())
+
+    @property
+    def stats(self):
+        return {**super().stats, "nbytes": self.nbytes}
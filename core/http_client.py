@@ -0,0 +1,121 @@
+import asyncio
+import os
+import threading
+import weakref
+import httpx
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+load_dotenv(dotenv_path="./data/config.env")
+
+CONNECT_TIMEOUT = float(os.getenv("CONNECT_TIMEOUT", 3.05))
+READ_TIMEOUT = float(os.getenv("READ_TIMEOUT", 120))
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", 2))
+BACKOFF_FACTOR = float(os.getenv("BACKOFF_FACTOR", 0.5))
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 4))
+
+# Transient statuses worth retrying (model loading, proxy hiccups)
+RETRY_STATUSES = (429, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+# One async client per event loop; httpx clients must not be shared across loops
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def default_timeout():
+    """(connect, read) timeout tuple for requests."""
+    return (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+
+def create_session(retries=None, backoff_factor=None, pool_size=None):
+    """
+    A requests.Session with a keep-alive connection pool and bounded retries.
+    Retries cover failed connects and transient 429/5xx answers with exponential backoff;
+    read timeouts are not retried, since the server may still be generating.
+    """
+    retries = MAX_RETRIES if retries is None else retries
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        status_forcelist=RETRY_STATUSES,
+        # Chat completions have no side effects, so POST is safe to resend
+        allowed_methods=frozenset({"GET", "POST"}),
+        backoff_factor=BACKOFF_FACTOR if backoff_factor is None else backoff_factor,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size or POOL_SIZE,
+        pool_maxsize=pool_size or POOL_SIZE,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """Process-wide shared session, created on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def post_json(url, payload, stream=False, timeout=None, session=None):
+    """POST a JSON payload through the pooled session with connect/read timeouts."""
+    session = session or get_session()
+    return session.post(url, json=payload, stream=stream, timeout=timeout or default_timeout())
+
+
+# ----- Async -----
+def create_async_client(pool_size=None, retries=None):
+    """httpx.AsyncClient with the same pool size, timeouts and connect retries as the sync session."""
+    limits = httpx.Limits(
+        max_connections=pool_size or POOL_SIZE,
+        max_keepalive_connections=pool_size or POOL_SIZE
+    )
+    transport = httpx.AsyncHTTPTransport(retries=MAX_RETRIES if retries is None else retries, limits=limits)
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+    )
+
+
+def get_async_client():
+    """Shared async client for the running event loop, created on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _async_clients[loop] = create_async_client()
+    return client
+
+
+async def apost_json(url, payload, client=None, retries=None, backoff_factor=None):
+    """
+    Async POST through the loop's pooled client. Transient 429/5xx answers are retried
+    with exponential backoff (connect failures are retried by the transport).
+    """
+    client = client or get_async_client()
+    retries = MAX_RETRIES if retries is None else retries
+    backoff_factor = BACKOFF_FACTOR if backoff_factor is None else backoff_factor
+
+    for attempt in range(retries + 1):
+        response = await client.post(url, json=payload)
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        await asyncio.sleep(backoff_factor * (2 ** attempt))
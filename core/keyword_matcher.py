@@ -0,0 +1,88 @@
+import re
+
+# Straight and typographic apostrophes match each other ("can't" / "can’t")
+_APOSTROPHES = "['’]"
+
+
+def inflections(word):
+    """Common English inflections of a single word: love -> loves, loved, loving; prefer -> preferred."""
+    forms = {word, word + "s", word + "es", word + "ed", word + "ing"}
+    if word.endswith("e"):
+        forms |= {word + "d", word[:-1] + "ing"}
+    else:
+        forms |= {word + word[-1] + "ed", word + word[-1] + "ing"}
+    return forms
+
+
+def _trie_pattern(forms):
+    """
+    Regex source for a set of lowercase forms, factored as a character trie
+    ("shadow|shade" -> "shad(?:e|ow)") so the engine never backtracks across alternatives.
+    """
+    trie = {}
+    for form in forms:
+        node = trie
+        for ch in form:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(ch):
+        if ch == "'":
+            return _APOSTROPHES
+        if ch == " ":
+            return r"\s+"
+        return re.escape(ch)
+
+    def build(node):
+        branches = [emit(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        optional = "" in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Compiles a lexicon {label: [terms]} into one word-boundary regex and finds every
+    whole-word hit in a single pass over the lowercased text ("art" matches "art" and
+    "arts", never "heart"). Multi-word terms match across any whitespace; single-word
+    terms also match their inflections unless inflect=False. A term may belong to several labels.
+    """
+
+    def __init__(self, lexicon, inflect=True):
+        self.lexicon = {label: list(terms) for label, terms in lexicon.items()}
+        self._label_order = {label: i for i, label in enumerate(self.lexicon)}
+        self._labels_by_form = {}
+        for label, terms in self.lexicon.items():
+            for term in terms:
+                term = self._normalize(term)
+                forms = inflections(term) if inflect and " " not in term else {term}
+                for form in forms:
+                    labels = self._labels_by_form.setdefault(form, [])
+                    if label not in labels:
+                        labels.append(label)
+
+        self.pattern = re.compile(r"(?<!\w)" + _trie_pattern(self._labels_by_form) + r"(?!\w)")
+
+    @staticmethod
+    def _normalize(text):
+        return " ".join(text.lower().replace("’", "'").split())
+
+    def find(self, text):
+        """(label, matched text, start) for every hit, in text order (matched text is lowercased)."""
+        hits = []
+        for match in self.pattern.finditer(text.lower()):
+            for label in self._labels_by_form[self._normalize(match.group(0))]:
+                hits.append((label, match.group(0), match.start()))
+        return hits
+
+    def labels(self, text):
+        """Distinct labels present in `text`, in lexicon order."""
+        found = set()
+        for form in self.pattern.findall(text.lower()):
+            found.update(self._labels_by_form[self._normalize(form)])
+        return sorted(found, key=self._label_order.get)
@@ -0,0 +1,69 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+
+class LLMCallLog:
+    """
+    Append-only JSON-lines log with one record per LLM request: prompt/completion tokens,
+    wall time, time-to-first-token and generation speed. Kept next to the session's memory
+    so `python -m benchmarks.llm_usage_report` can summarize per session.
+    """
+
+    FILENAME = "llm_calls.jsonl"
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, **fields):
+        """Append one call record (a timestamp is added)."""
+        record = {"timestamp": datetime.now().isoformat(), **fields}
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+        return record
+
+    def load(self):
+        """All records, skipping a torn last line from an interrupted write."""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+
+
+def call_record(usage, total_s, first_token_s=None, estimated_prompt_tokens=None, estimated_completion_tokens=None):
+    """
+    Telemetry fields for one call. Token counts come from the server's `usage` block when it
+    sent one, else from the local estimates. tokens_per_s is the decode rate after the first token
+    when streaming; without a first-token time it is end-to-end (prefill included).
+    """
+    usage = usage or {}
+    prompt_tokens = usage.get("prompt_tokens")
+    completion_tokens = usage.get("completion_tokens")
+    source = "server" if prompt_tokens is not None and completion_tokens is not None else "estimate"
+    if prompt_tokens is None:
+        prompt_tokens = estimated_prompt_tokens
+    if completion_tokens is None:
+        completion_tokens = estimated_completion_tokens
+
+    generation_s = total_s - first_token_s if first_token_s is not None else total_s
+    tokens_per_s = completion_tokens / generation_s if completion_tokens and generation_s > 0 else None
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cached_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens"),
+        "usage_source": source,
+        "total_s": total_s,
+        "first_token_s": first_token_s,
+        "tokens_per_s": tokens_per_s,
+    }
@@ -1,12 +1,19 @@
 import requests
+from core.http_client import get_session, CONNECT_TIMEOUT
 
 class LMStudioClient:
     """
     Handles communication with a local LM Studio server (mockable).
+    Requests go through a pooled keep-alive session (shared by default).
+    The read timeout stays at this client's original 10 s unless `timeout` is given.
     """
 
-    def __init__(self, base_url="http://localhost:1234/v1/chat/completions"):
+    READ_TIMEOUT = 10
+
+    def __init__(self, base_url="http://localhost:1234/v1/chat/completions", session=None, timeout=None):
         self.base_url = base_url
+        self.session = session or get_session()
+        self.timeout = timeout or (CONNECT_TIMEOUT, self.READ_TIMEOUT)
 
     def send_message(self, messages, model="lmstudio-community/phi-3-mini-4k"):
         """
@@ -15,7 +22,7 @@ class LMStudioClient:
         """
         try:
             payload = {"model": model, "messages": messages}
-            response = requests.post(self.base_url, json=payload, timeout=10)
+            response = self.session.post(self.base_url, json=payload, timeout=self.timeout)
             response.raise_for_status()
             data = response.json()
             return data["choices"][0]["message"]["content"]
@@ -1,23 +1,125 @@
 import json
 import os
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
+import numpy as np
+from core.cache_utils import call_at_exit
+from core.metrics import metrics
+
+_MISSING = object()
+
 
 class MemoryManager:
-    def __init__(self, memory_dir="data/memory", memory_file="memory.json", context_file="context.json"):
+    def __init__(
+        self,
+        memory_dir="data/memory",
+        memory_file="memory.json",
+        context_file="context.json",
+        write_ahead_log=False,
+        compact_every=500,
+        flush_interval=0.0
+    ):
         self.memory_dir = memory_dir
         self.memory_file = os.path.join(memory_dir, memory_file)
         self.context_file = os.path.join(memory_dir, context_file)
+        # Context: every message is appended to the transcript once; a small pointer
+        # file records which transcript tail (plus pinned system messages) is live
+        self.transcript_file = os.path.join(memory_dir, "transcript.jsonl")
+        self.window_file = os.path.join(memory_dir, "context_window.json")
+        # Conversation trackers (themes, frequencies) saved when a session is suspended
+        self.session_state_file = os.path.join(memory_dir, "session_state.json")
+        # Log-structured mode: memory.json is a snapshot, updates are appended to the log
+        self.write_ahead_log = write_ahead_log
+        self.compact_every = compact_every
+        self.log_file = self.memory_file + ".log"
+        self._log_records = 0
+        # Group commit: writes within flush_interval seconds are coalesced into one.
+        # The interval is a minimum gap checked on each write, not a timer: after a burst the
+        # last writes stay pending until the next write, flush() or interpreter exit, so
+        # owners should flush() when a session goes idle or closes
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._last_flush = float("-inf")
+        self._transaction_depth = 0
+        self._undo = {}
+        # Callbacks told about committed entry writes (e.g. to keep a recall index in sync)
+        self._write_listeners = []
+        self._uncommitted_writes = {}
+        # Entity vectors: raw float32 rows (memory-mapped) + append-only key -> row index
+        self.vector_file = os.path.join(memory_dir, "entity_vectors.f32")
+        self.vector_index_file = os.path.join(memory_dir, "entity_vectors.jsonl")
         os.makedirs(memory_dir, exist_ok=True)
-        self.memory_data = self._load_json(self.memory_file)
-        self.context_data = self._load_json(self.context_file)
+        self._load_memory()
+        self._load_context()
+        self._load_vector_store()
+        if self.flush_interval > 0:
+            call_at_exit(self, "flush")
 
     # ----- Memory -----
     def set_memory_entry(self, key, value): # Refactored/Renamed
         """Sets a single key-value entry in memory_data."""
-        self.memory_data[key] = value
+        self.set_memory_entries({key: value})
+
+    def set_memory_entries(self, entries):
+        """Sets several entries with one timestamp and one write (group commit)."""
+        if not entries:
+            return
+        if self._transaction_depth:
+            for key in list(entries) + ["_last_updated"]:
+                if key not in self._undo:
+                    self._undo[key] = (self.memory_data.get(key, _MISSING), self._pending.get(key, _MISSING))
+
+        self.memory_data.update(entries)
         # Update timestamp for metadata
         self.memory_data["_last_updated"] = datetime.now().isoformat() 
-        self._save_json(self.memory_file, self.memory_data)
+        self._pending.update(entries)
+
+        self._notify_write(entries)
+        if not self._transaction_depth:
+            self._maybe_flush()
+
+    def add_write_listener(self, listener):
+        """
+        Call `listener(entries)` with each committed {key: value} write (once per transaction),
+        and `listener(None)` after clear_memory().
+        """
+        self._write_listeners.append(listener)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group every write inside the block into one commit.
+        If the block raises, its changes are rolled back and nothing is written.
+        """
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._transaction_depth == 1:
+                self._rollback()
+                self._uncommitted_writes = {}
+            raise
+        finally:
+            self._transaction_depth -= 1
+            if not self._transaction_depth:
+                self._undo = {}
+                self._maybe_flush()
+                self._notify_write({})
+
+    def flush(self):
+        """Write any pending changes now (one atomic snapshot, or one log record)."""
+        if not self._pending or self._transaction_depth:
+            return
+        if self.write_ahead_log:
+            pending, self._pending = self._pending, {}
+            self._append_log({"op": "batch", "entries": pending, "ts": self.memory_data.get("_last_updated")})
+        else:
+            self._pending = {}
+            self._save_json(self.memory_file, self.memory_data)
+        self._last_flush = time.monotonic()
 
     def get_memory_data(self, key=None): # Refactored/Renamed
         """Returns the full memory data or a specific key's value."""
@@ -27,7 +129,22 @@ class MemoryManager:
 
     def clear_memory(self):
         self.memory_data = {}
+        self._pending = {}
+        if self.write_ahead_log:
+            self.compact()
+        else:
+            self._save_json(self.memory_file, self.memory_data)
+        self.clear_entity_vectors()
+        self._notify_clear()
+
+    def compact(self):
+        """Fold the update log into a fresh memory.json snapshot and truncate the log."""
+        self._pending = {}
         self._save_json(self.memory_file, self.memory_data)
+        # Replaying the log over the new snapshot is idempotent, so a crash right here is safe
+        with open(self.log_file, "w", encoding="utf-8"):
+            pass
+        self._log_records = 0
         
     def get_memory_metadata(self): # New Method (Fixes summarize_all bug)
         """Returns metadata about the memory state."""
@@ -37,19 +154,307 @@ class MemoryManager:
             "last_updated": self.memory_data.get("_last_updated", "never"),
         }
 
+    # ----- Queries -----
+    def get_memory_keys(self):
+        """Keys of all entity entries (internal "_" keys excluded), in insertion order."""
+        return [k for k, v in self.memory_data.items() if isinstance(v, dict) and not k.startswith("_")]
+
+    def get_memory_scores(self):
+        """(key, score) for every entity entry, in insertion order."""
+        return [
+            (k, v.get("score", 0)) for k, v in self.memory_data.items()
+            if isinstance(v, dict) and not k.startswith("_")
+        ]
+
+    def get_top_entries(self, limit, above=None, below=None):
+        """
+        (key, score) pairs with score > above (highest first), or score < below (lowest first).
+        """
+        scored = self.get_memory_scores()
+        if above is not None:
+            scored = sorted((e for e in scored if e[1] > above), key=lambda e: e[1], reverse=True)
+        elif below is not None:
+            scored = sorted((e for e in scored if e[1] < below), key=lambda e: e[1])
+        return scored[:limit]
+
+    def get_entries_between(self, start, end):
+        """Entries whose ISO "timestamp" falls in [start, end), oldest first."""
+        entries = [
+            (k, v) for k, v in self.memory_data.items()
+            if isinstance(v, dict) and not k.startswith("_") and start <= v.get("timestamp", "") < end
+        ]
+        return sorted(entries, key=lambda e: e[1]["timestamp"])
+
+    # ----- Entity vectors -----
+    def has_entity_vector(self, key):
+        return key in self._vector_rows
+
+    def get_entity_vector(self, key):
+        """Returns the stored vector for an entity key (read-only view), or None."""
+        row = self._vector_rows.get(key)
+        if row is None:
+            return None
+        if self._vectors is None or row >= self._vectors.shape[0]:
+            self._map_vectors()
+        if self._vectors is None or row >= self._vectors.shape[0]:
+            return None
+        return self._vectors[row]
+
+    def set_entity_vector(self, key, vector):
+        """Appends an entity's vector to the store (or overwrites its row in place)."""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        if self._vector_dim and vector.shape[0] != self._vector_dim:
+            logging.warning(
+                f"Entity vector dim changed ({self._vector_dim} -> {vector.shape[0]}), resetting vector store"
+            )
+            self.clear_entity_vectors()
+
+        row = self._vector_rows.get(key)
+        if row is not None:
+            with open(self.vector_file, "r+b") as f:
+                f.seek(row * vector.nbytes)
+                f.write(vector.tobytes())
+            return
+
+        if not self._vector_dim:
+            self._vector_dim = vector.shape[0]
+            self._append_vector_index({"dim": self._vector_dim})
+        # Row number comes from the file itself so an unindexed row from a crash is skipped over
+        with open(self.vector_file, "ab") as f:
+            row = f.tell() // vector.nbytes
+            f.write(vector.tobytes())
+        self._append_vector_index({"key": key, "row": row})
+        self._vector_rows[key] = row
+
+    def clear_entity_vectors(self):
+        self._vectors = None
+        self._vector_rows = {}
+        self._vector_dim = None
+        for path in (self.vector_file, self.vector_index_file):
+            if os.path.exists(path):
+                os.remove(path)
+
     # ----- Context -----
     def save_context(self, context):
-        self.context_data = context
-        self._save_json(self.context_file, self.context_data)
+        """Persist `context` as the live window (written to the transcript as a new segment)."""
+        self._pinned = []
+        self._window = deque()
+        self.append_context(context, keep_last=len(context))
+
+    def append_context(self, new_messages, keep_last, pinned=None):
+        """
+        Append only `new_messages` to the transcript, then point the live window at
+        `pinned` + the last `keep_last` transcript messages. I/O is O(new messages).
+        """
+        if pinned is not None:
+            self._pinned = list(pinned)
+        if new_messages:
+            with open(self.transcript_file, "ab") as f:
+                offset = f.tell()
+                for message in new_messages:
+                    line = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+                    f.write(line)
+                    self._window.append((offset, message))
+                    offset += len(line)
+        while len(self._window) > keep_last:
+            self._window.popleft()
+        self._save_window_pointer()
 
     def load_context(self):
         return self.context_data or []
 
-    def clear_context(self):
-        self.context_data = []
-        self._save_json(self.context_file, self.context_data)
+    def load_transcript(self):
+        """Every message ever appended, including ones pruned from the live window."""
+        messages = []
+        if os.path.exists(self.transcript_file):
+            with open(self.transcript_file, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        continue  # torn final append
+                    try:
+                        messages.append(json.loads(line))
+                    except ValueError:
+                        logging.warning(f"Skipping unreadable message in {self.transcript_file}")
+        return messages
+
+    def clear_context(self, keep_history=True):
+        """Empty the live window; the transcript is kept unless keep_history is False."""
+        self._pinned = []
+        self._window = deque()
+        if not keep_history and os.path.exists(self.transcript_file):
+            os.remove(self.transcript_file)
+        self._save_window_pointer()
+
+    # ----- Session state -----
+    def save_session_state(self, state):
+        self._save_json(self.session_state_file, state)
+
+    def load_session_state(self):
+        return self._load_json(self.session_state_file) or {}
+
+    # ----- Storage -----
+    def _load_memory(self):
+        self.memory_data = self._load_json(self.memory_file)
+        if self.write_ahead_log:
+            self._replay_log()
+
+    # ----- Commit helpers -----
+    def _maybe_flush(self):
+        if self.flush_interval <= 0 or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _notify_write(self, entries):
+        """Hand `entries` to the listeners now, or once the enclosing transaction commits."""
+        self._uncommitted_writes.update(entries)
+        if self._transaction_depth or not self._uncommitted_writes:
+            return
+        writes, self._uncommitted_writes = self._uncommitted_writes, {}
+        for listener in self._write_listeners:
+            listener(writes)
+
+    def _notify_clear(self):
+        self._uncommitted_writes = {}
+        for listener in self._write_listeners:
+            listener(None)
+
+    def _rollback(self):
+        for key, (value, pending) in self._undo.items():
+            if value is _MISSING:
+                self.memory_data.pop(key, None)
+            else:
+                self.memory_data[key] = value
+            if pending is _MISSING:
+                self._pending.pop(key, None)
+            else:
+                self._pending[key] = pending
+
+    # ----- Write-ahead log helpers -----
+    def _append_log(self, record):
+        with open(self.log_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._log_records += 1
+        if self._log_records >= self.compact_every:
+            self.compact()
+
+    def _replay_log(self):
+        """Apply logged updates on top of the snapshot; a torn last line from a crash is skipped."""
+        if not os.path.exists(self.log_file):
+            return
+        valid_bytes = 0
+        with open(self.log_file, "rb") as f:
+            for raw_line in f:
+                if not raw_line.endswith(b"\n"):
+                    break  # torn final append
+                valid_bytes += len(raw_line)
+                try:
+                    record = json.loads(raw_line.decode("utf-8"))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    logging.warning(f"Skipping unreadable record in {self.log_file}")
+                    continue
+                if record.get("op") == "set":
+                    self.memory_data[record["key"]] = record["value"]
+                elif record.get("op") == "batch":
+                    self.memory_data.update(record["entries"])
+                else:
+                    continue
+                self.memory_data["_last_updated"] = record.get("ts", self.memory_data.get("_last_updated"))
+                self._log_records += 1
+        # Drop a torn tail so the next append starts on a fresh line
+        if valid_bytes != os.path.getsize(self.log_file):
+            with open(self.log_file, "r+b") as f:
+                f.truncate(valid_bytes)
+        if self._log_records >= self.compact_every:
+            self.compact()
+
+    # ----- Context helpers -----
+    def _load_context(self):
+        self._pinned = []
+        self._window = deque()
+        pointer = self._load_json(self.window_file) if os.path.exists(self.window_file) else None
+
+        if isinstance(pointer, dict):
+            self._pinned = pointer.get("pinned", [])
+            if pointer.get("count") and os.path.exists(self.transcript_file):
+                try:
+                    with open(self.transcript_file, "rb") as f:
+                        f.seek(pointer["offset"])
+                        for _ in range(pointer["count"]):
+                            offset = f.tell()
+                            line = f.readline()
+                            if not line.endswith(b"\n"):
+                                break  # torn final append
+                            self._window.append((offset, json.loads(line)))
+                except ValueError as e:
+                    # A corrupt line or an offset landing mid-line: start with an empty window
+                    # (the transcript itself is kept), like a corrupt context.json used to load as empty
+                    logging.warning(f"Live context window in {self.transcript_file} unreadable, starting empty: {e}")
+                    self._window = deque()
+            self.context_data = self._pinned + [m for _, m in self._window]
+            return
+
+        # Migrate a legacy context.json (full window rewritten every turn)
+        legacy = self._load_json(self.context_file)
+        if isinstance(legacy, list) and legacy:
+            self.save_context(legacy)
+        else:
+            self.context_data = []
+
+    def _save_window_pointer(self):
+        self.context_data = self._pinned + [m for _, m in self._window]
+        end = os.path.getsize(self.transcript_file) if os.path.exists(self.transcript_file) else 0
+        self._save_json(self.window_file, {
+            "pinned": self._pinned,
+            "offset": self._window[0][0] if self._window else end,
+            "count": len(self._window)
+        })
+
+    # ----- Vector store helpers -----
+    def _load_vector_store(self):
+        self._vectors = None
+        self._vector_rows = {}
+        self._vector_dim = None
+        if not os.path.exists(self.vector_index_file):
+            return
+        try:
+            with open(self.vector_index_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if "dim" in record:
+                        self._vector_dim = record["dim"]
+                    else:
+                        self._vector_rows[record["key"]] = record["row"]
+        except (json.JSONDecodeError, KeyError, IOError) as e:
+            logging.warning(f"Entity vector index unreadable, rebuilding on demand: {e}")
+            self.clear_entity_vectors()
+            return
+        self._map_vectors()
+
+    def _map_vectors(self):
+        """(Re)open the vector file read-only; rows past a torn final write are dropped."""
+        self._vectors = None
+        if not self._vector_dim or not os.path.exists(self.vector_file):
+            return
+        row_bytes = 4 * self._vector_dim
+        size = os.path.getsize(self.vector_file)
+        if size % row_bytes:
+            with open(self.vector_file, "r+b") as f:
+                f.truncate(size - size % row_bytes)
+        rows_on_disk = size // row_bytes
+        if rows_on_disk == 0:
+            return
+        self._vectors = np.memmap(
+            self.vector_file, dtype=np.float32, mode="r", shape=(rows_on_disk, self._vector_dim)
+        )
+        self._vector_rows = {k: r for k, r in self._vector_rows.items() if r < rows_on_disk}
+
+    def _append_vector_index(self, record):
+        with open(self.vector_index_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
 
     # ----- JSON helpers -----
+    @metrics.timed("memory.load_json")
     def _load_json(self, path):
         if not os.path.exists(path):
             return {} if "memory" in path else []
@@ -59,7 +464,11 @@ class MemoryManager:
         except (json.JSONDecodeError, IOError):
             return {} if "memory" in path else []
 
+    @metrics.timed("memory.save_json")
     def _save_json(self, path, data):
+        """Write to a temp file and rename over the target so readers never see a partial file."""
         os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
\ No newline at end of file
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, path)
\ No newline at end of file
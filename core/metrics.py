@@ -0,0 +1,146 @@
+import functools
+import json
+import os
+import time
+import threading
+from collections import deque
+from datetime import datetime
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path="./data/config.env")
+
+
+class RollingHistogram:
+    """The last `window` samples of one stage, plus lifetime count and max."""
+
+    def __init__(self, window=1024):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def summary(self):
+        """Percentiles over the rolling window, in milliseconds."""
+        p50, p95, p99 = np.percentile(np.fromiter(self.samples, dtype=np.float64), [50, 95, 99]) * 1000
+        return {
+            "count": self.count,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": self.max * 1000,
+        }
+
+
+class _NullTimer:
+    """Shared no-op timer handed out while metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class StageMetrics:
+    """
+    Wall-time histograms per named stage. `with metrics.time("recall"): ...` records one sample;
+    while disabled it returns a shared no-op context, so instrumented code pays ~a method call.
+    With a `dump_file`, maybe_dump() appends a JSON-lines snapshot every `dump_interval` seconds.
+    """
+
+    def __init__(self, enabled=True, window=1024, dump_file=None, dump_interval=60.0):
+        self.enabled = enabled
+        self.window = window
+        self.dump_file = dump_file
+        self.dump_interval = dump_interval
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._last_dump = time.monotonic()
+
+    def configure(self, enabled=None, dump_file=None, dump_interval=None):
+        if enabled is not None:
+            self.enabled = enabled
+        if dump_file is not None:
+            self.dump_file = dump_file
+        if dump_interval is not None:
+            self.dump_interval = dump_interval
+
+    def time(self, stage):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage)
+
+    def timed(self, stage):
+        """Decorator form of time()."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = RollingHistogram(self.window)
+            histogram.add(seconds)
+
+    def summary(self):
+        with self._lock:
+            return {stage: h.summary() for stage, h in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+    # ----- JSON-lines dumps -----
+    def dump(self):
+        """Append one snapshot line to `dump_file`."""
+        if not self.dump_file:
+            return
+        snapshot = {"timestamp": datetime.now().isoformat(), "stages": self.summary()}
+        os.makedirs(os.path.dirname(self.dump_file) or ".", exist_ok=True)
+        with open(self.dump_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot) + "\n")
+        self._last_dump = time.monotonic()
+
+    def maybe_dump(self):
+        if self.enabled and self.dump_file and time.monotonic() - self._last_dump >= self.dump_interval:
+            self.dump()
+
+
+# Process-wide instance shared by every manager (like the shared spaCy model)
+metrics = StageMetrics(
+    enabled=os.getenv("STAGE_METRICS", "1") != "0",
+    dump_file=os.getenv("STAGE_METRICS_FILE") or None,
+    dump_interval=float(os.getenv("STAGE_METRICS_INTERVAL", 60))
+)
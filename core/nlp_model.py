@@ -0,0 +1,46 @@
+import logging
+import threading
+
+MODEL_NAME = "en_core_web_md"
+
+# Only NER and tagger + attribute_ruler (which map tags to token.pos_) are used;
+# tok2vec feeds them. Everything else is skipped at load time.
+EXCLUDED_COMPONENTS = ["parser", "lemmatizer", "senter"]
+
+_nlp = None
+_lock = threading.Lock()
+
+
+def get_nlp():
+    """Returns the shared spaCy pipeline, loading it on first use."""
+    global _nlp
+    if _nlp is None:
+        with _lock:
+            if _nlp is None:
+                _nlp = load_model()
+    return _nlp
+
+
+def load_model(name=MODEL_NAME, exclude=EXCLUDED_COMPONENTS):
+    """Load the trimmed pipeline, downloading the model on first run if needed."""
+    import spacy
+
+    try:
+        return spacy.load(name, exclude=exclude)
+    except OSError:
+        print(f"Downloading {name} model. This may take a moment.")
+        import spacy.cli
+        spacy.cli.download(name)
+        return spacy.load(name, exclude=exclude)
+
+
+def is_loaded():
+    return _nlp is not None
+
+
+def reset():
+    """Drop the cached pipeline (mainly for tests and benchmarks)."""
+    global _nlp
+    with _lock:
+        _nlp = None
+    logging.debug("spaCy pipeline unloaded")
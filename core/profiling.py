@@ -0,0 +1,136 @@
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path="./data/config.env")
+
+# Frames that only describe the tracer itself
+_TRACE_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+]
+
+
+class TurnProfiler:
+    """
+    Opt-in cProfile + tracemalloc capture for selected turns.
+
+    Every `every`-th turn wrapped in turn() is profiled and written to a per-run directory:
+        turn_00005.prof         pstats file (python -m pstats, snakeviz, `flameprof turn_00005.prof > flame.svg`)
+        turn_00005.tracemalloc  tracemalloc.Snapshot.load()-able allocation snapshot
+        turn_00005_alloc.txt    top allocation sites and growth since the previous profiled turn
+        profiles.jsonl          one line per profiled turn (wall time, calls, traced memory)
+    tracemalloc runs from the second turn until disable(), so snapshot diffs show growth between
+    turns without tracing the one-time model load in the first turn (which tracing slows ~100x).
+    """
+
+    def __init__(self, output_dir="data/profiles", every=1, trace_memory=True, enabled=False, top_n=25, trace_frames=8):
+        self.output_dir = output_dir
+        self.every = max(1, every)
+        self.trace_memory = trace_memory
+        self.top_n = top_n
+        self.trace_frames = trace_frames
+        self.enabled = False
+        self.active = False
+        self.turns = 0
+        self.run_dir = None
+        self._started_tracemalloc = False
+        self._previous_snapshot = None
+        if enabled:
+            self.enable()
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """PROFILE_TURNS=N profiles every Nth turn (0/unset = off); PROFILE_DIR, PROFILE_MEMORY=0."""
+        every = int(os.getenv("PROFILE_TURNS", 0) or 0)
+        kwargs.setdefault("output_dir", os.getenv("PROFILE_DIR", "data/profiles"))
+        kwargs.setdefault("trace_memory", os.getenv("PROFILE_MEMORY", "1") != "0")
+        return cls(every=every or 1, enabled=every > 0, **kwargs)
+
+    def enable(self, every=None):
+        if every is not None:
+            self.every = max(1, every)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        self._previous_snapshot = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def turn(self, label=""):
+        """Context for one turn: profiles it if enabled and selected, else a no-op."""
+        self.turns += 1
+        if not self.enabled or self.active:
+            return nullcontext()
+        if self.trace_memory and self.turns > 1 and not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+            self._started_tracemalloc = True
+        if self.turns % self.every:
+            return nullcontext()
+        return self._capture(self.turns, label)
+
+    @contextmanager
+    def _capture(self, turn, label):
+        profile = cProfile.Profile()
+        self.active = True
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            wall_s = time.perf_counter() - start
+            self.active = False
+            self._dump(turn, label, profile, wall_s)
+
+    # ----- Dumps -----
+    def _dump(self, turn, label, profile, wall_s):
+        if self.run_dir is None:
+            self.run_dir = os.path.join(self.output_dir, datetime.now().strftime("%Y%m%d-%H%M%S"))
+            os.makedirs(self.run_dir, exist_ok=True)
+        base = os.path.join(self.run_dir, f"turn_{turn:05d}")
+
+        profile.dump_stats(base + ".prof")
+        stats = pstats.Stats(profile)
+        entry = {
+            "turn": turn,
+            "label": label[:80],
+            "timestamp": datetime.now().isoformat(),
+            "wall_s": wall_s,
+            "calls": stats.total_calls,
+            "profile": base + ".prof",
+        }
+
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+            snapshot.dump(base + ".tracemalloc")
+            self._write_allocation_report(base + "_alloc.txt", turn, snapshot)
+            self._previous_snapshot = snapshot
+            entry.update({
+                "traced_current_bytes": current,
+                "traced_peak_bytes": peak,
+                "snapshot": base + ".tracemalloc",
+            })
+            tracemalloc.reset_peak()
+
+        with open(os.path.join(self.run_dir, "profiles.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def _write_allocation_report(self, path, turn, snapshot):
+        lines = [f"Turn {turn}: top {self.top_n} allocation sites"]
+        lines += [f"  {stat}" for stat in snapshot.statistics("lineno")[:self.top_n]]
+        if self._previous_snapshot is not None:
+            lines += ["", f"Growth since the previous profiled turn (top {self.top_n})"]
+            lines += [f"  {stat}" for stat in snapshot.compare_to(self._previous_snapshot, "lineno")[:self.top_n]]
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
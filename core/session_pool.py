@@ -0,0 +1,200 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from core.conversation_manager import ConversationManager
+
+# Session ids become directory names, so keep them to a safe alphabet
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class Session:
+    """One live conversation: its manager, a lock serializing its turns, and last-use time."""
+
+    def __init__(self, session_id, chat):
+        self.session_id = session_id
+        self.chat = chat
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.evicted = False
+
+
+class SessionPool:
+    """
+    Per-session ConversationManagers, each with its own memory directory under `root_dir`.
+    Every session shares the process-wide spaCy model (core.nlp_model.get_nlp).
+    Idle sessions are saved to disk and dropped from RAM, and at most `max_concurrent_turns`
+    turns run at once across all sessions.
+    """
+
+    def __init__(
+        self,
+        system_prompt="",
+        root_dir="data/sessions",
+        max_concurrent_turns=4,
+        queue_timeout=30.0,
+        idle_timeout=600.0,
+        max_sessions=256,
+        **manager_kwargs
+    ):
+        self.system_prompt = system_prompt
+        self.root_dir = root_dir
+        self.queue_timeout = queue_timeout
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.manager_kwargs = manager_kwargs
+
+        self._sessions = OrderedDict()  # LRU order: least recently used first
+        self._opening = {}  # session_id -> Event set once its open (done outside _lock) finishes
+        self._lock = threading.Lock()
+        self._turn_slots = threading.BoundedSemaphore(max_concurrent_turns)
+        self.stats = {"created": 0, "resumed": 0, "evicted": 0, "turns": 0, "rejected": 0}
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    # ----- Sessions -----
+    def get(self, session_id):
+        """The live session for `session_id`, resuming it from disk or creating it as needed."""
+        if not SESSION_ID_PATTERN.match(session_id or ""):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+
+        while True:
+            with self._lock:
+                session = self._sessions.get(session_id)
+                if session is not None:
+                    self._sessions.move_to_end(session_id)
+                    session.last_used = time.monotonic()
+                    overflow = len(self._sessions) - self.max_sessions
+                    break
+                opening = self._opening.get(session_id)
+                if opening is None:
+                    opening = self._opening[session_id] = threading.Event()
+                    opener = True
+                else:
+                    opener = False
+            if opener:
+                self._open(session_id, opening)
+            else:
+                # Another thread is loading this session; take its result (or retry if it failed)
+                opening.wait()
+
+        if overflow > 0:
+            self._evict_least_recent(overflow, keep=session_id)
+        return session
+
+    def chat(self, session_id, user_input):
+        """
+        Run one turn. Raises TimeoutError if no turn slot frees up within `queue_timeout`.
+        Turns of the same session are serialized.
+        """
+        if not self._turn_slots.acquire(timeout=self.queue_timeout):
+            self._count("rejected")
+            raise TimeoutError(f"All turn slots busy for {self.queue_timeout}s")
+        try:
+            while True:
+                session = self.get(session_id)
+                with session.lock:
+                    # Evicted between lookup and lock: reopen from disk and retry
+                    if session.evicted:
+                        continue
+                    reply = session.chat.chat(user_input)
+                    session.last_used = time.monotonic()
+                    self._count("turns")
+                    return reply
+        finally:
+            self._turn_slots.release()
+
+    # ----- Eviction -----
+    def evict(self, session_id):
+        """Save a session to disk and drop it from RAM. Waits for its in-flight turn."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            return False
+        with session.lock:
+            return self._evict_locked(session)
+
+    def evict_idle(self):
+        """Evict sessions unused for `idle_timeout` seconds; busy sessions are skipped."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [s for s in self._sessions.values() if s.last_used < cutoff]
+        return sum(self._try_evict(session) for session in idle)
+
+    def close(self):
+        """Save every live session (e.g. on shutdown)."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            with session.lock:
+                self._evict_locked(session)
+
+    def _evict_least_recent(self, count, keep=None):
+        with self._lock:
+            candidates = [s for s in self._sessions.values() if s.session_id != keep]
+        evicted = 0
+        for session in candidates:
+            if evicted >= count:
+                break
+            evicted += self._try_evict(session)
+
+    def _try_evict(self, session):
+        if not session.lock.acquire(blocking=False):
+            return False
+        try:
+            return self._evict_locked(session)
+        finally:
+            session.lock.release()
+
+    def _evict_locked(self, session):
+        if session.evicted:
+            return False
+        try:
+            session.chat.save_session_state()
+            session.chat.close()
+        except Exception as e:
+            # Keep it in RAM rather than lose state that could not be written
+            logging.error(f"Could not save session '{session.session_id}': {e}")
+            return False
+        session.evicted = True
+        with self._lock:
+            if self._sessions.get(session.session_id) is session:
+                del self._sessions[session.session_id]
+        self._count("evicted")
+        logging.debug(f"Session '{session.session_id}' evicted to disk")
+        return True
+
+    def _open(self, session_id, opening):
+        """
+        Load or create a session without holding the pool lock (memory load and state restore
+        can be slow), then publish it and wake any thread waiting on `opening`.
+        """
+        session = None
+        try:
+            memory_dir = os.path.join(self.root_dir, session_id)
+            resumed = os.path.isdir(memory_dir)
+            chat = ConversationManager(
+                system_prompt=self.system_prompt,
+                memory_dir=memory_dir,
+                **self.manager_kwargs
+            )
+            if resumed:
+                chat.restore_session_state()
+            session = Session(session_id, chat)
+        finally:
+            with self._lock:
+                del self._opening[session_id]
+                if session is not None:
+                    self._sessions[session_id] = session
+                    self.stats["resumed" if resumed else "created"] += 1
+            opening.set()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
@@ -0,0 +1,221 @@
+import argparse
+import json
+import os
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from core.memory_manager import MemoryManager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    type TEXT,
+    score REAL,
+    timestamp TEXT,
+    is_object INTEGER NOT NULL DEFAULT 1,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_score ON entries(score);
+CREATE INDEX IF NOT EXISTS idx_entries_type ON entries(type);
+CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries(timestamp);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Constant SQL strings so sqlite3's statement cache reuses the compiled statements
+UPSERT_ENTRY = (
+    "INSERT OR REPLACE INTO entries (key, type, score, timestamp, is_object, value) VALUES (?, ?, ?, ?, ?, ?)"
+)
+UPSERT_META = "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)"
+SELECT_ENTRY = "SELECT value FROM entries WHERE key = ?"
+SELECT_META = "SELECT value FROM meta WHERE key = ?"
+SELECT_KEYS = "SELECT key FROM entries WHERE is_object = 1 ORDER BY rowid"
+SELECT_SCORES = "SELECT key, score FROM entries WHERE is_object = 1 ORDER BY rowid"
+COUNT_ENTRIES = "SELECT COUNT(*) FROM entries"
+TOP_LIKES = "SELECT key, score FROM entries WHERE score > ? ORDER BY score DESC LIMIT ?"
+TOP_DISLIKES = "SELECT key, score FROM entries WHERE score < ? ORDER BY score ASC LIMIT ?"
+TIME_RANGE = "SELECT key, value FROM entries WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp"
+BY_TYPE = "SELECT key, value FROM entries WHERE type = ?"
+
+
+class SQLiteMemoryManager(MemoryManager):
+    """
+    MemoryManager with entity memory in SQLite (WAL mode) instead of memory.json.
+    Entries are not held in RAM; counts, top likes/dislikes and time ranges are index lookups.
+    Context and entity vectors keep using the file-based storage of MemoryManager.
+    """
+
+    def __init__(self, memory_dir="data/memory", db_file="memory.db", migrate_json=True, **kwargs):
+        self.db_file = os.path.join(memory_dir, db_file)
+        self.migrate_json = migrate_json
+        super().__init__(memory_dir=memory_dir, **kwargs)
+
+    # ----- Memory -----
+    def set_memory_entries(self, entries):
+        """Upserts several entries with one timestamp in a single SQLite transaction."""
+        if not entries:
+            return
+        last_updated = datetime.now().isoformat()
+        with self._write() as conn:
+            self._upsert(conn, entries)
+            conn.execute(UPSERT_META, ("_last_updated", json.dumps(last_updated)))
+        self._notify_write(entries)
+
+    @contextmanager
+    def transaction(self):
+        """Group writes into one SQLite transaction; rolled back if the block raises."""
+        try:
+            with self._write():
+                self._transaction_depth += 1
+                try:
+                    yield self
+                finally:
+                    self._transaction_depth -= 1
+        except BaseException:
+            if not self._transaction_depth:
+                self._uncommitted_writes = {}
+            raise
+        # Write listeners hear about the block once it has committed
+        self._notify_write({})
+
+    def flush(self):
+        """Writes are committed per batch/transaction, so there is nothing to flush."""
+
+    def get_memory_data(self, key=None):
+        """Returns one entry's value, or (full scan) a dict of every entry and metadata key."""
+        with self._lock:
+            if key:
+                table_query = SELECT_META if key.startswith("_") else SELECT_ENTRY
+                row = self._conn.execute(table_query, (key,)).fetchone()
+                return json.loads(row[0]) if row else None
+            data = {k: json.loads(v) for k, v in self._conn.execute("SELECT key, value FROM entries ORDER BY rowid")}
+            data.update({k: json.loads(v) for k, v in self._conn.execute("SELECT key, value FROM meta")})
+            return data
+
+    def clear_memory(self):
+        with self._write() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM meta")
+        self.clear_entity_vectors()
+        self._notify_clear()
+
+    def compact(self):
+        """Checkpoint the SQLite WAL back into the main database file."""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def get_memory_metadata(self):
+        with self._lock:
+            total = self._conn.execute(COUNT_ENTRIES).fetchone()[0]
+        return {
+            "total_entries": total,
+            "last_updated": self.get_memory_data("_last_updated") or "never",
+        }
+
+    # ----- Queries -----
+    def get_memory_keys(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute(SELECT_KEYS)]
+
+    def get_memory_scores(self):
+        with self._lock:
+            return [(key, score or 0) for key, score in self._conn.execute(SELECT_SCORES)]
+
+    def get_top_entries(self, limit, above=None, below=None):
+        with self._lock:
+            if above is not None:
+                return self._conn.execute(TOP_LIKES, (above, limit)).fetchall()
+            if below is not None:
+                return self._conn.execute(TOP_DISLIKES, (below, limit)).fetchall()
+            return self._conn.execute(
+                "SELECT key, score FROM entries ORDER BY rowid LIMIT ?", (limit,)
+            ).fetchall()
+
+    def get_entries_between(self, start, end):
+        with self._lock:
+            return [(k, json.loads(v)) for k, v in self._conn.execute(TIME_RANGE, (start, end))]
+
+    def get_entries_by_type(self, entry_type):
+        with self._lock:
+            return [(k, json.loads(v)) for k, v in self._conn.execute(BY_TYPE, (entry_type,))]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ----- Migration -----
+    def import_json(self, memory_file=None):
+        """Copy entries from a memory.json snapshot (and its write-ahead log, if any)."""
+        memory_file = memory_file or self.memory_file
+        source = MemoryManager(
+            memory_dir=os.path.dirname(memory_file) or ".",
+            memory_file=os.path.basename(memory_file),
+            write_ahead_log=os.path.exists(memory_file + ".log")
+        )
+        data = source.get_memory_data()
+        with self._write() as conn:
+            self._upsert(conn, data)
+        return sum(1 for k in data if not k.startswith("_"))
+
+    # ----- Storage -----
+    def _load_memory(self):
+        # memory_data is not kept in RAM for this backend
+        self.memory_data = None
+        self._lock = threading.RLock()
+        is_new = not os.path.exists(self.db_file)
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False, cached_statements=256)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        if is_new and self.migrate_json and os.path.exists(self.memory_file):
+            migrated = self.import_json()
+            logging.info(f"Migrated {migrated} memory entries from {self.memory_file} to {self.db_file}")
+
+    @contextmanager
+    def _write(self):
+        # The connection context manager commits on success and rolls back on error;
+        # inside an open transaction() the outermost block decides instead
+        with self._lock:
+            if self._transaction_depth:
+                yield self._conn
+            else:
+                with self._conn:
+                    yield self._conn
+
+    def _upsert(self, conn, entries):
+        rows = []
+        for key, value in entries.items():
+            if key.startswith("_"):
+                conn.execute(UPSERT_META, (key, json.dumps(value, ensure_ascii=False)))
+                continue
+            fields = value if isinstance(value, dict) else {}
+            score = fields.get("score")
+            rows.append((
+                key,
+                fields.get("type"),
+                score if isinstance(score, (int, float)) else None,
+                fields.get("timestamp"),
+                int(isinstance(value, dict)),
+                json.dumps(value, ensure_ascii=False)
+            ))
+        conn.executemany(UPSERT_ENTRY, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate memory.json into the SQLite memory store.")
+    parser.add_argument("--memory-dir", default="data/memory")
+    args = parser.parse_args()
+
+    store = SQLiteMemoryManager(memory_dir=args.memory_dir, migrate_json=False)
+    migrated = store.import_json()
+    store.close()
+    print(f"Migrated {migrated} entries into {store.db_file}")
+
+
+if __name__ == "__main__":
+    main()
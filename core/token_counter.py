@@ -0,0 +1,54 @@
+import math
+import re
+import threading
+from collections import OrderedDict
+
+# Chat templates wrap every message in role/turn markers
+TOKENS_PER_MESSAGE = 4
+
+# Words, numbers and single punctuation marks
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def approximate_token_count(text):
+    """
+    Tokenizer-free estimate for BPE models: about one token per word or punctuation mark,
+    and never fewer than one per 4 characters (long or non-English words split into pieces).
+    """
+    if not text:
+        return 0
+    return max(len(WORD_PATTERN.findall(text)), math.ceil(len(text) / 4))
+
+
+class TokenCounter:
+    """
+    Counts prompt tokens with a pluggable `count_fn(text) -> int` and caches each text's count,
+    so history messages are only tokenized once. Plug in the model's real tokenizer when available,
+    e.g. TokenCounter(lambda text: len(encoding.encode(text))).
+    """
+
+    def __init__(self, count_fn=None, cache_size=4096, tokens_per_message=TOKENS_PER_MESSAGE):
+        self.count_fn = count_fn or approximate_token_count
+        self.cache_size = cache_size
+        self.tokens_per_message = tokens_per_message
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count_text(self, text):
+        with self._lock:
+            count = self._cache.get(text)
+            if count is not None:
+                self._cache.move_to_end(text)
+                return count
+        count = self.count_fn(text)
+        with self._lock:
+            self._cache[text] = count
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return count
+
+    def count_message(self, message):
+        return self.tokens_per_message + self.count_text(message.get("content") or "")
+
+    def count_messages(self, messages):
+        return sum(self.count_message(m) for m in messages)
@@ -0,0 +1,150 @@
+import numpy as np
+
+
+class EntityVectorIndex:
+    """
+    Contiguous float32 embedding matrix for memory recall.
+    One row per entity key, pre-normalized so cosine similarity is a single dot product.
+    Sentiment score and mention frequency are kept alongside each row for vectorized weighting.
+    """
+
+    def __init__(self, dim=0, initial_capacity=64):
+        self.dim = dim
+        self.keys = []
+        self.rows = {}
+        self._capacity = initial_capacity
+        self._vectors = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self._valid = np.zeros(initial_capacity, dtype=bool)
+        self._scores = np.zeros(initial_capacity, dtype=np.float32)
+        self._frequencies = np.zeros(initial_capacity, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    # ----- Views -----
+    @property
+    def vectors(self):
+        return self._vectors[:len(self.keys)]
+
+    @property
+    def valid(self):
+        return self._valid[:len(self.keys)]
+
+    @property
+    def scores(self):
+        return self._scores[:len(self.keys)]
+
+    @property
+    def frequencies(self):
+        return self._frequencies[:len(self.keys)]
+
+    # ----- Updates -----
+    def upsert(self, key, vector, score=0.0, frequency=0):
+        """Insert or replace the row for a key. Zero-norm vectors are kept but marked invalid."""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        if not self.dim:
+            self._resize(self._capacity, dim=vector.shape[0])
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"Vector for '{key}' has dim {vector.shape[0]}, expected {self.dim}")
+
+        row = self.rows.get(key)
+        if row is None:
+            if len(self.keys) == self._capacity:
+                self._resize(self._capacity * 2)
+            row = len(self.keys)
+            self.keys.append(key)
+            self.rows[key] = row
+
+        norm = float(np.linalg.norm(vector))
+        if norm > 0 and np.isfinite(norm):
+            self._vectors[row] = vector / norm
+            self._valid[row] = True
+        else:
+            self._vectors[row] = 0.0
+            self._valid[row] = False
+        self._scores[row] = score
+        self._frequencies[row] = frequency
+        return row
+
+    def set_frequency(self, key, frequency):
+        self._frequencies[self.rows[key]] = frequency
+
+    def remove(self, key):
+        """Remove a key by moving the last row into its slot, keeping the matrix contiguous."""
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        last = len(self.keys) - 1
+        if row != last:
+            moved_key = self.keys[last]
+            self.keys[row] = moved_key
+            self.rows[moved_key] = row
+            for arr in (self._vectors, self._valid, self._scores, self._frequencies):
+                arr[row] = arr[last]
+        self.keys.pop()
+
+    def clear(self):
+        self.keys = []
+        self.rows = {}
+        self._valid[:] = False
+
+    # ----- Queries -----
+    def weighted_top_k(self, query_vector, threshold, k, rows=None):
+        """
+        Score rows with the recall weighting and return the best k as
+        (key, weighted_score, similarity, frequency) tuples, highest first.
+        weighted = similarity * (1 + |score|) * (1 + 0.1 * frequency)
+        Pass `rows` (e.g. ANN candidates) to score only that subset.
+        """
+        if not len(self.keys) or k <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(query))
+        if norm == 0:
+            return []
+        query = query / norm
+
+        if rows is None:
+            rows = np.arange(len(self.keys))
+            similarity = self.vectors @ query
+        else:
+            rows = np.asarray(rows, dtype=np.intp)
+            if not rows.size:
+                return []
+            similarity = self._vectors[rows] @ query
+        weighted = similarity * (1 + np.abs(self._scores[rows])) * (1 + self._frequencies[rows] * 0.1)
+
+        mask = self._valid[rows] & ((similarity >= threshold) | (weighted > threshold))
+        candidates = np.flatnonzero(mask)
+        if candidates.size > k:
+            # Keep every row tied with the k-th score so the cut-off below is decided by row id
+            kth = np.partition(-weighted[candidates], k - 1)[k - 1]
+            candidates = candidates[-weighted[candidates] <= kth]
+        # Highest weight first; ties go to the lower row id, which is insertion order
+        # until remove() moves the last row into a freed slot
+        candidates = candidates[np.lexsort((rows[candidates], -weighted[candidates]))][:k]
+
+        return [
+            (self.keys[rows[i]], float(weighted[i]), float(similarity[i]), int(self._frequencies[rows[i]]))
+            for i in candidates
+        ]
+
+    # ----- Internal -----
+    def _resize(self, capacity, dim=None):
+        dim = self.dim if dim is None else dim
+        size = len(self.keys)
+        vectors = np.zeros((capacity, dim), dtype=np.float32)
+        if dim == self.dim:
+            vectors[:size] = self._vectors[:size]
+        self._vectors = vectors
+        self.dim = dim
+        for name in ("_valid", "_scores", "_frequencies"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:size] = old[:size]
+            setattr(self, name, new)
+        self._capacity = capacity
@@ -0,0 +1,118 @@
+"""
+Compact word-vector table extracted from a spaCy model.
+
+Recall only needs static word vectors for short texts, so a process that only does recall
+can average vectors from this memory-mapped table instead of loading the full pipeline.
+
+Build once from the repository root:
+    python -m core.vector_table --out data/vectors [--float16]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import numpy as np
+
+# Close to spaCy's tokenizer for short entity keys: words, numbers and single punctuation marks
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def word_hash(word):
+    """Stable 64-bit hash used as the lookup key (independent of spaCy's string store)."""
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class VectorTable:
+    """Read-only, memory-mapped word vectors with a sorted hash -> row lookup."""
+
+    def __init__(self, table_dir="data/vectors"):
+        self.table_dir = table_dir
+        with open(os.path.join(table_dir, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.vectors = np.load(os.path.join(table_dir, "vectors.npy"), mmap_mode="r")
+        self._hashes = np.load(os.path.join(table_dir, "hashes.npy"), mmap_mode="r")
+        self._rows = np.load(os.path.join(table_dir, "rows.npy"), mmap_mode="r")
+        self.dim = self.vectors.shape[1]
+
+    @staticmethod
+    def exists(table_dir):
+        return all(
+            os.path.exists(os.path.join(table_dir, name))
+            for name in ("meta.json", "vectors.npy", "hashes.npy", "rows.npy")
+        )
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def word_vector(self, word):
+        """Vector for an exact token string, or None if it is out of vocabulary."""
+        h = np.uint64(word_hash(word))
+        pos = int(np.searchsorted(self._hashes, h))
+        if pos < len(self._hashes) and self._hashes[pos] == h:
+            return self.vectors[self._rows[pos]]
+        return None
+
+    def text_vector(self, text):
+        """
+        Average of token vectors, counting out-of-vocabulary tokens as zeros
+        (the same way spaCy's Doc.vector averages).
+        """
+        tokens = TOKEN_PATTERN.findall(text)
+        total = np.zeros(self.dim, dtype=np.float32)
+        if not tokens:
+            return total
+        for token in tokens:
+            vector = self.word_vector(token)
+            if vector is not None:
+                total += vector
+        return total / len(tokens)
+
+
+def build_vector_table(nlp, out_dir="data/vectors", dtype="float32"):
+    """Export the vocabulary vectors of a loaded pipeline into `out_dir`."""
+    vectors = nlp.vocab.vectors
+    strings = nlp.vocab.strings
+
+    hashes, rows = [], []
+    for key, row in vectors.key2row.items():
+        try:
+            word = strings[key]
+        except KeyError:
+            continue
+        hashes.append(word_hash(word))
+        rows.append(row)
+
+    hashes = np.array(hashes, dtype=np.uint64)
+    rows = np.array(rows, dtype=np.int32)
+    order = np.argsort(hashes, kind="stable")
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "vectors.npy"), np.asarray(vectors.data, dtype=dtype))
+    np.save(os.path.join(out_dir, "hashes.npy"), hashes[order])
+    np.save(os.path.join(out_dir, "rows.npy"), rows[order])
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "model": nlp.meta.get("name", ""),
+            "version": nlp.meta.get("version", ""),
+            "dtype": dtype,
+            "dim": int(vectors.shape[1]),
+            "keys": int(len(hashes)),
+            "rows": int(vectors.shape[0]),
+        }, f, indent=4)
+    return out_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a compact vector table from the spaCy model.")
+    parser.add_argument("--out", default="data/vectors")
+    parser.add_argument("--float16", action="store_true", help="Halve the table size (small precision loss)")
+    args = parser.parse_args()
+
+    from core.nlp_model import get_nlp
+    out = build_vector_table(get_nlp(), args.out, dtype="float16" if args.float16 else "float32")
+    print(f"Vector table written to {out}")
+
+
+if __name__ == "__main__":
+    main()
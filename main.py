@@ -2,9 +2,12 @@ from rich.console import Console
 from rich.prompt import Prompt
 from rich.table import Table
 from rich.panel import Panel
-from rich.align import Align
 from rich.layout import Layout
+from rich.live import Live
+from rich.text import Text
 from core.conversation_manager import ConversationManager 
+from core.metrics import metrics
+from core.profiling import TurnProfiler
 import sys
 
 console = Console()
@@ -20,6 +23,18 @@ def display_summary(summary):
         f"Last updated: {summary['last_updated']}\n"
         f"Has context: {summary['has_context']}"
     )
+    cache = summary.get('entity_vector_cache')
+    if cache:
+        panel_content += (
+            f"\nEntity vector cache: {cache['entries']}/{cache['max_entries']} "
+            f"({cache['hit_rate']:.0%} hits, {cache['evictions']} evicted)"
+        )
+    analysis = summary.get('analysis_cache')
+    if analysis:
+        panel_content += (
+            f"\nAnalysis cache: {analysis['entries']}/{analysis['max_entries']} "
+            f"({analysis['hit_rate']:.0%} hits)"
+        )
     console.print(Panel(panel_content, title="Memory Overview", style="bold cyan"))
 
     # Theme and emotional arc summary
@@ -48,6 +63,49 @@ def display_summary(summary):
     )
     console.print(layout)
 
+def display_stats(stats):
+    """Per-stage timing histograms collected since startup."""
+    if not metrics.enabled:
+        console.print(Panel("Stage timing is off (STAGE_METRICS=0 in data/config.env).", style="yellow"))
+        return
+    if not stats:
+        console.print(Panel("No timings recorded yet.", style="yellow"))
+        return
+    table = Table(title="Stage Timings (ms)")
+    table.add_column("Stage", style="cyan")
+    for column in ["Count", "p50", "p95", "p99", "Max"]:
+        table.add_column(column, justify="right")
+    for stage, s in stats.items():
+        table.add_row(
+            stage, str(s["count"]),
+            f"{s['p50_ms']:.2f}", f"{s['p95_ms']:.2f}", f"{s['p99_ms']:.2f}", f"{s['max_ms']:.2f}"
+        )
+    console.print(table)
+
+def toggle_profiling(profiler, cmd):
+    """!profile on [N] | off: cProfile/tracemalloc dumps for every (Nth) turn."""
+    args = cmd.split()[1:]
+    if args and args[0] == "on":
+        profiler.enable(every=int(args[1]) if len(args) > 1 and args[1].isdigit() else None)
+    elif args and args[0] == "off":
+        profiler.disable()
+    state = f"on (every {profiler.every} turn(s))" if profiler.enabled else "off"
+    where = profiler.run_dir or profiler.output_dir
+    console.print(Panel(f"Profiling {state}\nDumps: {where}", title="Profiler", style="bold blue"))
+
+def stream_reply(chat, user_input):
+    """Render the reply token by token inside the Nikki panel; returns the full reply."""
+    text = Text()
+
+    def panel():
+        return Panel(Text.assemble(("Nikki: ", "bold green"), text), style="green")
+
+    with Live(panel(), console=console, refresh_per_second=20, transient=False) as live:
+        for fragment in chat.chat_stream(user_input):
+            text.append(fragment)
+            live.update(panel())
+    return text.plain.strip()
+
 def main():
     system_prompt = (
         "You are Nikki, a lonely, shy, timid goth girl with a deep love for art, "
@@ -59,19 +117,29 @@ def main():
         "striving to sound sophisticated and cool."
     )
 
+    # PROFILE_TURNS=N in data/config.env profiles every Nth turn from the start
+    profiler = TurnProfiler.from_env()
+
     try:
-        chat = ConversationManager(system_prompt=system_prompt)
+        # Memory writes and persistence overlap the LLM request
+        chat = ConversationManager(
+            system_prompt=system_prompt, pipelined=True, profiler=profiler, persist_analysis_cache=True
+        )
     except Exception as e:
         console.print(f"[bold red]Error initializing ConversationManager:[/bold red] {e}")
         sys.exit(1)
 
+    # Rolling stage timings are appended here every STAGE_METRICS_INTERVAL seconds
+    if metrics.dump_file is None:
+        metrics.configure(dump_file="data/memory/stage_metrics.jsonl")
+
     console.print(Panel(
         "Local AI Companion v0.4 — Enhanced Memory & Theme Tracking", 
         style="bold cyan"
     ))
     console.print(
         "[dim]Commands: !exit (quit), !reset (clear all), !info (memory status), "
-        "!context (show context size)[/dim]\n"
+        "!context (show context size), !stats (stage timings), !profile on|off[/dim]\n"
     )
 
     while True:
@@ -84,6 +152,7 @@ def main():
             cmd = user_input.lower()
 
             if cmd in ["!exit", "exit", "quit"]:
+                metrics.dump()
                 console.print(Panel("Goodbye! 🖤", style="bold red"))
                 break
                 
@@ -108,14 +177,24 @@ def main():
                 ))
                 continue
 
+            elif cmd in ["!stats", "stats"]:
+                display_stats(metrics.summary())
+                continue
+
+            elif cmd.startswith("!profile"):
+                toggle_profiling(profiler, cmd)
+                continue
+
             # Regular chat
             try:
-                reply = chat.chat(user_input)
+                reply = stream_reply(chat, user_input)
                 if reply:
-                    console.print(Panel(
-                        Align(f"[bold green]Nikki:[/bold green] {reply}", align="left"), 
-                        style="green"
-                    ))
+                    latency = chat.last_turn_latency
+                    if latency.get("first_token_s") is not None:
+                        console.print(
+                            f"[dim]first token {latency['first_token_s']:.2f}s · "
+                            f"total {latency['total_s']:.2f}s[/dim]"
+                        )
                 else:
                     console.print("[bold red]No response received from AI[/bold red]")
             except Exception as e:
@@ -125,8 +204,12 @@ def main():
             console.print("\n[dim]Use !exit to quit properly[/dim]")
             continue
         except EOFError:
+            metrics.dump()
             console.print(Panel("Goodbye! 🖤", style="bold red"))
             break
 
+    # Commit coalesced memory writes and save the caches before leaving
+    chat.close()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,6 +3,9 @@ import random
 from collections import deque
 from difflib import SequenceMatcher
 from core.conversation_manager import ConversationManager
+from core.memory_manager import MemoryManager
+from core.profiling import TurnProfiler
+from core.keyword_matcher import KeywordMatcher
 from rich.console import Console
 
 console = Console()
@@ -39,12 +42,20 @@ class ThemeEvolution:
             "shadow": ["darkness", "hidden", "mystery", "fear", "depth"],
             "moon": ["night", "pale", "reflection", "cycle", "beauty"]
         }
+        # A theme is present when its name or any of its keywords appears as a word
+        self.matcher = KeywordMatcher({
+            theme: [theme] + keywords for theme, keywords in self.theme_keywords.items()
+        })
         
     def add_theme(self, theme_name):
         """Add a new theme to the evolution tracker."""
         if theme_name not in self.themes:
             self.themes.append(theme_name)
             
+    def detect_themes(self, text):
+        """Themes mentioned in `text`, in theme_keywords order."""
+        return self.matcher.labels(text)
+
     def get_evolution_summary(self):
         """Get a summary of theme progression."""
         if not self.themes:
@@ -63,7 +74,9 @@ def self_chat_with_memory_tables(
     delay=0.2, 
     history_size=5,  # Increased from 3 for better loop detection
     snapshot_interval=50,
-    similarity_threshold=0.85  # NEW: Detect near-duplicate responses (85%+ similar)
+    similarity_threshold=0.85,  # NEW: Detect near-duplicate responses (85%+ similar)
+    memory_flush_interval=5.0,  # Seconds between memory.json commits
+    profile_every=None  # Profile every Nth turn (cProfile + tracemalloc); None = PROFILE_TURNS env
 ):
     """
     Enhanced self-chat simulation with:
@@ -84,7 +97,20 @@ def self_chat_with_memory_tables(
         "aspects of gothic themes."
     )
 
-    chat = ConversationManager(system_prompt=system_prompt)
+    if profile_every:
+        profiler = TurnProfiler(every=profile_every, enabled=True)
+    else:
+        profiler = TurnProfiler.from_env()
+
+    # Coalesce memory writes across bursty turns; flushed at the end of the run
+    chat = ConversationManager(
+        system_prompt=system_prompt,
+        memory_manager=MemoryManager(flush_interval=memory_flush_interval),
+        pipelined=True,
+        profiler=profiler,
+        # Prompt templates repeat, so their parses are reused within and across runs
+        persist_analysis_cache=True
+    )
     theme_tracker = ThemeEvolution()
 
     initial_user_input = "Hello Nikki. Let's start a deep conversation about gothic art and stories. What's one thing you are currently obsessed with?"
@@ -197,10 +223,8 @@ def self_chat_with_memory_tables(
             console.print()
 
             # --- THEME EXTRACTION ---
-            reply_lower = reply.lower()
-            for theme in theme_tracker.theme_keywords.keys():
-                if theme in reply_lower or any(kw in reply_lower for kw in theme_tracker.theme_keywords[theme]):
-                    theme_tracker.add_theme(theme)
+            for theme in theme_tracker.detect_themes(reply):
+                theme_tracker.add_theme(theme)
 
             # --- MEMORY SNAPSHOT ---
             if i % snapshot_interval == 0:
@@ -212,7 +236,8 @@ def self_chat_with_memory_tables(
                 f.write(f"Total Entries: {summary['total_entries']} | ")
                 f.write(f"Last Updated: {summary['last_updated']}\n")
                 f.write(f"Total Unique Entities: {summary['total_entities']}\n")
-                f.write(f"Total Themes Tracked: {summary['total_themes']}\n\n")
+                f.write(f"Total Themes Tracked: {summary['total_themes']}\n")
+                f.write(f"Analysis Cache Hit Rate: {summary['analysis_cache']['hit_rate']:.1%}\n\n")
                 
                 if summary.get('theme_summary'):
                     f.write(f"Theme Evolution: {theme_tracker.get_evolution_summary()}\n")
@@ -255,11 +280,22 @@ def self_chat_with_memory_tables(
         f.write(f"- Themes Explored: {final_summary['total_themes']}\n")
         if final_summary.get('emotional_arc'):
             f.write(f"- {final_summary['emotional_arc']}\n")
+        analysis_cache = final_summary['analysis_cache']
+        f.write(
+            f"- Analysis Cache: {analysis_cache['hit_rate']:.1%} hit rate "
+            f"({analysis_cache['hits']} hits / {analysis_cache['misses']} misses)\n"
+        )
         f.write("="*70 + "\n")
 
+    chat.close()
+
     console.print(f"\n[bold green]✅ Self-chat simulation complete[/bold green] [dim]({i} turns)[/dim]")
     console.print(f"[cyan]🎭 Theme evolution: {theme_tracker.get_evolution_summary()}[/cyan]")
+    console.print(f"[cyan]🧠 Analysis cache hit rate: {analysis_cache['hit_rate']:.1%}[/cyan]")
     console.print(f"[yellow]📝 Log saved to 'self_chat_log.txt'[/yellow]\n")
+    if profiler.run_dir:
+        console.print(f"[magenta]🔬 Turn profiles saved to '{profiler.run_dir}'[/magenta]\n")
+    profiler.disable()
 
 if __name__ == "__main__":
     self_chat_with_memory_tables(
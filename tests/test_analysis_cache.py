@@ -0,0 +1,61 @@
+import numpy as np
+from unittest.mock import patch, MagicMock
+
+import core.conversation_manager as cm
+from core.analysis_cache import AnalysisCache, TurnAnalysis
+from core.conversation_manager import ConversationManager
+
+
+def analysis(text, sentiment=0.5):
+    vector = np.arange(4, dtype=np.float32)
+    return TurnAnalysis(text, ["Poe"], ["Poe"], sentiment, vector, True)
+
+
+def test_keys_normalize_whitespace_but_keep_case():
+    assert AnalysisCache.key("I love  Poe\n") == AnalysisCache.key(" I love Poe")
+    assert AnalysisCache.key("I love Poe") != AnalysisCache.key("i love poe")
+
+
+def test_lru_eviction_and_hit_rate():
+    cache = AnalysisCache(max_entries=2)
+    cache.put("a", analysis("a"))
+    cache.put("b", analysis("b"))
+    assert cache.get("a") is not None
+    cache.put("c", analysis("c"))
+    assert cache.get("b") is None
+    assert cache.stats == {
+        "entries": 2, "max_entries": 2, "hits": 1, "misses": 1, "evictions": 1, "hit_rate": 0.5
+    }
+
+
+def test_persists_across_instances_per_namespace(tmp_path):
+    path = str(tmp_path / "analysis_cache.jsonl")
+    cache = AnalysisCache(path=path, namespace="model:5")
+    cache.put("I love Poe", analysis("I love Poe", sentiment=0.8))
+    cache.save()
+
+    reloaded = AnalysisCache(path=path, namespace="model:5").get("I love Poe")
+    assert reloaded.entities == ["Poe"] and reloaded.sentiment == 0.8 and reloaded.has_vector
+    np.testing.assert_array_equal(reloaded.vector, np.arange(4, dtype=np.float32))
+
+    assert AnalysisCache(path=path, namespace="other-model:5").get("I love Poe") is None
+
+
+def test_repeated_turns_skip_spacy(tmp_path):
+    manager = ConversationManager(system_prompt="S", memory_dir=str(tmp_path), persist_analysis_cache=True)
+    text = "I really love gothic fiction and Edgar Allan Poe."
+    first = manager._analyze_turn(text)
+
+    spy = MagicMock(wraps=cm.get_nlp())
+    with patch.object(cm, "get_nlp", return_value=spy):
+        again = manager._analyze_turn(text + "  ")
+        assert manager._extract_entities(text) == first.entities
+        assert manager._get_sentiment(text) == first.sentiment
+        assert manager._get_query_vector(text) is first.vector
+    assert spy.call_count == 0
+    assert again is first
+
+    manager.close()
+    restarted = ConversationManager(system_prompt="S", memory_dir=str(tmp_path), persist_analysis_cache=True)
+    assert restarted._analyze_turn(text).entities == first.entities
+    assert restarted.get_memory_summary()["analysis_cache"]["hits"] == 1
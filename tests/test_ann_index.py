@@ -0,0 +1,78 @@
+import os
+import numpy as np
+from core.vector_index import EntityVectorIndex
+from core.ann_index import IVFIndex
+
+
+def build_index(n=500, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    index = EntityVectorIndex()
+    for i in range(n):
+        index.upsert(f"e{i}", rng.standard_normal(dim))
+    return index
+
+
+def test_untrained_index_returns_every_row():
+    """Below the training threshold recall falls back to the exact path."""
+    index = build_index(n=20)
+    ivf = IVFIndex(min_train_size=100)
+    assert not ivf.needs_training(index)
+    assert len(ivf.candidate_rows(np.ones(16), index)) == 20
+
+
+def test_train_assigns_every_key_and_finds_exact_match():
+    """Each valid key lands in one bucket, and probing finds a query's own vector."""
+    index = build_index()
+    ivf = IVFIndex(min_train_size=0, nprobe=2)
+    ivf.train(index)
+
+    assert ivf.is_trained
+    assert len(ivf.assignments) == len(index)
+    assert sum(len(bucket) for bucket in ivf.lists) == len(index)
+
+    query = index.vectors[index.rows["e42"]]
+    rows = ivf.candidate_rows(query, index)
+    assert index.rows["e42"] in rows
+    assert index.weighted_top_k(query, 0.5, 1, rows=rows)[0][0] == "e42"
+
+
+def test_train_vectors_on_a_snapshot_matches_train():
+    """Training on copied (keys, vectors) gives the same buckets and leaves the result unsaved."""
+    index = build_index()
+    ivf = IVFIndex(min_train_size=0)
+    ivf.train(index)
+
+    snapshot = ivf.untrained_copy()
+    assert not snapshot.is_trained
+    snapshot.train_vectors(list(index.keys), index.vectors.copy())
+    assert snapshot.assignments == ivf.assignments
+    assert snapshot._unsaved_changes
+
+
+def test_incremental_add_and_remove():
+    index = build_index()
+    ivf = IVFIndex(min_train_size=0)
+    ivf.train(index)
+
+    row = index.upsert("new entity", np.ones(16))
+    ivf.add("new entity", index.vectors[row])
+    assert "new entity" in ivf.lists[ivf.assignments["new entity"]]
+
+    ivf.remove("new entity")
+    assert "new entity" not in ivf.assignments
+
+
+def test_persistence_round_trip(tmp_path):
+    """Centroids and bucket assignments survive a restart; clear() deletes them."""
+    index = build_index()
+    ivf = IVFIndex(index_dir=str(tmp_path), min_train_size=0)
+    ivf.train(index)
+
+    reloaded = IVFIndex(index_dir=str(tmp_path))
+    assert reloaded.is_trained
+    assert reloaded.assignments == ivf.assignments
+    assert np.allclose(reloaded.centroids, ivf.centroids)
+
+    reloaded.clear()
+    assert not os.path.exists(reloaded.centroids_file)
+    assert not os.path.exists(reloaded.lists_file)
@@ -0,0 +1,109 @@
+import asyncio
+import io
+import json
+import httpx
+from unittest.mock import patch, MagicMock
+
+import requests
+from core import api_connector, http_client
+
+
+def sse_response(lines):
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.raise_for_status = MagicMock()
+    response.iter_lines.return_value = iter(lines)
+    return response
+
+
+def chunk(content):
+    return "data: " + json.dumps({"choices": [{"delta": {"content": content}}]})
+
+
+def test_stream_message_yields_deltas_until_done():
+    lines = [
+        "data: " + json.dumps({"choices": [{"delta": {"role": "assistant"}}]}),
+        chunk("Hel"),
+        "",
+        ": keep-alive",
+        chunk("lo!"),
+        "data: [DONE]",
+        chunk("ignored"),
+    ]
+    with patch.object(http_client.get_session(), "post", return_value=sse_response(lines)) as mock_post:
+        fragments = list(api_connector.stream_message([{"role": "user", "content": "Hi"}]))
+
+    assert fragments == ["Hel", "lo!"]
+    assert mock_post.call_args.kwargs["json"]["stream"] is True
+    assert mock_post.call_args.kwargs["stream"] is True
+    assert mock_post.call_args.kwargs["timeout"] == http_client.default_timeout()
+
+
+def test_stream_message_decodes_utf8_without_charset():
+    """Raw UTF-8 SSE bytes (no charset in Content-Type) come through intact, not as Latin-1 mojibake."""
+    body = ("data: " + json.dumps({"choices": [{"delta": {"content": "Café — 🖤"}}]}, ensure_ascii=False)
+            + "\n\ndata: [DONE]\n\n").encode("utf-8")
+    response = requests.models.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(body)
+    response.headers["Content-Type"] = "text/event-stream"
+    # What requests' adapter does for a text/* type without a charset
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+
+    with patch.object(http_client.get_session(), "post", return_value=response):
+        fragments = list(api_connector.stream_message([{"role": "user", "content": "Hi"}]))
+
+    assert fragments == ["Café — 🖤"]
+
+
+def test_stream_message_reports_connection_error():
+    with patch.object(http_client.get_session(), "post", side_effect=requests.exceptions.ConnectionError("refused")):
+        fragments = list(api_connector.stream_message([{"role": "user", "content": "Hi"}]))
+    assert len(fragments) == 1
+    assert fragments[0].startswith("[Connection Error]")
+
+
+def mock_async_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_asend_message_retries_transient_status():
+    calls = []
+
+    def handler(request):
+        calls.append(json.loads(request.content))
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"choices": [{"message": {"content": " Hello! "}}]})
+
+    async def run():
+        async with mock_async_client(handler) as client:
+            with patch.object(http_client, "BACKOFF_FACTOR", 0):
+                return await api_connector.asend_message([{"role": "user", "content": "Hi"}], client=client)
+
+    with patch.object(api_connector, "API_URL", "http://mocked-api/v1/chat/completions"):
+        assert asyncio.run(run()) == "Hello!"
+    assert len(calls) == 3
+    assert calls[0]["messages"][0]["content"] == "Hi"
+
+
+def test_asend_message_reports_non_json_body():
+    """A 200 that isn't JSON is a connection error string, like the sync path, not an exception."""
+    async def run():
+        async with mock_async_client(lambda request: httpx.Response(200, text="<html>busy</html>")) as client:
+            return await api_connector.asend_message([{"role": "user", "content": "Hi"}], client=client)
+
+    with patch.object(api_connector, "API_URL", "http://mocked-api/v1/chat/completions"):
+        assert asyncio.run(run()).startswith("[Connection Error]")
+
+
+def test_astream_message_yields_deltas():
+    body = "\n\n".join([chunk("Hel"), chunk("lo"), "data: [DONE]"]) + "\n\n"
+
+    async def run():
+        client = mock_async_client(lambda request: httpx.Response(200, text=body))
+        async with client:
+            return [d async for d in api_connector.astream_message([], client=client)]
+
+    with patch.object(api_connector, "API_URL", "http://mocked-api/v1/chat/completions"):
+        assert asyncio.run(run()) == ["Hel", "lo"]
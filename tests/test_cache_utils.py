@@ -0,0 +1,38 @@
+import gc
+from unittest.mock import patch
+
+from core import cache_utils
+from core.cache_utils import LRUCache, call_at_exit
+
+
+def test_lru_evicts_least_recent_and_counts():
+    cache = LRUCache(max_entries=2)
+    cache._store("a", 1)
+    cache._store("b", 2)
+    assert cache._lookup("a") == 1
+    cache._store("c", 3)
+
+    assert "b" not in cache and len(cache) == 2
+    assert cache._lookup("b") is None
+    assert cache.stats == {
+        "entries": 2, "max_entries": 2, "hits": 1, "misses": 1, "evictions": 1, "hit_rate": 0.5
+    }
+
+
+def test_call_at_exit_holds_its_target_weakly():
+    class Target:
+        calls = 0
+
+        def save(self):
+            Target.calls += 1
+
+    with patch.object(cache_utils.atexit, "register") as register:
+        kept, dropped = Target(), Target()
+        call_at_exit(kept, "save")
+        call_at_exit(dropped, "save")
+        del dropped
+        gc.collect()
+
+    for callback, *args in (call.args for call in register.call_args_list):
+        callback(*args)
+    assert Target.calls == 1
@@ -1,15 +1,11 @@
+import asyncio
+import os
+import threading
 import pytest
 from unittest.mock import patch, MagicMock
 from core.conversation_manager import ConversationManager
 from core.memory_manager import MemoryManager
-import spacy
-
-# Initialize SpaCy globally for the test environment to prevent re-downloads
-try:
-    nlp = spacy.load("en_core_web_md")
-except OSError:
-    spacy.cli.download("en_core_web_md")
-    nlp = spacy.load("en_core_web_md")
+from core.metrics import metrics
 
 
 @pytest.fixture
@@ -179,4 +175,407 @@ def test_dynamic_memory_recall_and_prompt_injection(conv_manager):
             assert "Tractor Repair" not in system_message_content
 
             # Relevance score formatting
-            assert "relevance:" in system_message_content.lower()
\ No newline at end of file
+            assert "relevance:" in system_message_content.lower()
+
+def test_vectorized_recall_tracks_memory_store(conv_manager):
+    """Recall picks up entries written straight to the store and drops cleared ones."""
+    conv_manager.memory.set_memory_entry("Edgar Allan Poe", {"type": "preference", "score": 0.8})
+    conv_manager.memory.set_memory_entry("gothic fiction", {"type": "preference", "score": 0.5})
+
+    recalled = conv_manager._recall_relevant_memory("Edgar Allan Poe")
+    assert recalled
+    entity, weighted_score, entry, similarity, frequency = recalled[0]
+    assert entity == "Edgar Allan Poe"
+    assert similarity == pytest.approx(1.0, abs=1e-4)
+    assert weighted_score == pytest.approx(similarity * 1.8, rel=1e-4)
+    assert entry["score"] == 0.8
+
+    conv_manager.clear_memory()
+    assert conv_manager._recall_relevant_memory("Edgar Allan Poe") == []
+
+
+def test_recall_index_is_updated_by_writes_not_rescanned(conv_manager):
+    """After the first recall, writes reach the index through the store's listener; recall never walks the store."""
+    conv_manager.memory.set_memory_entry("gothic fiction", {"type": "preference", "score": 0.5})
+    conv_manager._recall_relevant_memory("gothic fiction")
+
+    with patch.object(conv_manager.memory, "get_memory_scores", side_effect=AssertionError("store scanned")):
+        conv_manager.memory.set_memory_entry("Edgar Allan Poe", {"type": "preference", "score": 0.8})
+        conv_manager.memory.set_memory_entry("Edgar Allan Poe", {"type": "preference", "score": -0.4})
+        recalled = conv_manager._recall_relevant_memory("Edgar Allan Poe")
+
+    entity, weighted_score, entry, similarity, frequency = recalled[0]
+    assert entity == "Edgar Allan Poe"
+    assert weighted_score == pytest.approx(similarity * 1.4, rel=1e-4)
+
+
+def test_ann_recall_matches_exact_on_small_store(tmp_path):
+    """Recall is exact while the IVF index trains in the background, then uses the swapped-in index."""
+    manager = ConversationManager(memory_dir=str(tmp_path), use_ann_index=True)
+    manager._ann_index.min_train_size = 0
+    manager.memory.set_memory_entry("Edgar Allan Poe", {"type": "preference", "score": 0.8})
+    manager.memory.set_memory_entry("tractor", {"type": "fact", "score": 0.0})
+
+    recalled = manager._recall_relevant_memory("Edgar Allan Poe")
+    assert not manager._ann_index.is_trained
+    assert recalled[0][0] == "Edgar Allan Poe"
+
+    manager._ann_training.result()
+    recalled = manager._recall_relevant_memory("Edgar Allan Poe")
+    assert manager._ann_index.is_trained
+    assert recalled[0][0] == "Edgar Allan Poe"
+
+    manager.close()
+    assert os.path.exists(os.path.join(str(tmp_path), "ivf_centroids.npy"))
+
+
+def test_close_commits_coalesced_memory_writes(tmp_path):
+    """Writes held back by flush_interval are committed when the manager closes."""
+    manager = ConversationManager(memory_manager=MemoryManager(str(tmp_path), flush_interval=3600))
+    manager.memory.set_memory_entry("first", {"score": 1})
+    manager.memory.set_memory_entry("second", {"score": 2})
+    assert MemoryManager(str(tmp_path)).get_memory_metadata()["total_entries"] == 1
+
+    manager.close()
+    assert MemoryManager(str(tmp_path)).get_memory_metadata()["total_entries"] == 2
+
+
+def test_ann_index_lives_in_the_memory_managers_directory(tmp_path):
+    """A passed-in MemoryManager decides where the IVF files go, not the memory_dir argument."""
+    store_dir = tmp_path / "store"
+    manager = ConversationManager(
+        memory_dir=str(tmp_path / "unused"),
+        memory_manager=MemoryManager(str(store_dir)),
+        use_ann_index=True
+    )
+    assert manager._ann_index.index_dir == str(store_dir)
+
+
+def test_recall_after_restart_skips_spacy_for_known_entities(tmp_path):
+    """Stored entity vectors are reused, so a fresh manager never reparses known keys."""
+    first = ConversationManager(memory_dir=str(tmp_path))
+    first.memory.set_memory_entry("Edgar Allan Poe", {"type": "preference", "score": 0.8})
+    first._recall_relevant_memory("Edgar Allan Poe")
+
+    restarted = ConversationManager(memory_dir=str(tmp_path))
+    with patch.object(restarted, "_get_entity_doc", side_effect=AssertionError("spaCy called")):
+        recalled = restarted._recall_relevant_memory("Edgar Allan Poe")
+    assert recalled[0][0] == "Edgar Allan Poe"
+
+
+@pytest.fixture
+def uncached_manager(tmp_path):
+    """A manager without the analysis cache, so every text-only stage parses for real."""
+    return ConversationManager(system_prompt="System ready.", memory_dir=str(tmp_path), analysis_cache_size=0)
+
+
+def test_turn_analysis_matches_separate_stages(uncached_manager):
+    """The shared-Doc analysis gives the same entities and sentiment as the standalone stages."""
+    conv_manager = uncached_manager
+    text = "I really love gothic fiction and Edgar Allan Poe."
+    analysis = conv_manager._analyze_turn(text)
+    assert len(conv_manager._analysis_cache) == 0
+
+    assert sorted(analysis.entities) == sorted(conv_manager._extract_entities(text))
+    assert analysis.sentiment == pytest.approx(conv_manager._get_sentiment(text))
+    assert analysis.has_vector
+    assert conv_manager._recall_relevant_memory(text, analysis=analysis) == \
+        conv_manager._recall_relevant_memory(text)
+
+
+def test_turn_analysis_parses_once_and_is_faster(uncached_manager):
+    """Timing comparison: one shared parse vs. a parse per stage (as chat() used to do)."""
+    import time
+    import core.conversation_manager as cm
+
+    conv_manager = uncached_manager
+
+    text = "I really love gothic fiction and Edgar Allan Poe, but that noisy party was terrible."
+    spy = MagicMock(wraps=cm.get_nlp())
+    with patch.object(cm, "get_nlp", return_value=spy):
+        conv_manager._analyze_turn(text)
+    assert spy.call_count == 1
+
+    def separate_stages():
+        conv_manager._get_sentiment(text)
+        conv_manager._extract_entities(text)
+        cm.get_nlp()(text)  # recall's own parse
+
+    def single_pass():
+        conv_manager._analyze_turn(text)
+
+    def best_of(fn, runs=5, loops=20):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    assert best_of(single_pass) < best_of(separate_stages)
+
+
+def test_persisted_analysis_cache_is_dropped_when_analysis_version_changes(tmp_path):
+    """Bumping ANALYSIS_VERSION invalidates analysis_cache.jsonl written by older extraction code."""
+    import numpy as np
+    import core.conversation_manager as cm
+    from core.analysis_cache import TurnAnalysis
+
+    first = ConversationManager(memory_dir=str(tmp_path), persist_analysis_cache=True)
+    first._analysis_cache.put("I love Poe", TurnAnalysis("I love Poe", ["Poe"], ["Poe"], 0.5, np.ones(4, np.float32), True))
+    first.close()
+
+    assert ConversationManager(memory_dir=str(tmp_path), persist_analysis_cache=True)._analysis_cache.get("I love Poe")
+    with patch.object(cm, "ANALYSIS_VERSION", cm.ANALYSIS_VERSION + 1):
+        upgraded = ConversationManager(memory_dir=str(tmp_path), persist_analysis_cache=True)
+    assert upgraded._analysis_cache.get("I love Poe") is None
+
+
+def test_recall_with_vector_table_never_loads_spacy(tmp_path):
+    """A recall-only manager backed by the vector table does not touch the spaCy pipeline."""
+    import core.conversation_manager as cm
+    from core.vector_table import build_vector_table
+
+    table_dir = tmp_path / "vectors"
+    build_vector_table(cm.get_nlp(), str(table_dir))
+
+    manager = ConversationManager(memory_dir=str(tmp_path / "memory"), vector_table_dir=str(table_dir))
+    manager.memory.set_memory_entry("gothic fiction", {"type": "preference", "score": 0.6})
+    with patch.object(cm, "get_nlp", side_effect=AssertionError("spaCy loaded")):
+        recalled = manager._recall_relevant_memory("gothic fiction")
+    assert recalled[0][0] == "gothic fiction"
+
+
+def test_memory_entries_written_in_one_commit(conv_manager):
+    """All entities from one sentence land in memory.json with a single write."""
+    with patch.object(conv_manager.memory, "_save_json", wraps=conv_manager.memory._save_json) as save:
+        conv_manager._process_memory_entry("I love gothic fiction and anime", 0.5, ["gothic", "fiction", "anime"])
+    assert save.call_count == 1
+    assert all(conv_manager.memory.get_memory_data(k) for k in ["gothic", "fiction", "anime"])
+
+
+def test_chat_with_sqlite_memory_backend(tmp_path):
+    """The SQLite store drops in for MemoryManager: writes, recall and summary all work."""
+    from core.sqlite_memory_manager import SQLiteMemoryManager
+
+    manager = ConversationManager(memory_manager=SQLiteMemoryManager(memory_dir=str(tmp_path)))
+    with patch("core.conversation_manager.send_message", return_value="Okay."):
+        manager.chat("I really love gothic fiction and Edgar Allan Poe.")
+
+    assert manager.memory.get_memory_data("Edgar Allan Poe")["type"] == "preference"
+    assert manager._recall_relevant_memory("Edgar Allan Poe")[0][0] == "Edgar Allan Poe"
+    summary = manager.get_memory_summary()
+    assert summary["total_entries"] == manager.memory.get_memory_metadata()["total_entries"]
+    assert summary["likes_table"].row_count >= 1
+
+
+def test_context_persistence_appends_per_turn(conv_manager):
+    """Each turn appends its two messages; pruned messages stay in the transcript."""
+    conv_manager.max_context_messages = 3
+    with patch("core.conversation_manager.send_message", side_effect=["One", "Two", "Three"]):
+        for text in ["!first", "!second", "!third"]:
+            conv_manager.chat(text)
+
+    transcript = conv_manager.memory.load_transcript()
+    assert [m["content"] for m in transcript] == ["!first", "One", "!second", "Two", "!third", "Three"]
+    assert conv_manager.memory.load_context() == conv_manager.get_context()
+
+    reloaded = MemoryManager(memory_dir=conv_manager.memory.memory_dir)
+    assert reloaded.load_context() == conv_manager.get_context()
+
+
+def test_chat_stream_records_reply_and_latency(conv_manager):
+    """Streaming yields fragments, then stores the joined reply like chat() does."""
+    with patch("core.conversation_manager.stream_message", return_value=iter(["Hello", " human", "! "])):
+        fragments = list(conv_manager.chat_stream("!hi"))
+
+    assert fragments == ["Hello", " human", "! "]
+    ctx = conv_manager.get_context()
+    assert ctx[-2] == {"role": "user", "content": "!hi"}
+    assert ctx[-1] == {"role": "assistant", "content": "Hello human!"}
+    assert conv_manager.memory.load_context()[-1]["content"] == "Hello human!"
+
+    latency = conv_manager.last_turn_latency
+    assert 0 <= latency["first_token_s"] <= latency["total_s"]
+
+
+def test_pipelined_chat_returns_before_post_processing(tmp_path):
+    """Persistence runs on the worker; the next turn waits for it, so nothing is lost."""
+    cm = ConversationManager(system_prompt="System ready.", memory_dir=str(tmp_path), pipelined=True)
+    release = threading.Event()
+    extract_themes = cm._extract_themes
+
+    def slow_extract_themes(text):
+        release.wait(5)
+        extract_themes(text)
+
+    with patch.object(cm, "_extract_themes", side_effect=slow_extract_themes), \
+         patch("core.conversation_manager.send_message", side_effect=["Okay.", "Sure."]):
+        assert cm.chat("I love gothic novels.") == "Okay."
+        assert cm.memory.load_transcript() == []
+
+        release.set()
+        cm.chat("!next")
+
+    assert cm.memory.get_memory_keys()
+    assert [m["content"] for m in cm.memory.load_transcript()] == ["I love gothic novels.", "Okay."]
+    assert cm.get_context()[-1]["content"] == "Sure."
+    assert cm.memory.load_context() == cm.get_context()
+
+
+def test_pipelined_state_matches_sequential(tmp_path):
+    turns = ["I love gothic novels.", "I hate loud parties.", "!info", "Tell me about the occult."]
+    replies = ["Art and darkness.", "Music and art.", "Noted.", "Dark art."]
+    managers = []
+    for name, pipelined in (("seq", False), ("pipe", True)):
+        cm = ConversationManager(system_prompt="S", memory_dir=str(tmp_path / name), pipelined=pipelined)
+        with patch("core.conversation_manager.send_message", side_effect=replies):
+            for text in turns:
+                cm.chat(text)
+        cm.wait_for_background()
+        managers.append(cm)
+
+    seq, pipe = managers
+    assert seq.memory.get_memory_keys() == pipe.memory.get_memory_keys()
+    assert seq.memory.load_transcript() == pipe.memory.load_transcript()
+    assert seq.conversation_themes == pipe.conversation_themes
+    assert seq.entity_frequency == pipe.entity_frequency
+
+
+def test_achat_multiplexes_sessions_on_one_loop(tmp_path):
+    """Several sessions await the model concurrently; each keeps its own context."""
+    in_flight, peak = 0, 0
+
+    async def fake_asend_message(messages):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return f"Reply to {messages[-1]['content']}"
+
+    managers = [
+        ConversationManager(system_prompt="S", memory_dir=str(tmp_path / f"s{i}"))
+        for i in range(4)
+    ]
+
+    async def run():
+        return await asyncio.gather(*(cm.achat(f"!turn {i}") for i, cm in enumerate(managers)))
+
+    with patch("core.conversation_manager.asend_message", side_effect=fake_asend_message):
+        replies = asyncio.run(run())
+
+    assert replies == [f"Reply to !turn {i}" for i in range(4)]
+    assert peak == 4
+    for i, cm in enumerate(managers):
+        assert [m["content"] for m in cm.memory.load_transcript()] == [f"!turn {i}", f"Reply to !turn {i}"]
+
+
+def test_prompt_fits_token_budget(tmp_path):
+    """Long replies push old history out of the prompt; the reply budget is always left free."""
+    cm = ConversationManager(
+        system_prompt="System ready.", memory_dir=str(tmp_path), context_window=400, reply_tokens=100
+    )
+    long_reply = "word " * 120
+    with patch("core.conversation_manager.send_message", side_effect=[long_reply] * 3 + ["Short."]) as send:
+        for i in range(4):
+            cm.chat(f"!turn {i}")
+
+    prompt = send.call_args.args[0]
+    assert cm.token_counter.count_messages(prompt) <= cm.prompt_token_budget
+    assert prompt[0]["role"] == "system"
+    assert prompt[-1]["content"] == "!turn 3"
+    assert len(prompt) < 8
+    assert cm.token_counter.count_messages(cm.get_context()) <= cm.prompt_token_budget
+
+
+def test_short_turns_are_not_capped_by_message_count(conv_manager):
+    with patch("core.conversation_manager.send_message", return_value="Ok."):
+        for i in range(15):
+            conv_manager.chat(f"!{i}")
+    assert len(conv_manager.get_context()) == 31
+
+
+def test_memory_block_is_trimmed_to_its_share(conv_manager):
+    conv_manager.context_window, conv_manager.reply_tokens = 800, 100
+    entry = {"type": "preference", "score": 0.8}
+    recalled = [(f"entity {i}", 1.0 - i / 100, entry, 0.9, 1) for i in range(40)]
+
+    messages = conv_manager._build_context_with_memory("Hi", recalled)
+    block = messages[0]["content"][len(conv_manager.system_prompt_base):]
+    assert "entity 0" in block and "entity 39" not in block
+    assert conv_manager.token_counter.count_text(block) <= conv_manager.prompt_token_budget * conv_manager.memory_token_share
+
+
+def test_prefix_cache_layout_keeps_prompt_prefix_stable(tmp_path):
+    cm = ConversationManager(system_prompt="Persona.", memory_dir=str(tmp_path), prompt_layout="prefix_cache")
+    entry = {"type": "preference", "score": 0.8}
+    prompts = []
+
+    with patch.object(cm, "_recall_relevant_memory", return_value=[("gothic art", 1.2, entry, 0.9, 2)]), \
+         patch("core.conversation_manager.send_message", side_effect=lambda m: prompts.append(m) or "Reply."):
+        cm.chat("I love gothic art.")
+        cm.chat("Tell me about the occult.")
+
+    first, second = prompts
+    assert first[0] == second[0] == {"role": "system", "content": "Persona."}
+    # The prefix matches the previous request up to its user message (which carried the memory block)
+    assert second[1]["content"] == "I love gothic art."
+    assert second[2]["content"] == "Reply."
+    assert "'gothic art'" in second[-1]["content"]
+    assert second[-1]["content"].endswith("Tell me about the occult.")
+    # History stores the plain user text, not the memory-augmented prompt
+    assert cm.get_context()[-2]["content"] == "Tell me about the occult."
+
+
+def test_unknown_prompt_layout_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ConversationManager(memory_dir=str(tmp_path), prompt_layout="sideways")
+
+
+def test_chat_records_stage_timings(conv_manager):
+    metrics.reset()
+    with patch("core.conversation_manager.send_message", return_value="Dark art is lovely."):
+        conv_manager.chat("I love gothic novels and dark art.")
+
+    stages = metrics.summary()
+    for stage in ["parse", "sentiment", "entities", "memory_write", "recall", "context_build",
+                  "llm", "themes", "prune", "persistence", "turn", "memory.save_json"]:
+        assert stages[stage]["count"] >= 1, stage
+    assert stages["turn"]["max_ms"] >= stages["llm"]["max_ms"]
+
+
+def test_entity_vector_cache_is_bounded(tmp_path):
+    cm = ConversationManager(system_prompt="S", memory_dir=str(tmp_path), entity_cache_size=2)
+    for name in ["Edgar Allan Poe", "Mary Shelley", "Bram Stoker"]:
+        cm.memory.set_memory_entry(name, {"type": "preference", "score": 0.8})
+    cm._recall_relevant_memory("Gothic novels")
+    cm._recall_relevant_memory("Gothic novels")
+
+    stats = cm.get_memory_summary()["entity_vector_cache"]
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    # Indexed rows are reused on the second recall, so the cache is not consulted again
+    assert stats["misses"] == 3
+
+
+def test_rewriting_an_entity_reuses_its_cached_vector(conv_manager):
+    """A key's vector depends only on its text, so writing it again is a cache hit, not a recompute."""
+    # Writes reach the index (and the vector cache) once it has been loaded
+    conv_manager._load_entity_index()
+    for score in (0.8, -0.2):
+        conv_manager._process_memory_entry("Poe again", score, ["Edgar Allan Poe"])
+
+    stats = conv_manager._entity_vector_cache.stats
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_keyword_cues_match_whole_words(conv_manager):
+    assert conv_manager._get_keywords("i dislike loud parties") == "dislike"
+    assert conv_manager._get_keywords("a velvet glove") is None
+
+    conv_manager._extract_themes("My heart whispers to the moon, the moon answers.")
+    assert "art" not in conv_manager.conversation_themes
+    assert conv_manager.conversation_themes["moon"] == 1
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from core.entity_vector_cache import EntityVectorCache
+
+
+def test_stores_normalized_vectors_with_validity():
+    cache = EntityVectorCache()
+    vector, valid = cache.put("poe", [3.0, 4.0])
+    assert valid
+    assert vector.dtype == np.float32
+    np.testing.assert_allclose(vector, [0.6, 0.8])
+    with pytest.raises(ValueError):
+        vector[0] = 1.0
+
+    vector, valid = cache.put("empty", np.zeros(2))
+    assert not valid
+    assert not np.any(vector)
+
+
+def test_lru_eviction_and_counters():
+    cache = EntityVectorCache(max_entries=2)
+    cache.put("a", [1.0, 0.0])
+    cache.put("b", [0.0, 1.0])
+    assert cache.get("a") is not None      # "a" is now most recent
+    cache.put("c", [1.0, 1.0])             # evicts "b"
+
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache.stats == {
+        "entries": 2, "max_entries": 2, "hits": 1, "misses": 1, "evictions": 1,
+        "hit_rate": 0.5, "nbytes": 16
+    }
+
+
+def test_memory_stays_flat_over_many_entities():
+    cache = EntityVectorCache(max_entries=100)
+    rng = np.random.default_rng(0)
+    for i in range(5000):
+        cache.put(f"entity {i}", rng.standard_normal(300))
+    assert len(cache) == 100
+    assert cache.nbytes == 100 * 300 * 4
+    assert cache.evictions == 4900
@@ -0,0 +1,74 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+from core.http_client import CONNECT_TIMEOUT, create_session, post_json
+from core.lmstudio_client import LMStudioClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server.requests += 1
+        server.ports.add(self.client_address[1])
+        if server.failures > 0:
+            server.failures -= 1
+            status, body = 503, b"{}"
+        else:
+            status = 200
+            body = json.dumps({"choices": [{"message": {"content": "pong"}}]}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests, server.ports, server.failures = 0, set(), 0
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_reuses_one_connection(stub_server):
+    server, url = stub_server
+    client = LMStudioClient(base_url=url, session=create_session())
+    for _ in range(5):
+        assert client.send_message([{"role": "user", "content": "ping"}]) == "pong"
+    assert server.requests == 5
+    assert len(server.ports) == 1
+
+
+def test_lmstudio_client_keeps_its_10s_read_timeout():
+    assert LMStudioClient().timeout == (CONNECT_TIMEOUT, 10)
+    assert LMStudioClient(timeout=(1, 60)).timeout == (1, 60)
+
+
+def test_transient_errors_are_retried(stub_server):
+    server, url = stub_server
+    server.failures = 2
+    session = create_session(retries=2, backoff_factor=0)
+    response = post_json(url, {"messages": []}, session=session)
+    assert response.status_code == 200
+    assert server.requests == 3
+
+
+def test_retries_are_bounded(stub_server):
+    server, url = stub_server
+    server.failures = 5
+    client = LMStudioClient(base_url=url, session=create_session(retries=1, backoff_factor=0))
+    assert client.send_message([{"role": "user", "content": "ping"}]) is None
+    assert server.requests == 2
@@ -0,0 +1,28 @@
+from core.keyword_matcher import KeywordMatcher
+from core.conversation_manager import GOTHIC_THEMES, PREFERENCE_KEYWORDS
+
+
+def test_whole_words_only():
+    themes = KeywordMatcher(GOTHIC_THEMES)
+    assert themes.labels("My heart is full of earthly delight.") == []
+    assert themes.labels("Art, ARTS and the moonlit night.") == ["art", "night"]
+
+
+def test_inflections_phrases_and_apostrophes():
+    preferences = KeywordMatcher(PREFERENCE_KEYWORDS)
+    assert preferences.labels("I loved that book") == ["like"]
+    assert preferences.labels("I'm keen   on ravens") == ["like"]
+    assert preferences.labels("I can’t stand noise") == ["dislike"]
+    assert preferences.labels("I dislike crowds") == ["dislike"]
+    assert preferences.labels("Put on a glove, it's likely cold") == []
+    # Like cues come first (lexicon order), as before
+    assert preferences.labels("I hate rain but love storms") == ["like", "dislike"]
+
+
+def test_find_reports_every_hit_and_shared_terms():
+    matcher = KeywordMatcher({"lantern": ["light", "darkness"], "shadow": ["darkness", "mystery"]}, inflect=False)
+    hits = matcher.find("Darkness, light and darkness again")
+    assert [(label, start) for label, _, start in hits] == [
+        ("lantern", 0), ("shadow", 0), ("lantern", 10), ("lantern", 20), ("shadow", 20)
+    ]
+    assert matcher.labels("a mystery in the darkness") == ["lantern", "shadow"]
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+
+from benchmarks.llm_usage_report import build_report, load_records
+from benchmarks.mock_lmstudio import start_mock_server
+from core import api_connector
+from core.conversation_manager import ConversationManager
+from core.llm_telemetry import LLMCallLog, call_record
+
+
+@pytest.fixture
+def mock_url():
+    server, url = start_mock_server(reply_tokens=12)
+    with patch.object(api_connector, "API_URL", url):
+        yield url
+    server.shutdown()
+    server.server_close()
+
+
+def test_call_record_prefers_server_usage():
+    usage = {"prompt_tokens": 100, "completion_tokens": 20, "prompt_tokens_details": {"cached_tokens": 60}}
+    record = call_record(usage, total_s=1.5, first_token_s=0.5, estimated_prompt_tokens=90)
+    assert record["usage_source"] == "server"
+    assert (record["prompt_tokens"], record["completion_tokens"], record["cached_tokens"]) == (100, 20, 60)
+    # Decode rate after the first token
+    assert record["tokens_per_s"] == pytest.approx(20.0)
+
+    estimated = call_record(None, total_s=2.0, estimated_prompt_tokens=90, estimated_completion_tokens=10)
+    assert estimated["usage_source"] == "estimate"
+    assert (estimated["prompt_tokens"], estimated["tokens_per_s"]) == (90, 5.0)
+
+
+def test_usage_is_captured_from_plain_and_streamed_replies(mock_url):
+    messages = [{"role": "user", "content": "Tell me about ravens."}]
+    api_connector.send_message(messages)
+    plain = api_connector.last_usage()
+    assert plain["completion_tokens"] == 12
+
+    list(api_connector.stream_message(messages))
+    streamed = api_connector.last_usage()
+    assert streamed["prompt_tokens"] == plain["prompt_tokens"]
+    assert streamed["prompt_tokens_details"]["cached_tokens"] == plain["prompt_tokens"]
+
+
+def test_chat_appends_call_log_and_report_groups_sessions(mock_url, tmp_path):
+    for name in ("alice", "bob"):
+        cm = ConversationManager(system_prompt="System ready.", memory_dir=str(tmp_path / name))
+        cm.chat("I love gothic novels.")
+        list(cm.chat_stream("Tell me about the occult."))
+        cm.chat("!info")
+
+    records = LLMCallLog(str(tmp_path / "alice" / LLMCallLog.FILENAME)).load()
+    assert [r["mode"] for r in records] == ["chat", "stream", "chat"]
+    assert all(r["usage_source"] == "server" and r["session"] == "alice" for r in records)
+    assert records[1]["first_token_s"] is not None
+    assert records[2]["memory_tokens"] == 0
+
+    report = build_report(load_records([str(tmp_path)]), buckets=2)
+    assert report["calls"] == 6
+    assert {s: v["calls"] for s, v in report["sessions"].items()} == {"alice": 3, "bob": 3}
+    assert sum(b["calls"] for b in report["buckets"]) == 6
+
+
+def test_achat_logs_the_call_off_the_event_loop(mock_url, tmp_path):
+    """The async call record is written in the executor, still with the server's usage block."""
+    cm = ConversationManager(system_prompt="System ready.", memory_dir=str(tmp_path))
+    record = cm.llm_call_log.record
+    writer_threads = []
+
+    def spy(**fields):
+        writer_threads.append(threading.current_thread())
+        return record(**fields)
+
+    async def run():
+        with patch.object(cm.llm_call_log, "record", side_effect=spy):
+            await cm.achat("!info")
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(run())
+    assert writer_threads and writer_threads[0] is not loop_thread
+    [logged] = LLMCallLog(str(tmp_path / LLMCallLog.FILENAME)).load()
+    assert logged["mode"] == "async"
+    assert logged["usage_source"] == "server"
+
+
+def test_call_log_can_be_disabled(tmp_path):
+    cm = ConversationManager(system_prompt="S", memory_dir=str(tmp_path), log_llm_calls=False)
+    with patch("core.conversation_manager.send_message", return_value="Hi."):
+        cm.chat("!hello")
+    assert not (tmp_path / LLMCallLog.FILENAME).exists()
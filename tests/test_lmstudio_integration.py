@@ -19,7 +19,7 @@ def test_send_message_success(client):
     }
     mock_response.raise_for_status = MagicMock()
 
-    with patch("requests.post", return_value=mock_response) as mock_post:
+    with patch.object(client.session, "post", return_value=mock_response) as mock_post:
         result = client.send_message([{"role": "user", "content": "Hi"}])
 
         assert result == "Hello human!"
@@ -29,7 +29,7 @@ def test_send_message_success(client):
 
 
 def test_send_message_failure_returns_none(client):
-    with patch("requests.post", side_effect=requests.RequestException("Connection error")):
+    with patch.object(client.session, "post", side_effect=requests.RequestException("Connection error")):
         result = client.send_message([{"role": "user", "content": "Hi"}])
         assert result is None
 
@@ -39,6 +39,6 @@ def test_send_message_invalid_json(client):
     mock_response.json.return_value = {"invalid": "schema"}
     mock_response.raise_for_status = MagicMock()
 
-    with patch("requests.post", return_value=mock_response):
+    with patch.object(client.session, "post", return_value=mock_response):
         result = client.send_message([{"role": "user", "content": "Hi"}])
         assert result is None
@@ -90,4 +90,224 @@ def test_load_json_handles_corruption_gracefully():
     with open(mm.memory_file, "w", encoding="utf-8") as f:
         f.write("{not valid json}")
     mm2 = MemoryManager(memory_dir=TEST_MEMORY_DIR)
-    assert mm2.memory_data == {}
\ No newline at end of file
+    assert mm2.memory_data == {}
+
+def test_entity_vectors_persist_and_memory_map():
+    """Entity vectors survive a restart and are opened as a read-only memmap."""
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    mm.set_entity_vector("poe", [1.0, 2.0, 3.0])
+    mm.set_entity_vector("art", [0.0, 0.0, 0.0])
+    mm.set_entity_vector("poe", [4.0, 5.0, 6.0])  # overwrite in place
+
+    mm2 = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    assert mm2.has_entity_vector("art")
+    assert list(mm2.get_entity_vector("poe")) == [4.0, 5.0, 6.0]
+    assert mm2.get_entity_vector("missing") is None
+    assert not mm2.get_entity_vector("poe").flags.writeable
+
+
+def test_entity_vectors_cleared_with_memory():
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    mm.set_entity_vector("poe", [1.0, 2.0])
+    mm.clear_memory()
+    assert not mm.has_entity_vector("poe")
+    assert not os.path.exists(mm.vector_file)
+
+
+def test_entity_vectors_drop_torn_trailing_row():
+    """A partial row left by a crash is truncated and later appends stay aligned."""
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    mm.set_entity_vector("poe", [1.0, 2.0])
+    with open(mm.vector_file, "ab") as f:
+        f.write(b"\x00\x01")
+
+    mm2 = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    mm2.set_entity_vector("art", [3.0, 4.0])
+    assert list(mm2.get_entity_vector("poe")) == [1.0, 2.0]
+    assert list(mm2.get_entity_vector("art")) == [3.0, 4.0]
+
+
+def test_write_ahead_log_appends_and_replays():
+    """In log mode sets are appended (memory.json untouched) and replayed on load."""
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR, write_ahead_log=True)
+    mm.set_memory_entry("book", {"score": 0.5})
+    mm.set_memory_entry("book", {"score": 0.7})
+    mm.set_memory_entry("movie", {"score": -0.2})
+
+    assert not os.path.exists(mm.memory_file)
+    with open(mm.log_file, "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 3
+
+    mm2 = MemoryManager(memory_dir=TEST_MEMORY_DIR, write_ahead_log=True)
+    assert mm2.get_memory_data("book") == {"score": 0.7}
+    assert mm2.get_memory_metadata()["total_entries"] == 2
+    assert mm2.get_memory_data("_last_updated") == mm.get_memory_data("_last_updated")
+
+
+def test_write_ahead_log_compaction():
+    """Reaching compact_every folds the log into memory.json and empties it."""
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR, write_ahead_log=True, compact_every=3)
+    for i in range(4):
+        mm.set_memory_entry(f"entity{i}", {"score": i})
+
+    with open(mm.memory_file, "r", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert set(k for k in snapshot if not k.startswith("_")) == {"entity0", "entity1", "entity2"}
+    with open(mm.log_file, "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 1
+
+    mm2 = MemoryManager(memory_dir=TEST_MEMORY_DIR, write_ahead_log=True, compact_every=3)
+    assert mm2.get_memory_metadata()["total_entries"] == 4
+
+
+def test_write_ahead_log_skips_torn_record_and_clears():
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR, write_ahead_log=True)
+    mm.set_memory_entry("book", {"score": 0.5})
+    with open(mm.log_file, "a", encoding="utf-8") as f:
+        f.write('{"op": "set", "key": "mov')
+
+    mm2 = MemoryManager(memory_dir=TEST_MEMORY_DIR, write_ahead_log=True)
+    assert mm2.get_memory_data("book") == {"score": 0.5}
+    mm2.set_memory_entry("movie", {"score": 0.1})
+    assert MemoryManager(memory_dir=TEST_MEMORY_DIR, write_ahead_log=True).get_memory_data("movie") == {"score": 0.1}
+
+    mm2.clear_memory()
+    mm3 = MemoryManager(memory_dir=TEST_MEMORY_DIR, write_ahead_log=True)
+    assert mm3.get_memory_data() == {}
+
+
+def test_set_memory_entries_single_write():
+    """A batch is one file write with one shared timestamp."""
+    from unittest.mock import patch
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    with patch.object(mm, "_save_json", wraps=mm._save_json) as save:
+        mm.set_memory_entries({"book": {"score": 0.5}, "movie": {"score": 0.9}, "song": {"score": -0.1}})
+    assert save.call_count == 1
+
+    mm2 = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    assert mm2.get_memory_metadata()["total_entries"] == 3
+
+
+def test_transaction_commits_once_and_rolls_back():
+    from unittest.mock import patch
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    mm.set_memory_entry("book", {"score": 0.5})
+
+    with patch.object(mm, "_save_json", wraps=mm._save_json) as save:
+        with mm.transaction():
+            mm.set_memory_entry("movie", {"score": 0.9})
+            mm.set_memory_entry("book", {"score": 0.1})
+            assert save.call_count == 0
+    assert save.call_count == 1
+
+    try:
+        with mm.transaction():
+            mm.set_memory_entry("book", {"score": -1})
+            mm.set_memory_entry("ghost", {"score": 0})
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    assert mm.get_memory_data("book") == {"score": 0.1}
+    assert mm.get_memory_data("ghost") is None
+    assert MemoryManager(memory_dir=TEST_MEMORY_DIR).get_memory_data("book") == {"score": 0.1}
+
+
+def test_write_listener_sees_committed_writes_only():
+    """Listeners get each write, one batch per committed transaction, nothing for a rollback, None on clear."""
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    seen = []
+    mm.add_write_listener(seen.append)
+
+    mm.set_memory_entry("book", {"score": 0.5})
+    with mm.transaction():
+        mm.set_memory_entry("movie", {"score": 0.9})
+        mm.set_memory_entry("book", {"score": 0.1})
+        assert len(seen) == 1
+    try:
+        with mm.transaction():
+            mm.set_memory_entry("ghost", {"score": 0})
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    mm.clear_memory()
+
+    assert seen == [{"book": {"score": 0.5}}, {"movie": {"score": 0.9}, "book": {"score": 0.1}}, None]
+
+
+def test_flush_interval_coalesces_writes():
+    """Within the flush interval writes stay pending until flush()."""
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR, flush_interval=3600)
+    mm.set_memory_entry("first", {"score": 1})  # first write after idle commits immediately
+    mm.set_memory_entry("second", {"score": 2})
+    mm.set_memory_entry("third", {"score": 3})
+    assert MemoryManager(memory_dir=TEST_MEMORY_DIR).get_memory_metadata()["total_entries"] == 1
+
+    mm.flush()
+    assert MemoryManager(memory_dir=TEST_MEMORY_DIR).get_memory_metadata()["total_entries"] == 3
+
+
+def test_batch_in_write_ahead_log_is_one_record():
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR, write_ahead_log=True)
+    mm.set_memory_entries({"book": {"score": 0.5}, "movie": {"score": 0.9}})
+    with open(mm.log_file, "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 1
+    assert MemoryManager(memory_dir=TEST_MEMORY_DIR, write_ahead_log=True).get_memory_data("movie") == {"score": 0.9}
+
+
+def test_append_context_only_appends_new_messages():
+    """Transcript grows by the new messages; the live window is pinned + last N."""
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    system = {"role": "system", "content": "System"}
+    turns = [{"role": "user", "content": f"msg {i}"} for i in range(6)]
+
+    mm.append_context(turns[:2], keep_last=2, pinned=[system])
+    mm.append_context(turns[2:4], keep_last=3, pinned=[system])
+    mm.append_context(turns[4:], keep_last=3, pinned=[system])
+
+    assert mm.load_context() == [system] + turns[3:]
+    assert mm.load_transcript() == turns  # pruned messages are kept on disk
+
+    mm2 = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    assert mm2.load_context() == [system] + turns[3:]
+
+
+def test_corrupt_transcript_loads_empty_window():
+    """A bad transcript line or a pointer landing mid-line gives an empty window, not a startup crash."""
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    system = {"role": "system", "content": "System"}
+    mm.append_context([{"role": "user", "content": "Hi"}, {"role": "user", "content": "Again"}], keep_last=2, pinned=[system])
+    with open(mm.transcript_file, "ab") as f:
+        f.write(b"{not json\n")
+    mm.append_context([{"role": "user", "content": "Later"}], keep_last=4)
+
+    reloaded = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    assert reloaded.load_context() == [system]
+    assert [m["content"] for m in reloaded.load_transcript()] == ["Hi", "Again", "Later"]
+
+    with open(mm.window_file, "r", encoding="utf-8") as f:
+        pointer = json.load(f)
+    pointer.update(offset=3, count=1)
+    with open(mm.window_file, "w", encoding="utf-8") as f:
+        json.dump(pointer, f)
+    assert MemoryManager(memory_dir=TEST_MEMORY_DIR).load_context() == [system]
+
+
+def test_clear_context_keeps_history_by_default():
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    mm.append_context([{"role": "user", "content": "Hi"}], keep_last=1)
+    mm.clear_context()
+    assert mm.load_context() == []
+    assert len(mm.load_transcript()) == 1
+
+    mm.clear_context(keep_history=False)
+    assert mm.load_transcript() == []
+    assert MemoryManager(memory_dir=TEST_MEMORY_DIR).load_context() == []
+
+
+def test_legacy_context_json_is_migrated():
+    legacy = [{"role": "system", "content": "S"}, {"role": "user", "content": "Old"}]
+    with open(os.path.join(TEST_MEMORY_DIR, "context.json"), "w", encoding="utf-8") as f:
+        json.dump(legacy, f)
+    mm = MemoryManager(memory_dir=TEST_MEMORY_DIR)
+    assert mm.load_context() == legacy
+    assert MemoryManager(memory_dir=TEST_MEMORY_DIR).load_context() == legacy
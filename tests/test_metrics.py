@@ -0,0 +1,60 @@
+import json
+from core.metrics import StageMetrics, RollingHistogram
+
+
+def test_histogram_percentiles_over_rolling_window():
+    histogram = RollingHistogram(window=100)
+    for ms in range(1, 201):
+        histogram.add(ms / 1000)
+    summary = histogram.summary()
+    # Lifetime count and max, percentiles over the last 100 samples (101..200 ms)
+    assert summary["count"] == 200
+    assert summary["max_ms"] == 200.0
+    assert 150 <= summary["p50_ms"] <= 151
+    assert 195 <= summary["p95_ms"] <= 196
+    assert 199 <= summary["p99_ms"] <= 200
+
+
+def test_time_and_timed_record_samples():
+    metrics = StageMetrics()
+
+    @metrics.timed("work")
+    def work(x):
+        return x * 2
+
+    with metrics.time("block"):
+        pass
+    assert work(21) == 42
+    assert work(1) == 2
+
+    summary = metrics.summary()
+    assert list(summary) == ["block", "work"]
+    assert summary["work"]["count"] == 2
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = StageMetrics(enabled=False)
+    with metrics.time("block"):
+        pass
+    metrics.record("llm", 1.0)
+    assert metrics.time("a") is metrics.time("b")
+    assert metrics.summary() == {}
+
+
+def test_periodic_json_lines_dump(tmp_path):
+    path = tmp_path / "stats" / "stage_metrics.jsonl"
+    metrics = StageMetrics(dump_file=str(path), dump_interval=3600)
+    metrics.record("recall", 0.002)
+
+    metrics.maybe_dump()
+    assert not path.exists()
+
+    metrics.dump_interval = 0
+    metrics.maybe_dump()
+    metrics.record("recall", 0.004)
+    metrics.maybe_dump()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 2
+    assert lines[0]["stages"]["recall"]["count"] == 1
+    assert lines[1]["stages"]["recall"]["count"] == 2
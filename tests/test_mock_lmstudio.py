@@ -0,0 +1,76 @@
+import time
+import pytest
+from unittest.mock import patch
+
+from benchmarks.mock_lmstudio import start_mock_server
+from core import api_connector
+from core.http_client import create_session
+from core.lmstudio_client import LMStudioClient
+
+MESSAGES = [{"role": "user", "content": "Tell me about ravens."}]
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def start(**config):
+        server, url = start_mock_server(**config)
+        servers.append(server)
+        return server, url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_replies_are_seeded_and_deterministic(mock_server):
+    _, url = mock_server(seed=7)
+    _, other_url = mock_server(seed=8)
+    with patch.object(api_connector, "API_URL", url):
+        first = api_connector.send_message(MESSAGES)
+        assert api_connector.send_message(MESSAGES) == first
+    with patch.object(api_connector, "API_URL", other_url):
+        assert api_connector.send_message(MESSAGES) != first
+    assert first.endswith(".")
+
+
+def test_streaming_matches_plain_reply_and_respects_rates(mock_server):
+    _, url = mock_server(gen_tps=200, reply_tokens=20)
+    with patch.object(api_connector, "API_URL", url):
+        plain = api_connector.send_message(MESSAGES)
+
+        start = time.perf_counter()
+        fragments = []
+        for fragment in api_connector.stream_message(MESSAGES):
+            if not fragments:
+                first_token = time.perf_counter() - start
+            fragments.append(fragment)
+        total = time.perf_counter() - start
+
+    assert "".join(fragments) == plain
+    assert len(fragments) == 20
+    assert total >= 20 / 200
+    assert first_token < total
+
+
+def test_injected_errors_are_retried_or_surface(mock_server):
+    server, url = mock_server()
+    server.fail_next(1)
+    with patch.object(api_connector, "API_URL", url):
+        assert not api_connector.send_message(MESSAGES).startswith("[")
+
+    server.fail_next(5)
+    client = LMStudioClient(base_url=url, session=create_session(retries=1, backoff_factor=0))
+    assert client.send_message(MESSAGES) is None
+
+
+def test_usage_reports_prefix_cache_hits(mock_server):
+    server, url = mock_server(reply_text="Noted.")
+    client = LMStudioClient(base_url=url, session=create_session())
+    client.send_message(MESSAGES)
+    client.send_message(MESSAGES + [{"role": "assistant", "content": "Noted."}, {"role": "user", "content": "More."}])
+    first, second = server.prefix_stats
+    assert first["reused_tokens"] == 0
+    assert 0 < second["reused_tokens"] < second["prompt_tokens"]
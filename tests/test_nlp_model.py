@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+from unittest.mock import patch, MagicMock
+import core.nlp_model as nlp_model
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_model_is_not_loaded_at_import():
+    """Importing the conversation manager must not pay for spaCy (checked in a fresh interpreter)."""
+    check = (
+        "import sys, core.conversation_manager, core.nlp_model as nlp_model; "
+        "assert 'spacy' not in sys.modules, 'spacy imported'; "
+        "assert not nlp_model.is_loaded(), 'model loaded'"
+    )
+    result = subprocess.run([sys.executable, "-c", check], cwd=REPO_ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_get_nlp_loads_once_with_trimmed_pipeline():
+    nlp_model.reset()
+    fake = MagicMock()
+    with patch("spacy.load", return_value=fake) as mock_load:
+        assert nlp_model.get_nlp() is fake
+        assert nlp_model.get_nlp() is fake
+
+    mock_load.assert_called_once()
+    assert mock_load.call_args.args[0] == nlp_model.MODEL_NAME
+    excluded = mock_load.call_args.kwargs["exclude"]
+    assert "parser" in excluded and "lemmatizer" in excluded
+    assert "ner" not in excluded and "tagger" not in excluded
+    nlp_model.reset()
@@ -0,0 +1,61 @@
+import json
+import pstats
+import tracemalloc
+from pathlib import Path
+from unittest.mock import patch
+
+from core.conversation_manager import ConversationManager
+from core.profiling import TurnProfiler
+
+
+def profiled_functions(path):
+    return {func[2] for func in pstats.Stats(str(path)).stats}
+
+
+def test_every_nth_turn_is_profiled(tmp_path):
+    profiler = TurnProfiler(output_dir=str(tmp_path / "profiles"), every=2, enabled=True)
+    cm = ConversationManager(
+        system_prompt="S", memory_dir=str(tmp_path / "memory"), pipelined=True, profiler=profiler
+    )
+    try:
+        with patch("core.conversation_manager.send_message", return_value="Ravens and ink."):
+            for text in ["I love gothic novels.", "I hate loud parties.", "Tell me about ink.", "!info"]:
+                cm.chat(text)
+        cm.wait_for_background()
+    finally:
+        profiler.disable()
+
+    run_dir = Path(profiler.run_dir)
+    index = [json.loads(line) for line in (run_dir / "profiles.jsonl").read_text().splitlines()]
+    assert [entry["turn"] for entry in index] == [2, 4]
+    assert index[0]["label"] == "I hate loud parties."
+
+    # Pipelined post-processing ran inline, so it is in the turn's profile
+    functions = profiled_functions(run_dir / "turn_00002.prof")
+    assert {"_prepare_turn", "_post_process_reply", "_save_context"} <= functions
+
+    snapshot = tracemalloc.Snapshot.load(str(run_dir / "turn_00004.tracemalloc"))
+    assert snapshot.traces
+    assert "Growth since the previous profiled turn" in (run_dir / "turn_00004_alloc.txt").read_text()
+    assert not tracemalloc.is_tracing()
+
+
+def test_disabled_profiler_writes_nothing(tmp_path):
+    profiler = TurnProfiler(output_dir=str(tmp_path / "profiles"))
+    cm = ConversationManager(system_prompt="S", memory_dir=str(tmp_path / "memory"), profiler=profiler)
+    with patch("core.conversation_manager.send_message", return_value="Hi."):
+        cm.chat("!hello")
+        list(cm.chat_stream("!again"))
+    assert profiler.turns == 2
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_profile_turns_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILE_TURNS", "5")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("PROFILE_MEMORY", "0")
+    profiler = TurnProfiler.from_env()
+    assert (profiler.enabled, profiler.every, profiler.trace_memory, profiler.output_dir) == (True, 5, False, str(tmp_path))
+
+    monkeypatch.setenv("PROFILE_TURNS", "0")
+    assert not TurnProfiler.from_env().enabled
@@ -0,0 +1,124 @@
+import threading
+import pytest
+import requests
+from unittest.mock import patch
+
+from core.session_pool import SessionPool
+from chat_server import ChatServer
+
+
+@pytest.fixture
+def pool(tmp_path):
+    return SessionPool(system_prompt="System ready.", root_dir=str(tmp_path), max_concurrent_turns=2)
+
+
+def test_sessions_have_isolated_memory(pool):
+    with patch("core.conversation_manager.send_message", side_effect=["A", "B"]):
+        pool.chat("alice", "I love gothic fiction.")
+        pool.chat("bob", "!hello")
+
+    alice, bob = pool.get("alice").chat, pool.get("bob").chat
+    assert alice.memory.memory_dir != bob.memory.memory_dir
+    assert [m["content"] for m in bob.get_context()[1:]] == ["!hello", "B"]
+    assert bob.memory.get_memory_keys() == []
+
+
+def test_evicted_session_resumes_from_disk(pool):
+    with patch("core.conversation_manager.send_message", side_effect=["First.", "Second."]):
+        pool.chat("alice", "I love gothic fiction.")
+        before = pool.get("alice").chat
+        context, frequency = list(before.get_context()), dict(before.entity_frequency)
+
+        assert pool.evict("alice")
+        assert "alice" not in pool
+
+        resumed = pool.get("alice").chat
+        assert resumed is not before
+        assert resumed.get_context() == context
+        assert dict(resumed.entity_frequency) == frequency
+
+        pool.chat("alice", "!again")
+    assert pool.get("alice").chat.get_context()[-1]["content"] == "Second."
+    assert pool.stats["resumed"] == 1
+
+
+def test_idle_and_overflow_eviction(tmp_path):
+    pool = SessionPool(root_dir=str(tmp_path), max_sessions=2, idle_timeout=0.0)
+    for name in ("a", "b", "c"):
+        pool.get(name)
+    assert len(pool) == 2 and "a" not in pool
+
+    assert pool.evict_idle() == 2
+    assert len(pool) == 0
+
+
+def test_invalid_session_id_rejected(pool):
+    with pytest.raises(ValueError):
+        pool.get("../escape")
+
+
+def test_concurrency_limit(tmp_path):
+    pool = SessionPool(root_dir=str(tmp_path), max_concurrent_turns=1, queue_timeout=0.05)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_reply(messages):
+        started.set()
+        release.wait(5)
+        return "done"
+
+    with patch("core.conversation_manager.send_message", side_effect=slow_reply):
+        worker = threading.Thread(target=pool.chat, args=("a", "!one"))
+        worker.start()
+        started.wait(5)
+        with pytest.raises(TimeoutError):
+            pool.chat("b", "!two")
+        release.set()
+        worker.join()
+    assert pool.stats["rejected"] == 1
+
+
+def test_slow_open_does_not_block_other_sessions(pool):
+    """Opening a session happens outside the pool lock; concurrent gets of it share one open."""
+    import core.session_pool as session_pool
+    alice = pool.get("alice")
+    started, release = threading.Event(), threading.Event()
+    real_manager = session_pool.ConversationManager
+
+    def slow_manager(**kwargs):
+        started.set()
+        release.wait(5)
+        return real_manager(**kwargs)
+
+    results = []
+    with patch.object(session_pool, "ConversationManager", side_effect=slow_manager) as opened:
+        openers = [threading.Thread(target=lambda: results.append(pool.get("bob"))) for _ in range(2)]
+        for thread in openers:
+            thread.start()
+        started.wait(5)
+        assert pool.get("alice") is alice
+        release.set()
+        for thread in openers:
+            thread.join()
+
+    assert opened.call_count == 1
+    assert results[0] is results[1]
+    assert pool.stats["created"] == 2
+
+
+def test_http_round_trip(pool):
+    server = ChatServer(("127.0.0.1", 0), pool)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with patch("core.conversation_manager.send_message", return_value="Hi!"):
+            response = requests.post(f"{base_url}/sessions/alice/chat", json={"message": "!hello"})
+        assert response.status_code == 200
+        assert response.json()["reply"] == "Hi!"
+
+        assert requests.post(f"{base_url}/sessions/alice/chat", data=b"nope").status_code == 400
+        assert requests.delete(f"{base_url}/sessions/alice").json() == {"evicted": True}
+        assert requests.get(f"{base_url}/health").json()["turns"] == 1
+        assert "turn" in requests.get(f"{base_url}/stats").json()["stages"]
+    finally:
+        server.shutdown()
+        server.server_close()
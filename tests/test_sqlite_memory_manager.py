@@ -0,0 +1,103 @@
+import json
+import pytest
+from core.memory_manager import MemoryManager
+from core.sqlite_memory_manager import SQLiteMemoryManager
+
+
+@pytest.fixture
+def store(tmp_path):
+    mm = SQLiteMemoryManager(memory_dir=str(tmp_path))
+    yield mm
+    mm.close()
+
+
+def test_same_api_as_json_backend(store, tmp_path):
+    """set/get/metadata behave like MemoryManager and persist across reopen."""
+    store.set_memory_entry("book", {"type": "preference", "score": 0.5, "timestamp": "2024-01-01T00:00:00"})
+    store.set_memory_entries({"movie": {"score": 0.9}, "party": {"score": -0.7}})
+
+    assert store.get_memory_data("book")["score"] == 0.5
+    assert store.get_memory_data("missing") is None
+    metadata = store.get_memory_metadata()
+    assert metadata["total_entries"] == 3
+    assert metadata["last_updated"] != "never"
+
+    reopened = SQLiteMemoryManager(memory_dir=str(tmp_path))
+    assert set(reopened.get_memory_keys()) == {"book", "movie", "party"}
+    assert "_last_updated" in reopened.get_memory_data()
+    reopened.close()
+
+
+def test_wal_mode_and_indexes(store):
+    with store._lock:
+        assert store._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        plan = store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT key, score FROM entries WHERE score > ? ORDER BY score DESC LIMIT ?",
+            (0.1, 5)
+        ).fetchall()
+    assert any("idx_entries_score" in row[-1] for row in plan)
+
+
+def test_indexed_queries(store):
+    store.set_memory_entries({
+        "poe": {"type": "preference", "score": 0.9, "timestamp": "2024-01-01T00:00:00"},
+        "art": {"type": "preference", "score": 0.4, "timestamp": "2024-02-01T00:00:00"},
+        "party": {"type": "sentiment", "score": -0.8, "timestamp": "2024-03-01T00:00:00"},
+        "noise": {"type": "sentiment", "score": -0.2, "timestamp": "2024-04-01T00:00:00"},
+    })
+    assert store.get_top_entries(1, above=0.1) == [("poe", 0.9)]
+    assert [k for k, _ in store.get_top_entries(5, below=-0.1)] == ["party", "noise"]
+    assert [k for k, _ in store.get_entries_between("2024-01-15", "2024-03-15")] == ["art", "party"]
+    assert {k for k, _ in store.get_entries_by_type("sentiment")} == {"party", "noise"}
+
+
+def test_transaction_rolls_back(store):
+    store.set_memory_entry("book", {"score": 0.5})
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.set_memory_entry("book", {"score": -1})
+            store.set_memory_entry("ghost", {"score": 0})
+            raise RuntimeError("abort")
+    assert store.get_memory_data("book") == {"score": 0.5}
+    assert store.get_memory_data("ghost") is None
+
+
+def test_write_listener_and_scores(store):
+    """Listeners see committed writes once per transaction (none on rollback); scores come from one query."""
+    seen = []
+    store.add_write_listener(seen.append)
+    store.set_memory_entry("book", {"score": 0.5})
+    with store.transaction():
+        store.set_memory_entries({"movie": {"score": 0.9}, "party": {"type": "fact"}})
+        assert len(seen) == 1
+    try:
+        with store.transaction():
+            store.set_memory_entry("ghost", {"score": 0})
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+
+    assert seen == [{"book": {"score": 0.5}}, {"movie": {"score": 0.9}, "party": {"type": "fact"}}]
+    assert store.get_memory_scores() == [("book", 0.5), ("movie", 0.9), ("party", 0)]
+    store.clear_memory()
+    assert seen[-1] is None
+
+
+def test_clear_memory(store):
+    store.set_memory_entry("book", {"score": 0.5})
+    store.clear_memory()
+    assert store.get_memory_metadata()["total_entries"] == 0
+    assert store.get_memory_data() == {}
+
+
+def test_migrates_existing_memory_json(tmp_path):
+    """Opening a new database next to memory.json imports its entries once."""
+    legacy = MemoryManager(memory_dir=str(tmp_path))
+    legacy.set_memory_entries({"book": {"score": 0.5}, "movie": {"score": 0.9}})
+    with open(legacy.memory_file, "r", encoding="utf-8") as f:
+        last_updated = json.load(f)["_last_updated"]
+
+    store = SQLiteMemoryManager(memory_dir=str(tmp_path))
+    assert store.get_memory_metadata() == {"total_entries": 2, "last_updated": last_updated}
+    assert store.get_memory_data("movie") == {"score": 0.9}
+    store.close()
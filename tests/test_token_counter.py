@@ -0,0 +1,29 @@
+from core.token_counter import TokenCounter, approximate_token_count, TOKENS_PER_MESSAGE
+
+
+def test_approximate_token_count():
+    assert approximate_token_count("") == 0
+    assert approximate_token_count("Hello, world!") == 4
+    # Long unbroken strings fall back to ~4 characters per token
+    assert approximate_token_count("x" * 400) == 100
+
+
+def test_counts_are_cached_per_text():
+    calls = []
+
+    def count_fn(text):
+        calls.append(text)
+        return len(text.split())
+
+    counter = TokenCounter(count_fn)
+    message = {"role": "user", "content": "one two three"}
+    assert counter.count_message(message) == 3 + TOKENS_PER_MESSAGE
+    assert counter.count_messages([message, message]) == 2 * (3 + TOKENS_PER_MESSAGE)
+    assert calls == ["one two three"]
+
+
+def test_cache_is_bounded():
+    counter = TokenCounter(len, cache_size=2)
+    for text in ("a", "bb", "ccc"):
+        counter.count_text(text)
+    assert list(counter._cache) == ["bb", "ccc"]
@@ -0,0 +1,26 @@
+import numpy as np
+
+from benchmarks.turn_latency_benchmark import build_synthetic_store, conversation_script
+from core.memory_manager import MemoryManager
+
+
+def test_synthetic_store_loads_with_memory_manager(tmp_path):
+    words = ["raven", "moon", "ink", "manor"]
+    word_vectors = np.eye(4, dtype=np.float32)
+    build_synthetic_store(str(tmp_path), 20, words, word_vectors, seed=1)
+
+    memory = MemoryManager(memory_dir=str(tmp_path))
+    keys = memory.get_memory_keys()
+    assert len(keys) == 20 and len(set(keys)) == 20
+    assert memory.get_memory_metadata()["total_entries"] == 20
+
+    # Each entity's vector is the mean of its two words' vectors
+    first, second = keys[0].split(" ")[:2]
+    expected = (word_vectors[words.index(first)] + word_vectors[words.index(second)]) / 2
+    np.testing.assert_allclose(memory.get_entity_vector(keys[0]), expected)
+
+
+def test_conversation_script_is_seeded():
+    words = ["raven", "moon", "ink"]
+    assert conversation_script(words, 5, seed=3) == conversation_script(words, 5, seed=3)
+    assert len(conversation_script(words, 5)) == 5
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from core.vector_index import EntityVectorIndex
+
+
+def test_upsert_normalizes_and_grows():
+    """Rows are stored pre-normalized and the matrix grows past its initial capacity."""
+    index = EntityVectorIndex(initial_capacity=2)
+    for i in range(5):
+        index.upsert(f"key{i}", [float(i + 1), 0.0, 0.0])
+
+    assert len(index) == 5
+    assert index.vectors.shape == (5, 3)
+    assert np.allclose(np.linalg.norm(index.vectors, axis=1), 1.0)
+
+
+def test_zero_vector_marked_invalid():
+    """Entities without a vector never show up in recall."""
+    index = EntityVectorIndex()
+    index.upsert("empty", [0.0, 0.0])
+    index.upsert("real", [1.0, 0.0])
+
+    results = index.weighted_top_k([1.0, 0.0], threshold=0.0, k=5)
+    assert [r[0] for r in results] == ["real"]
+
+
+def test_remove_keeps_rows_consistent():
+    """Removing a key moves the last row into its slot without mixing up keys."""
+    index = EntityVectorIndex()
+    index.upsert("a", [1.0, 0.0])
+    index.upsert("b", [0.0, 1.0])
+    index.upsert("c", [1.0, 1.0], score=0.5)
+    index.remove("a")
+
+    assert "a" not in index
+    assert index.rows["c"] == 0
+    assert index.scores[0] == pytest.approx(0.5)
+
+
+def test_dimension_mismatch_rejected():
+    index = EntityVectorIndex()
+    index.upsert("a", [1.0, 0.0])
+    with pytest.raises(ValueError):
+        index.upsert("b", [1.0, 0.0, 0.0])
+
+
+def test_weighted_top_k_matches_reference():
+    """Vectorized weighting reproduces the per-entry formula and ordering."""
+    rng = np.random.default_rng(0)
+    index = EntityVectorIndex()
+    reference = []
+    for i in range(200):
+        vec = rng.standard_normal(16).astype(np.float32)
+        score = float(rng.uniform(-1, 1))
+        freq = int(rng.integers(0, 5))
+        index.upsert(f"e{i}", vec, score=score, frequency=freq)
+        reference.append((f"e{i}", vec, score, freq))
+
+    query = rng.standard_normal(16).astype(np.float32)
+    threshold = 0.2
+    expected = []
+    for key, vec, score, freq in reference:
+        sim = float(np.dot(vec, query) / (np.linalg.norm(vec) * np.linalg.norm(query)))
+        weighted = sim * (1 + abs(score)) * (1 + freq * 0.1)
+        if sim >= threshold or weighted > threshold:
+            expected.append((key, weighted))
+    expected.sort(key=lambda x: x[1], reverse=True)
+
+    results = index.weighted_top_k(query, threshold=threshold, k=5)
+    assert [r[0] for r in results] == [key for key, _ in expected[:5]]
+    assert [r[1] for r in results] == pytest.approx([w for _, w in expected[:5]], rel=1e-5)
+
+
+def test_weighted_top_k_cutoff_ties_go_to_lower_rows():
+    """Rows tied at the k-th score are chosen by row id, also for a shuffled candidate subset."""
+    index = EntityVectorIndex()
+    for i in range(50):
+        index.upsert(f"e{i}", [1.0, 0.0])
+
+    assert [r[0] for r in index.weighted_top_k([1.0, 0.0], 0.5, 3)] == ["e0", "e1", "e2"]
+    rows = np.random.default_rng(0).permutation(np.arange(10, 50))
+    assert [r[0] for r in index.weighted_top_k([1.0, 0.0], 0.5, 3, rows=rows)] == ["e10", "e11", "e12"]
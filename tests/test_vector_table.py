@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+import spacy
+from core.vector_table import VectorTable, build_vector_table
+
+
+@pytest.fixture
+def small_nlp():
+    """Blank pipeline with a handful of vectors (no model download needed)."""
+    nlp = spacy.blank("en")
+    nlp.vocab.set_vector("gothic", np.array([1.0, 0.0, 0.0], dtype=np.float32))
+    nlp.vocab.set_vector("fiction", np.array([0.0, 1.0, 0.0], dtype=np.float32))
+    nlp.vocab.set_vector("Poe", np.array([0.0, 0.0, 2.0], dtype=np.float32))
+    return nlp
+
+
+def test_table_lookup_matches_vocab(small_nlp, tmp_path):
+    build_vector_table(small_nlp, str(tmp_path))
+    assert VectorTable.exists(str(tmp_path))
+
+    table = VectorTable(str(tmp_path))
+    assert table.dim == 3
+    assert np.allclose(table.word_vector("Poe"), [0.0, 0.0, 2.0])
+    assert table.word_vector("poe") is None  # lookups are exact, like spaCy's ORTH keys
+    assert isinstance(table.vectors, np.memmap)
+
+
+def test_text_vector_averages_like_doc_vector(small_nlp, tmp_path):
+    """OOV tokens count as zeros in the mean, matching Doc.vector."""
+    build_vector_table(small_nlp, str(tmp_path))
+    table = VectorTable(str(tmp_path))
+
+    for text in ["gothic fiction", "gothic fiction by Poe", "unknown words"]:
+        assert np.allclose(table.text_vector(text), small_nlp(text).vector)
+    assert not np.any(table.text_vector(""))
+
+
+def test_float16_table(small_nlp, tmp_path):
+    build_vector_table(small_nlp, str(tmp_path), dtype="float16")
+    table = VectorTable(str(tmp_path))
+    assert table.vectors.dtype == np.float16
+    assert table.text_vector("gothic fiction").dtype == np.float32
+    assert table.meta["dtype"] == "float16"